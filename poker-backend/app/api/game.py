@@ -1,11 +1,15 @@
-from fastapi import APIRouter, HTTPException
+import asyncio
+from dataclasses import replace
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
 from app.schemas import StartHandRequest, ActionRequest
 from app.repository.hand_repository import HandRepository
-from app.services.hand_service import HandService
+from app.services.hand_service import ActionConflict, HandService
+from app.services import table_feed as feed
 from app.db.connection import _pool
-from app.utils.deck import make_deck, deal_hole_cards
+from app.serialization import json_response
+from app.utils.deck import Deck, card_list, cards_to_str
 
-router = APIRouter(prefix="/game")
+router = APIRouter()  # mounted under /game in app/main.py
 
 # Start a new hand
 @router.post("/start-hand")
@@ -17,6 +21,7 @@ async def start_hand(req: StartHandRequest):
 
     state = {
         "handId": hand.id,
+        "version": hand.version,  # send back with the next action
         "players": [{"id": i, "name": p, "stack": stacks[i], "cards": []} for i, p in enumerate(req.players)],
         "communityCards": [],
         "pot": 0,
@@ -31,7 +36,7 @@ async def start_hand(req: StartHandRequest):
         "winner": None
     }
     log = ["New hand started."]
-    return {"state": state, "log": log}
+    return json_response({"state": state, "log": log})
 
 # Deal hole cards
 @router.post("/deal")
@@ -44,14 +49,16 @@ async def deal_cards(hand_id: int):
 
     # Deal cards only if not already dealt
     if not hand.hole_cards:
-        hole_cards_list, deck = deal_hole_cards(make_deck(), len(hand.players))
-        hole_cards_dict = {str(i): cards for i, cards in enumerate(hole_cards_list)}
-        hand.hole_cards = hole_cards_dict
-        await repo.update_hole_cards(hand.id, hole_cards_dict)
+        deck = Deck.shuffled()
+        hole_cards_dict = {str(i): cards_to_str(cards) for i, cards in enumerate(deck.deal_hole_cards(len(hand.players)))}
+        version = await repo.update_hole_cards(hand.id, hole_cards_dict, hand.created_at)
+        # the cached hand is shared: never mutate it
+        hand = replace(hand, hole_cards=hole_cards_dict, version=hand.version if version is None else version)
 
     state = {
         "handId": hand.id,
-        "players": [{"id": i, "name": name, "stack": 0, "cards": hand.hole_cards.get(str(i), [])} 
+        "version": hand.version,  # dealing moved it on: send this one back with the next action
+        "players": [{"id": i, "name": name, "stack": 0, "cards": card_list(hand.hole_cards.get(str(i), ""))} 
                     for i, name in enumerate(hand.players)],
         "communityCards": [],
         "pot": 0,
@@ -63,18 +70,25 @@ async def deal_cards(hand_id: int):
         "winner": None
     }
     log = ["Hole cards dealt."]
-    return {"state": state, "log": log}
+    return json_response({"state": state, "log": log})
 
 # Submit player action
 @router.post("/action")
 async def submit_action(action_req: ActionRequest):
     repo = HandRepository(_pool)
     svc = HandService(repo)
-    updated_hand = await svc.submit_action(action_req.hand_id, action_req.dict())
+    try:
+        updated_hand = await svc.submit_action(action_req.hand_id,
+                                               action_req.dict(exclude={"version", "idempotency_key"}),
+                                               version=action_req.version,
+                                               idempotency_key=action_req.idempotency_key)
+    except ActionConflict as exc:
+        raise HTTPException(409, str(exc))
 
     state = {
         "handId": updated_hand.id,
-        "players": [{"id": i, "name": name, "stack": 0, "cards": updated_hand.hole_cards.get(str(i), [])} 
+        "version": updated_hand.version,
+        "players": [{"id": i, "name": name, "stack": 0, "cards": card_list(updated_hand.hole_cards.get(str(i), ""))} 
                     for i, name in enumerate(updated_hand.players)],
         "communityCards": getattr(updated_hand, "community_cards", []),
         "pot": getattr(updated_hand, "pot", 0),
@@ -86,4 +100,61 @@ async def submit_action(action_req: ActionRequest):
         "winner": getattr(updated_hand, "winner", None)
     }
     log = [f"Player action: {action_req.action}"]
-    return {"state": state, "log": log}
+    return json_response({"state": state, "log": log})
+
+# Follow a table: a full snapshot first, then incremental diffs as the hand changes
+@router.websocket("/ws/{hand_id}")
+async def table_socket(websocket: WebSocket, hand_id: int):
+    await websocket.accept()
+    subscriber = feed.table_feed.subscribe(hand_id)
+    try:
+        if not feed.table_feed.has_snapshot(hand_id):
+            repo = HandRepository(_pool)
+            hand = await repo.get_hand(hand_id)
+            if not hand:
+                await websocket.close(code=4404, reason="Hand not found")
+                return
+            try:
+                state = await HandService(repo).get_state(hand_id) if hand.hole_cards else None
+            except ValueError as exc:  # gone since, or not replayable
+                await websocket.close(code=4422, reason=str(exc))
+                return
+            feed.table_feed.seed(hand, state)
+        await _pump(websocket, subscriber)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        feed.table_feed.unsubscribe(subscriber)
+
+async def _pump(websocket: WebSocket, subscriber: feed.Subscriber):
+    """Forward queued messages, pinging when idle, until the client goes away or stops reading."""
+    # Anything the client sends (e.g. pongs) is read and ignored; reading is how a disconnect shows up
+    closed = asyncio.ensure_future(_read_until_closed(websocket))
+    message = None
+    try:
+        while True:
+            if message is None:
+                message = asyncio.ensure_future(subscriber.get())
+            done, _ = await asyncio.wait({message, closed}, timeout=feed.HEARTBEAT_INTERVAL,
+                                         return_when=asyncio.FIRST_COMPLETED)
+            if closed in done:
+                return
+            if message in done:
+                text, message = message.result(), None
+            else:
+                text = feed.PING
+            try:
+                await asyncio.wait_for(websocket.send_text(text), feed.SEND_TIMEOUT)
+            except asyncio.TimeoutError:
+                # Stuck consumer: drop it rather than hold its messages forever
+                await websocket.close(code=1013, reason="Client too slow")
+                return
+    finally:
+        closed.cancel()
+        if message is not None:
+            message.cancel()
+
+async def _read_until_closed(websocket: WebSocket):
+    while True:
+        if (await websocket.receive())["type"] == "websocket.disconnect":
+            return
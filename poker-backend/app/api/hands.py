@@ -1,10 +1,21 @@
-from fastapi import APIRouter, HTTPException
-from app.schemas import StartHandRequest, ActionRequest, HandResponse
+import asyncio
+from datetime import datetime
+from functools import partial
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from app.schemas import StartHandRequest, ActionRequest, HandResponse, EquityResponse, IngestReport
 from app.repository.hand_repository import HandRepository
-from app.services.hand_service import HandService
+from app.repository.hand_cache import hand_etag
+from app.services.hand_service import ActionConflict, HandService
+from app.services.equity import (MAX_ITERATIONS, MAX_TIME_BUDGET_MS, compute_equity, get_equity_executor,
+                                 hand_equity_inputs)
+from app.services.export import csv_lines, ndjson_lines
+from app.services.ingest import DEFAULT_CHUNK_SIZE, ingest_ndjson, iter_lines
+from app.serialization import model_response
 from app.db.connection import _pool
 
-router = APIRouter(prefix="/hands")
+router = APIRouter()  # mounted under /hands in app/main.py
 
 @router.post("", status_code=201, response_model=HandResponse)
 async def start_hand(req: StartHandRequest):
@@ -12,19 +23,75 @@ async def start_hand(req: StartHandRequest):
     svc = HandService(repo)
     stacks = req.stacks or [1000]*len(req.players)
     hand = await svc.start_hand(req.players, stacks, dealer=req.dealer, big_blind=req.big_blind)
-    return hand
+    return model_response(HandResponse, hand, status_code=201)
+
+@router.post("/import", response_model=IngestReport)
+async def import_hands(request: Request, chunk_size: int = Query(DEFAULT_CHUNK_SIZE, ge=1, le=50_000)):
+    """Bulk-load NDJSON hands from the request body, streamed and COPYed in chunks."""
+    repo = HandRepository(_pool)
+    return await ingest_ndjson(repo, iter_lines(request.stream()), chunk_size=chunk_size)
+
+# Declared before /{hand_id} so "export" isn't parsed as a hand id
+@router.get("/export")
+async def export_hands(
+    format: str = Query("ndjson", regex="^(ndjson|csv)$"),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    player: Optional[str] = None,
+    page_size: int = Query(1000, ge=1, le=10_000),
+):
+    repo = HandRepository(_pool)
+    hands = repo.iter_hands(since=since, until=until, player=player, page_size=page_size)
+    if format == "csv":
+        return StreamingResponse(csv_lines(hands), media_type="text/csv")
+    return StreamingResponse(ndjson_lines(hands), media_type="application/x-ndjson")
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
 
 @router.get("/{hand_id}", response_model=HandResponse)
-async def get_hand(hand_id: int):
+async def get_hand(hand_id: int, request: Request, response: Response):
     repo = HandRepository(_pool)
-    hand = await repo.get_hand(hand_id)
+    hand = await repo.get_hand(hand_id)  # served from the hand cache when it is current
     if not hand:
         raise HTTPException(404, "Hand not found")
-    return hand
+    etag = hand_etag(hand)
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return model_response(HandResponse, hand, headers={"ETag": etag})
 
 @router.post("/{hand_id}/action", response_model=HandResponse)
-async def submit_action(hand_id: int, action: ActionRequest):
+async def submit_action(hand_id: int, action: ActionRequest, response: Response):
     repo = HandRepository(_pool)
     svc = HandService(repo)
-    updated_hand = await svc.submit_action(hand_id, action.dict())
-    return updated_hand
+    try:
+        updated_hand = await svc.submit_action(hand_id, action.dict(exclude={"version", "idempotency_key"}),
+                                               version=action.version, idempotency_key=action.idempotency_key)
+    except ActionConflict as exc:
+        raise HTTPException(409, str(exc))
+    etag = response.headers["ETag"] = hand_etag(updated_hand)
+    return model_response(HandResponse, updated_hand, headers={"ETag": etag})
+
+@router.get("/{hand_id}/equity", response_model=EquityResponse)
+async def get_equity(
+    hand_id: int,
+    iterations: int = Query(50_000, ge=1, le=MAX_ITERATIONS),
+    time_budget_ms: int = Query(200, ge=1, le=MAX_TIME_BUDGET_MS),
+    seed: Optional[int] = Query(None, ge=0),
+):
+    repo = HandRepository(_pool)
+    hand = await repo.get_hand(hand_id)
+    if not hand:
+        raise HTTPException(404, "Hand not found")
+    if not hand.hole_cards:
+        raise HTTPException(409, "Hole cards not dealt yet")
+
+    # Runs in a worker process so long simulations don't block the event loop
+    job = partial(compute_equity, **hand_equity_inputs(hand), iterations=iterations,
+                  time_budget=time_budget_ms / 1000, seed=seed)
+    result = await asyncio.get_running_loop().run_in_executor(get_equity_executor(), job)
+    return {"hand_id": hand_id, **result}
@@ -0,0 +1,9 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.metrics import CONTENT_TYPE, REGISTRY
+
+router = APIRouter()  # mounted under /metrics in app/main.py
+
+@router.get("", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
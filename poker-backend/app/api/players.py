@@ -0,0 +1,15 @@
+from fastapi import APIRouter, HTTPException
+from app.schemas import PlayerStatsResponse
+from app.repository.player_stats_repository import PlayerStatsRepository
+from app.services.player_stats import summarize
+from app.db.connection import _pool
+
+router = APIRouter()  # mounted under /players in app/main.py
+
+@router.get("/{name}/stats", response_model=PlayerStatsResponse)
+async def get_player_stats(name: str):
+    repo = PlayerStatsRepository(_pool)
+    row = await repo.get_stats(name)
+    if not row:
+        raise HTTPException(404, "Player not found")
+    return summarize(row)
@@ -0,0 +1,54 @@
+"""Move finished hands older than a cutoff out of the hot hands table into hands_archive.
+
+    poetry run archive-hands --older-than-days 30
+
+Also creates the coming days' hands partitions and drops the old ones archiving
+has emptied, so it can run from cron as the one maintenance job. Archived hands
+are still served by GET /hands/{id}, the exporters and the audit.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+from dotenv import load_dotenv
+
+from app.db.connection import create_pool
+from app.repository.hand_repository import HandRepository
+
+
+async def run(args):
+    before = datetime.now(timezone.utc) - timedelta(days=args.older_than_days)
+    pool = await create_pool(args.database_url, min_size=1, max_size=2)
+    try:
+        repo = HandRepository(pool)
+        report = {"before": before.isoformat(),
+                  "partitions_created": await repo.ensure_partitions(args.days_ahead)}
+        report["archived"] = await repo.archive_hands(before, args.batch_size)
+        report["partitions_dropped"] = 0 if args.keep_partitions else await repo.drop_empty_partitions(before)
+        return report
+    finally:
+        await pool.close()
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--older-than-days", type=float, default=float(os.getenv("ARCHIVE_AFTER_DAYS", "30")))
+    parser.add_argument("--batch-size", type=int, default=1000, help="hands moved per transaction")
+    parser.add_argument("--days-ahead", type=int, default=int(os.getenv("HAND_PARTITION_DAYS_AHEAD", "7")),
+                        help="daily partitions to have ready")
+    parser.add_argument("--keep-partitions", action="store_true", help="do not drop emptied partitions")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"))
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    report = asyncio.run(run(args))
+    report["seconds"] = time.perf_counter() - started
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
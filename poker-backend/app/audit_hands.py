@@ -0,0 +1,58 @@
+"""Replay every stored hand and report hands whose stacks, board or payoffs do not follow from it.
+
+    poetry run audit-hands --workers 8 --checkpoint audit.json --out mismatches.ndjson
+
+Interrupt it and run the same command again to resume after the last checkpoint;
+--restart starts over. Mismatches are appended to --out as NDJSON.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+from app.db.connection import create_pool
+from app.repository.hand_repository import HandRepository
+from app.services.audit import DEFAULT_CHUNK_SIZE, audit_hands
+
+
+def _progress(report):
+    print(f"\r{report['audited']:,} hands, {report['mismatches']:,} mismatches, "
+          f"{report['hands_per_sec']:,.0f} hands/s", end="", file=sys.stderr, flush=True)
+
+
+async def run(args):
+    if args.restart and args.checkpoint and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+    pool = await create_pool(args.database_url, min_size=1, max_size=2)
+    try:
+        with open(args.out, "a", encoding="utf-8") as out:
+            return await audit_hands(HandRepository(pool), args.workers, args.chunk_size, args.checkpoint, out,
+                                     until=args.until, progress=_progress)
+    finally:
+        await pool.close()
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--checkpoint", default="audit-checkpoint.json", help="progress file ('' to disable)")
+    parser.add_argument("--out", default="audit-mismatches.ndjson")
+    parser.add_argument("--until", type=datetime.fromisoformat, default=None,
+                        help="only hands created before this ISO timestamp")
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and audit everything")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"))
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    print(file=sys.stderr)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
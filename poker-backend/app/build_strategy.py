@@ -0,0 +1,39 @@
+"""Build the bot strategy tables and write them to a memory-mappable file.
+
+    poetry run build-strategy [--out app/data/strategy.bin] [--seed 0]
+
+The output is deterministic for a given seed and sample counts; commit it after
+changing the abstraction or the ranges in app/services/strategy_builder.py.
+"""
+import argparse
+import json
+import os
+import time
+
+from app.services.strategy import DEFAULT_PATH, StrategyTables
+from app.services.strategy_builder import build_tables
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", default=DEFAULT_PATH)
+    parser.add_argument("--preflop-samples", type=int, default=20_000, help="runouts per starting-hand class")
+    parser.add_argument("--postflop-samples", type=int, default=100_000, help="random deals per street")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    data = build_tables(args.preflop_samples, args.postflop_samples, args.seed)
+    StrategyTables(data)  # refuse to write a file the engine would not load
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    tmp = args.out + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, args.out)  # processes that already mapped the old file keep reading it
+
+    report = {"path": args.out, "bytes": len(data), "seconds": time.perf_counter() - started}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,92 @@
 import os
+import time
 import asyncpg
-from typing import Optional
+import orjson
+from typing import Any, Dict, Optional
+
+from app.metrics import DB_POOL_ACQUIRE_SECONDS, REGISTRY, Sampled
 
 _pool: Optional[asyncpg.pool.Pool] = None
 
+def pool_settings() -> Dict[str, Any]:
+    """Pool sizing and connection lifetime, from DB_POOL_* / DB_* environment variables."""
+    timeout = float(os.getenv("DB_COMMAND_TIMEOUT", "0"))
+    return {
+        "min_size": int(os.getenv("DB_POOL_MIN_SIZE", "2")),
+        "max_size": int(os.getenv("DB_POOL_MAX_SIZE", "20")),
+        # recycle a connection after this many queries, or when idle this many seconds (0 = never)
+        "max_queries": int(os.getenv("DB_POOL_MAX_QUERIES", "50000")),
+        "max_inactive_connection_lifetime": float(os.getenv("DB_POOL_MAX_IDLE_SECONDS", "300")),
+        "statement_cache_size": int(os.getenv("DB_STATEMENT_CACHE_SIZE", "256")),
+        "command_timeout": timeout or None,  # seconds per statement (0 = no limit)
+    }
+
+
+def _dumps(value: Any) -> str:
+    # Payoffs are keyed by seat number; JSON object keys become strings either way
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+def _jsonb_encode(value: Any) -> bytes:
+    return b"\x01" + orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)  # jsonb binary format version 1
+
+
+def _jsonb_decode(data: bytes) -> Any:
+    return orjson.loads(data[1:])
+
+
+async def init_connection(conn: asyncpg.Connection) -> None:
+    """Per-connection setup: json/jsonb values are encoded and decoded with orjson."""
+    await conn.set_type_codec("jsonb", schema="pg_catalog", format="binary",
+                              encoder=_jsonb_encode, decoder=_jsonb_decode)
+    await conn.set_type_codec("json", schema="pg_catalog", encoder=_dumps, decoder=orjson.loads)
+
+
+async def create_pool(dsn: Optional[str] = None, **overrides: Any) -> asyncpg.pool.Pool:
+    """An asyncpg pool set up by `init_connection`. Keyword arguments override `pool_settings()`.
+
+    Each connection keeps its own LRU of prepared statements (`statement_cache_size`),
+    keyed by query text: the repositories' fixed queries are module constants, so each
+    is parsed and planned once per connection and then reused for its whole lifetime.
+    """
+    settings = {**pool_settings(), **overrides}
+    return await asyncpg.create_pool(dsn, init=init_connection, **settings)
+
+class TimedPool:
+    """Wraps an asyncpg pool so `acquire()` records how long callers wait for a connection."""
+
+    def __init__(self, pool: asyncpg.pool.Pool):
+        self._inner = pool
+
+    def acquire(self, *, timeout: Optional[float] = None) -> "_TimedAcquire":
+        return _TimedAcquire(self._inner, timeout)
+
+    def __getattr__(self, name):
+        return getattr(self._inner, name)
+
+class _TimedAcquire:
+    __slots__ = ("_pool", "_timeout", "_conn")
+
+    def __init__(self, pool: asyncpg.pool.Pool, timeout: Optional[float]):
+        self._pool = pool
+        self._timeout = timeout
+        self._conn = None
+
+    async def __aenter__(self) -> asyncpg.Connection:
+        start = time.perf_counter()
+        self._conn = await self._pool.acquire(timeout=self._timeout)
+        DB_POOL_ACQUIRE_SECONDS.observe(time.perf_counter() - start)
+        return self._conn
+
+    async def __aexit__(self, *exc):
+        conn, self._conn = self._conn, None
+        await self._pool.release(conn)
+
 async def init_db_pool(dsn: str) -> asyncpg.pool.Pool:
     """Initialize the global database pool."""
     global _pool
     if _pool is None:
-        _pool = await asyncpg.create_pool(dsn, min_size=1, max_size=10)
+        _pool = TimedPool(await create_pool(dsn))
         print("✅ DB pool initialized")
     return _pool
 
@@ -25,3 +103,13 @@ def get_db_pool() -> asyncpg.pool.Pool:
     if _pool is None:
         raise RuntimeError("DB pool not initialized. Call init_db_pool first.")
     return _pool
+
+def _pool_connections():
+    if _pool is None:
+        return {}
+    size, idle = _pool.get_size(), _pool.get_idle_size()
+    return {("in_use",): size - idle, ("idle",): idle, ("max",): _pool.get_max_size()}
+
+REGISTRY.register(Sampled(
+    "poker_db_pool_connections", "Connections in the asyncpg pool by state.", ("state",), _pool_connections,
+))
@@ -0,0 +1,56 @@
+"""Bulk-load NDJSON hand histories (HandResponse shape) into the hands table via COPY.
+
+    poetry run ingest hands.ndjson [more.ndjson ...] --chunk-size 5000
+    cat hands.ndjson | poetry run ingest -
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+from typing import AsyncIterator
+
+from dotenv import load_dotenv
+
+from app.db.connection import create_pool
+from app.repository.hand_repository import HandRepository
+from app.services.ingest import DEFAULT_CHUNK_SIZE, ingest_ndjson
+
+
+async def _read_lines(paths) -> AsyncIterator[bytes]:
+    # bytes, so a line that is not UTF-8 is rejected on its own instead of ending the import
+    for path in paths:
+        f = sys.stdin.buffer if path == "-" else open(path, "rb")
+        try:
+            for line in f:
+                yield line
+        finally:
+            if f is not sys.stdin.buffer:
+                f.close()
+
+
+async def run(paths, dsn: str, chunk_size: int):
+    pool = await create_pool(dsn, min_size=1, max_size=2)
+    try:
+        return await ingest_ndjson(HandRepository(pool), _read_lines(paths), chunk_size=chunk_size)
+    finally:
+        await pool.close()
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+", help="NDJSON files, or - for stdin")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"))
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args.paths, args.database_url, args.chunk_size))
+    print(json.dumps(report, indent=2))
+    print(f"{report['inserted']:,} hands inserted in {report['seconds']:.1f}s "
+          f"({report['rows_per_sec']:,.0f} rows/s), {report['skipped']:,} skipped, "
+          f"{report['rejected']:,} rejected", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
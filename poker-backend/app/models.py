@@ -25,3 +25,5 @@ class Hand:
     action_history: List[Dict]
     payoffs: Optional[Dict] = None
     created_at: Optional[datetime] = None
+    starting_stacks: Optional[List[int]] = None
+    version: int = 0
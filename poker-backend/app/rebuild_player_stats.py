@@ -0,0 +1,44 @@
+"""Rebuild the player_stats table from every finished hand.
+
+    poetry run rebuild-player-stats [--no-backfill]
+
+Actions stored before streets were recorded are first tagged with their street
+by replaying their hands, so VPIP and PFR cover the whole history.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+from dotenv import load_dotenv
+
+from app.db.connection import create_pool
+from app.repository.hand_repository import HandRepository
+from app.repository.player_stats_repository import PlayerStatsRepository
+from app.services.player_stats import rebuild_player_stats
+
+
+async def run(dsn: str, backfill: bool):
+    pool = await create_pool(dsn, min_size=1, max_size=2)
+    try:
+        return await rebuild_player_stats(HandRepository(pool), PlayerStatsRepository(pool), backfill)
+    finally:
+        await pool.close()
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--no-backfill", action="store_true", help="skip tagging old actions with streets")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"))
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    report = asyncio.run(run(args.database_url, not args.no_backfill))
+    report["seconds"] = time.perf_counter() - started
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from app.metrics import REGISTRY, Sampled
+from app.models import Hand
+
+DEFAULT_MAX_HANDS = int(os.getenv("HAND_CACHE_MAX", "10000"))
+DEFAULT_LIVE_TTL = float(os.getenv("HAND_CACHE_LIVE_TTL", "2"))  # seconds
+
+
+class HandCache:
+    """Process-wide read-through cache of decoded hands, keyed by hand id.
+
+    HandRepository fills it on reads and keeps it current on writes: writes that
+    return the new hand replace the entry, the others drop it. Finished hands never
+    change and stay until evicted (least recently used first, beyond `max_hands`).
+    Hands still in progress expire `live_ttl` seconds after they were cached, which
+    bounds how stale a hand written by another worker process can be here.
+    Cached hands are shared between callers and must not be mutated.
+    """
+
+    def __init__(self, max_hands: int = DEFAULT_MAX_HANDS, live_ttl: Optional[float] = DEFAULT_LIVE_TTL,
+                 clock=time.monotonic):
+        self.max_hands = max_hands
+        self.live_ttl = live_ttl
+        self._clock = clock
+        self._hands: "OrderedDict[int, Tuple[Hand, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, hand_id: int) -> Optional[Hand]:
+        entry = self._hands.get(hand_id)
+        if entry is not None and self._expired(*entry):
+            del self._hands[hand_id]
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._hands.move_to_end(hand_id)
+        return entry[0]
+
+    def put(self, hand: Hand) -> None:
+        current = self._hands.get(hand.id)
+        if current is not None and current[0].version > hand.version:
+            return  # a read that started before a newer write finished late
+        self._hands[hand.id] = (hand, self._clock())
+        self._hands.move_to_end(hand.id)
+        while len(self._hands) > self.max_hands:
+            self._hands.popitem(last=False)
+
+    def invalidate(self, hand_id: int) -> None:
+        self._hands.pop(hand_id, None)
+
+    def clear(self) -> None:
+        self._hands.clear()
+
+    def __contains__(self, hand_id: int) -> bool:
+        return hand_id in self._hands
+
+    def __len__(self) -> int:
+        return len(self._hands)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._hands),
+            "max_hands": self.max_hands,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def _expired(self, hand: Hand, cached_at: float) -> bool:
+        return hand.payoffs is None and self.live_ttl is not None and self._clock() - cached_at > self.live_ttl
+
+
+def hand_etag(hand: Hand) -> str:
+    """Changes whenever the hand is written: every write bumps hands.version."""
+    return f'"{hand.id}-{hand.version}"'
+
+
+# Shared by every HandRepository instance in this process
+hand_cache = HandCache()
+
+REGISTRY.register(Sampled(
+    "poker_hand_cache_lookups_total", "get_hand lookups in the hand cache by result.", ("result",),
+    lambda: {("hit",): hand_cache.hits, ("miss",): hand_cache.misses}, kind="counter",
+))
+REGISTRY.register(Sampled(
+    "poker_hand_cache_size", "Decoded hands held in the hand cache.", (), lambda: {(): len(hand_cache)},
+))
@@ -1,74 +1,392 @@
-import json
-from typing import List, Optional, Dict, Any
+from datetime import datetime, timezone
+from typing import AsyncIterator, List, Optional, Dict, Any, Tuple
 import asyncpg
 from app.models import Hand
 from app.db.connection import get_db_pool
+from app.metrics import DB_QUERY_SECONDS, timed
+from app.repository.hand_cache import HandCache, hand_cache
+from app.utils.deck import decode_cards, encode_cards
+
+# Fixed query text, so each connection's statement cache prepares them once (see
+# app/db/connection.py). json/jsonb parameters and columns are plain Python values:
+# the pool registers orjson codecs for them.
+
+# The uuid is claimed in hand_uuids (migrations/009_hand_uuids_and_action_keys.sql)
+# by the same statement: a uuid already taken, hot or archived, is a unique violation.
+CREATE_HAND_SQL = """
+WITH claim AS (
+    INSERT INTO hand_uuids (uuid, hand_id) VALUES ($1, nextval(pg_get_serial_sequence('hands', 'id')))
+    RETURNING hand_id
+)
+INSERT INTO hands (id, uuid, players, stacks, starting_stacks, dealer, sb, bb, big_blind, hole_cards_bin, board_bin,
+                   action_history)
+SELECT claim.hand_id, $1, $2::jsonb, $3::jsonb, $3::jsonb, $4, $5, $6, $7, $8, $9, $10::jsonb FROM claim
+RETURNING id, uuid, players, stacks, dealer, sb, bb, big_blind, hole_cards_bin, board_bin, action_history, payoffs, created_at, starting_stacks, version
+"""
+
+# Reads go through the all_hands view (migrations/007_partition_hands.sql): the hot,
+# partitioned hands table plus hands_archive, in one statement and so one snapshot,
+# so a hand being archived is found on one side or the other, never neither.
+
+GET_HAND_SQL = """
+SELECT h.id, h.uuid, h.players, h.stacks, h.dealer, h.sb, h.bb, h.big_blind, h.hole_cards_bin, h.board_bin,
+       h.action_history, h.payoffs, h.created_at, h.starting_stacks, h.version
+FROM all_hands h WHERE h.id = $1
+LIMIT 1
+"""
+
+# Keyset pages: the row comparison is an index condition on (created_at, id), so
+# each page starts where the last one ended instead of filtering out every row
+# before it. The first page, with no cursor, is its own statement.
+ITER_HANDS_FIRST_SQL = """
+SELECT h.id, h.uuid, h.players, h.stacks, h.dealer, h.sb, h.bb, h.big_blind, h.hole_cards_bin, h.board_bin,
+       h.action_history, h.payoffs, h.created_at, h.starting_stacks, h.version
+FROM all_hands h
+WHERE ($1::timestamptz IS NULL OR h.created_at < $1)
+  AND ($2::text IS NULL OR h.players ? $2)
+ORDER BY h.created_at, h.id
+LIMIT $3
+"""
+
+ITER_HANDS_SQL = """
+SELECT h.id, h.uuid, h.players, h.stacks, h.dealer, h.sb, h.bb, h.big_blind, h.hole_cards_bin, h.board_bin,
+       h.action_history, h.payoffs, h.created_at, h.starting_stacks, h.version
+FROM all_hands h
+WHERE (h.created_at, h.id) > ($1::timestamptz, $2::int)
+  AND ($3::timestamptz IS NULL OR h.created_at < $3)
+  AND ($4::text IS NULL OR h.players ? $4)
+ORDER BY h.created_at, h.id
+LIMIT $5
+"""
+
+# Writes name the hand by its whole key, (id, created_at), so the planner (or the
+# executor, for a generic plan) prunes hands down to the one partition holding it
+# instead of probing every partition's index for the id.
+
+APPEND_ACTION_SQL = """
+WITH a AS (INSERT INTO hand_actions (hand_id, hand_created_at, action) VALUES ($1, $3, $2::jsonb))
+UPDATE hands SET version = version + 1 WHERE id = $1 AND created_at = $3
+"""
+
+UPDATE_BOARD_SQL = "UPDATE hands SET board_bin = $1, version = version + 1 WHERE id = $2 AND created_at = $3"
+UPDATE_PAYOFFS_SQL = "UPDATE hands SET payoffs = $1::jsonb, version = version + 1 WHERE id = $2 AND created_at = $3"
+UPDATE_HOLE_CARDS_SQL = (
+    "UPDATE hands SET hole_cards_bin = $1, version = version + 1 WHERE id = $2 AND created_at = $3 RETURNING version"
+)
+UPDATE_STACKS_SQL = "UPDATE hands SET stacks = $1::jsonb, version = version + 1 WHERE id = $2 AND created_at = $3"
+UPDATE_LIVE_STATE_SQL = "UPDATE hands SET live_state = $1, version = version + 1 WHERE id = $2 AND created_at = $3"
+
+FLUSH_HAND_SQL = """
+WITH prev AS (
+    SELECT players, payoffs,
+           COALESCE(
+               (SELECT jsonb_agg(a.action ORDER BY a.seq) FROM hand_actions a WHERE a.hand_id = $1),
+               '[]'::jsonb
+           ) AS actions
+    FROM hands WHERE id = $1 AND created_at = $8
+), h AS (
+    -- the row lock makes concurrent flushes of one hand queue up, and the
+    -- version check then runs against the latest committed row
+    UPDATE hands
+    SET stacks = COALESCE($3::jsonb, stacks),
+        board_bin = COALESCE($4, board_bin),
+        payoffs = COALESCE($5::jsonb, payoffs),
+        live_state = $6,
+        version = version + 1
+    WHERE id = $1 AND created_at = $8 AND ($7::int IS NULL OR version = $7)
+    RETURNING id, uuid, players, stacks, dealer, sb, bb, big_blind, hole_cards_bin, board_bin, payoffs,
+              created_at, starting_stacks, version
+), new_actions AS (
+    -- a key already stored for the hand fails the whole statement (idx_hand_actions_idempotency_key)
+    INSERT INTO hand_actions (hand_id, hand_created_at, action, idempotency_key)
+    SELECT h.id, h.created_at, t.action, ($9::text[])[t.n]
+    FROM h, jsonb_array_elements($2::jsonb) WITH ORDINALITY AS t(action, n)
+    ORDER BY t.n
+    RETURNING seq
+), stats AS (
+    -- the hand finishes with this flush: fold it into player_stats exactly once
+    INSERT INTO player_stats AS ps (player, hands, vpip_hands, pfr_hands, aggressive_actions,
+                                    passive_actions, winnings, hands_won)
+    SELECT s.player, sum(s.hands), sum(s.vpip_hands), sum(s.pfr_hands), sum(s.aggressive_actions),
+           sum(s.passive_actions), sum(s.winnings), sum(s.hands_won)
+    FROM prev, h, hand_player_stats(prev.players, prev.actions || $2::jsonb, $5::jsonb) s
+    WHERE $5::jsonb IS NOT NULL AND prev.payoffs IS NULL
+    GROUP BY s.player
+    ON CONFLICT (player) DO UPDATE SET
+        hands = ps.hands + EXCLUDED.hands,
+        vpip_hands = ps.vpip_hands + EXCLUDED.vpip_hands,
+        pfr_hands = ps.pfr_hands + EXCLUDED.pfr_hands,
+        aggressive_actions = ps.aggressive_actions + EXCLUDED.aggressive_actions,
+        passive_actions = ps.passive_actions + EXCLUDED.passive_actions,
+        winnings = ps.winnings + EXCLUDED.winnings,
+        hands_won = ps.hands_won + EXCLUDED.hands_won,
+        updated_at = now()
+)
+SELECT h.id, h.uuid, h.players, h.stacks, h.dealer, h.sb, h.bb, h.big_blind, h.hole_cards_bin, h.board_bin,
+       prev.actions || $2::jsonb AS action_history,
+       h.payoffs, h.created_at, h.starting_stacks, h.version
+FROM h, prev
+"""
+
+FIND_ACTION_SQL = "SELECT action FROM hand_actions WHERE hand_id = $1 AND idempotency_key = $2"
+
+# By id alone: this is how a process first finds a hand it has no live state for,
+# and the created_at it returns keys the writes that follow.
+GET_LIVE_STATE_SQL = """
+SELECT live_state, version, created_at FROM hands WHERE id = $1
+UNION ALL
+SELECT NULL, version, created_at FROM hands_archive WHERE id = $1
+LIMIT 1
+"""
+
+# Claims uuids for hands about to be imported. A uuid another transaction has claimed
+# but not committed waits for it, then is skipped if it went in.
+CLAIM_UUIDS_SQL = """
+INSERT INTO hand_uuids (uuid, hand_id)
+SELECT * FROM unnest($1::text[], $2::int[])
+ON CONFLICT (uuid) DO NOTHING
+RETURNING uuid, hand_id
+"""
+
+FOLD_STATS_SQL = """
+INSERT INTO player_stats AS ps (player, hands, vpip_hands, pfr_hands, aggressive_actions,
+                                passive_actions, winnings, hands_won)
+SELECT s.player, sum(s.hands), sum(s.vpip_hands), sum(s.pfr_hands), sum(s.aggressive_actions),
+       sum(s.passive_actions), sum(s.winnings), sum(s.hands_won)
+FROM hands h
+CROSS JOIN LATERAL hand_player_stats(
+    h.players,
+    COALESCE((SELECT jsonb_agg(a.action ORDER BY a.seq) FROM hand_actions a WHERE a.hand_id = h.id), '[]'::jsonb),
+    h.payoffs
+) s
+WHERE h.id = ANY($1::int[]) AND h.payoffs IS NOT NULL
+GROUP BY s.player
+ON CONFLICT (player) DO UPDATE SET
+    hands = ps.hands + EXCLUDED.hands,
+    vpip_hands = ps.vpip_hands + EXCLUDED.vpip_hands,
+    pfr_hands = ps.pfr_hands + EXCLUDED.pfr_hands,
+    aggressive_actions = ps.aggressive_actions + EXCLUDED.aggressive_actions,
+    passive_actions = ps.passive_actions + EXCLUDED.passive_actions,
+    winnings = ps.winnings + EXCLUDED.winnings,
+    hands_won = ps.hands_won + EXCLUDED.hands_won,
+    updated_at = now()
+"""
+
+# Moves up to $2 finished hands created before $1, oldest first, with their actions
+# inlined, from hands (and hand_actions) into hands_archive. Rows another archiver
+# has locked are skipped, so concurrent runs split the work instead of queueing.
+ARCHIVE_HANDS_SQL = """
+WITH picked AS (
+    SELECT id, created_at FROM hands
+    WHERE created_at < $1 AND payoffs IS NOT NULL
+    ORDER BY created_at, id
+    LIMIT $2
+    FOR UPDATE SKIP LOCKED
+), moved AS (
+    DELETE FROM hands h USING picked p
+    WHERE h.id = p.id AND h.created_at = p.created_at
+    RETURNING h.*
+), actions AS (
+    DELETE FROM hand_actions a USING moved m
+    WHERE a.hand_id = m.id
+    RETURNING a.hand_id, a.seq, a.action
+), history AS (
+    SELECT hand_id, jsonb_agg(action ORDER BY seq) AS action_history FROM actions GROUP BY hand_id
+), archived AS (
+    INSERT INTO hands_archive (id, uuid, players, stacks, starting_stacks, dealer, sb, bb, big_blind,
+                               hole_cards_bin, board_bin, action_history, payoffs, created_at, version)
+    SELECT m.id, m.uuid, m.players, m.stacks, m.starting_stacks, m.dealer, m.sb, m.bb, m.big_blind,
+           m.hole_cards_bin, m.board_bin, COALESCE(hi.action_history, '[]'::jsonb), m.payoffs, m.created_at,
+           m.version
+    FROM moved m LEFT JOIN history hi ON hi.hand_id = m.id
+    RETURNING id
+)
+SELECT count(*) FROM archived
+"""
 
 
 class HandRepository:
-    def __init__(self, pool: asyncpg.pool.Pool):
-        self.pool = get_db_pool()
+    def __init__(self, pool: asyncpg.pool.Pool, cache: Optional[HandCache] = None):
+        self._pool = pool
+        # Decoded hands are shared across requests; see app/repository/hand_cache.py
+        self._cache = cache if cache is not None else hand_cache
+
+    @property
+    def pool(self) -> asyncpg.pool.Pool:
+        # Resolved on first use: routes build repositories before the app's pool exists
+        return self._pool or get_db_pool()
 
+    @timed(DB_QUERY_SECONDS, "create_hand")
     async def create_hand(self, uuid: str, players: List[str], stacks: List[int],
                           dealer: int, sb: int, bb: int, big_blind: int,
                           hole_cards: Dict[str, str]) -> Hand:
         async with self.pool.acquire() as conn:
             row = await conn.fetchrow(
-                """
-                INSERT INTO hands (uuid, players, stacks, dealer, sb, bb, big_blind, hole_cards, board, action_history)
-                VALUES ($1, $2::jsonb, $3::jsonb, $4, $5, $6, $7, $8::jsonb, $9, $10::jsonb)
-                RETURNING id, uuid, players, stacks, dealer, sb, bb, big_blind, hole_cards, board, action_history, payoffs, created_at
-                """,
-                uuid, json.dumps(players), json.dumps(stacks), dealer, sb, bb, big_blind, json.dumps(hole_cards), '', json.dumps([])
+                CREATE_HAND_SQL,
+                uuid, players, stacks, dealer, sb, bb, big_blind, self._encode_hole_cards(hole_cards), b'', []
             )
-            return self._row_to_hand(row)
+            hand = self._row_to_hand(row)
+            self._cache.put(hand)
+            return hand
 
     async def get_hand(self, hand_id: int) -> Optional[Hand]:
+        """The hand from the cache, or from the DB (and then cached). Treat it as read-only."""
+        hand = self._cache.get(hand_id)
+        if hand is None:
+            hand = await self._fetch_hand(hand_id)
+            if hand is not None:
+                self._cache.put(hand)
+        return hand
+
+    @timed(DB_QUERY_SECONDS, "get_hand")
+    async def _fetch_hand(self, hand_id: int) -> Optional[Hand]:
         async with self.pool.acquire() as conn:
-            row = await conn.fetchrow(
-                "SELECT id, uuid, players, stacks, dealer, sb, bb, big_blind, hole_cards, board, action_history, payoffs, created_at FROM hands WHERE id = $1",
-                hand_id
-            )
+            row = await conn.fetchrow(GET_HAND_SQL, hand_id)
             return self._row_to_hand(row) if row else None
 
-    async def append_action(self, hand_id: int, action: Dict[str, Any]):
+    async def iter_hands(self, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                         player: Optional[str] = None, page_size: int = 1000,
+                         after_id: int = 0) -> AsyncIterator[Hand]:
+        """Yield hands in (created_at, id) order using keyset pagination.
+
+        Each page is one short query on idx_hands_created_at_id and the connection is
+        released before the page is yielded, so a slow consumer never pins a pool
+        connection or an open transaction, and at most one page is held in memory.
+        With `after_id`, hands created exactly at `since` start after that id, so
+        (since, after_id) taken from the last hand seen resumes right after it.
+        """
+        after_ts = since
+        while True:
+            async with self.pool.acquire() as conn:
+                if after_ts is None:
+                    rows = await conn.fetch(ITER_HANDS_FIRST_SQL, until, player, page_size)
+                else:
+                    rows = await conn.fetch(ITER_HANDS_SQL, after_ts, after_id, until, player, page_size)
+            for row in rows:
+                yield self._row_to_hand(row)
+            if len(rows) < page_size:
+                return
+            after_ts, after_id = rows[-1]["created_at"], rows[-1]["id"]
+
+    @timed(DB_QUERY_SECONDS, "bulk_insert_hands")
+    async def bulk_insert_hands(self, hands: List[Any], fold_stats: bool = False) -> int:
+        """COPY a chunk of hands (Hand-shaped objects) and their actions in one transaction.
+
+        Ids come from the tables' own sequences, so source ids are ignored. Hands whose
+        uuid is already claimed, hot or archived, or came earlier in the chunk, are
+        skipped; an import running at the same time waits for this one to commit before
+        it can claim the same uuids. With `fold_stats`, the finished hands among them are
+        added to player_stats in the same transaction, as flush_hand does for live hands.
+        Returns the number of hands inserted.
+        """
+        # a uuid repeated within the chunk goes in once, like one already stored
+        unique: Dict[str, Any] = {}
+        for h in hands:
+            unique.setdefault(h.uuid, h)
         async with self.pool.acquire() as conn:
             async with conn.transaction():
-                # fetch current actions
-                row = await conn.fetchrow(
-                    "SELECT action_history FROM hands WHERE id = $1 FOR UPDATE", hand_id
+                ids = [r[0] for r in await conn.fetch(
+                    "SELECT nextval(pg_get_serial_sequence('hands', 'id')) FROM generate_series(1, $1)", len(unique)
+                )]
+                # claimed in uuid order, so imports racing for the same uuids cannot deadlock
+                pairs = sorted(zip(unique, ids))
+                claimed = {r["uuid"]: r["hand_id"] for r in await conn.fetch(
+                    CLAIM_UUIDS_SQL, [u for u, _ in pairs], [i for _, i in pairs]
+                )}
+                hands = [h for u, h in unique.items() if u in claimed]
+                if not hands:
+                    return 0
+                ids = [claimed[h.uuid] for h in hands]
+                created = [h.created_at or datetime.now(timezone.utc) for h in hands]
+                num_actions = sum(len(h.action_history) for h in hands)
+                seqs = iter([r[0] for r in await conn.fetch(
+                    "SELECT nextval(pg_get_serial_sequence('hand_actions', 'seq')) FROM generate_series(1, $1)",
+                    num_actions
+                )])
+
+                await conn.copy_records_to_table(
+                    "hands",
+                    columns=["id", "uuid", "players", "stacks", "starting_stacks", "dealer", "sb", "bb", "big_blind",
+                             "hole_cards_bin", "board_bin", "payoffs", "created_at"],
+                    records=[
+                        (
+                            hand_id, h.uuid, h.players, h.stacks, h.starting_stacks,
+                            h.dealer, h.sb, h.bb, h.big_blind,
+                            self._encode_hole_cards(h.hole_cards), encode_cards(h.board or ""),
+                            h.payoffs, created_at,
+                        )
+                        for hand_id, h, created_at in zip(ids, hands, created)
+                    ],
                 )
-                actions = row["action_history"] or []
+                if num_actions:
+                    await conn.copy_records_to_table(
+                        "hand_actions",
+                        columns=["hand_id", "hand_created_at", "seq", "action"],
+                        records=[
+                            (hand_id, created_at, next(seqs), action)
+                            for hand_id, h, created_at in zip(ids, hands, created)
+                            for action in h.action_history
+                        ],
+                    )
+                if fold_stats:
+                    await conn.execute(FOLD_STATS_SQL, ids)
+                return len(hands)
 
-                # parse if it's accidentally a string
-                if isinstance(actions, str):
-                    actions = json.loads(actions)
+    @timed(DB_QUERY_SECONDS, "ensure_partitions")
+    async def ensure_partitions(self, days_ahead: int = 7) -> int:
+        """Create the daily hands partitions up to `days_ahead` days from now. Returns how many were new."""
+        async with self.pool.acquire() as conn:
+            return await conn.fetchval("SELECT ensure_hand_partitions($1)", days_ahead)
 
-                # append new action
-                actions.append(action)
+    @timed(DB_QUERY_SECONDS, "archive_hands")
+    async def archive_hands(self, before: datetime, batch_size: int = 1000) -> int:
+        """Move finished hands created before `before` to hands_archive. Returns how many.
 
-                # save back to DB
-                await conn.execute(
-                    "UPDATE hands SET action_history = $1::jsonb WHERE id = $2",
-                    json.dumps(actions),
-                    hand_id
-                )
+        Each batch is its own short transaction, so live hands are never held up
+        behind a long archival run. Archived hands keep their id and version and read
+        back the same through get_hand and iter_hands; cached copies stay valid.
+        """
+        archived = 0
+        while True:
+            async with self.pool.acquire() as conn:
+                moved = await conn.fetchval(ARCHIVE_HANDS_SQL, before, batch_size)
+            archived += moved
+            if moved < batch_size:
+                return archived
 
-    async def update_board(self, hand_id: int, board_str: str):
+    @timed(DB_QUERY_SECONDS, "drop_empty_partitions")
+    async def drop_empty_partitions(self, before: datetime) -> int:
+        """Drop the hands partitions ending by `before` that archiving has emptied. Returns how many."""
         async with self.pool.acquire() as conn:
-            await conn.execute("UPDATE hands SET board = $1 WHERE id = $2", board_str, hand_id)
+            return await conn.fetchval("SELECT drop_empty_hand_partitions($1)", before)
 
-    async def update_payoffs(self, hand_id: int, payoffs: Dict[int,int]):
+    @timed(DB_QUERY_SECONDS, "append_action")
+    async def append_action(self, hand_id: int, action: Dict[str, Any], created_at: datetime):
         async with self.pool.acquire() as conn:
-            await conn.execute("UPDATE hands SET payoffs = $1::jsonb WHERE id = $2", json.dumps(payoffs), hand_id)
+            # append-only log: no rewrite of earlier actions, only the version bump
+            await conn.execute(APPEND_ACTION_SQL, hand_id, action, created_at)
+        self._cache.invalidate(hand_id)
 
-    async def update_hole_cards(self, hand_id: int, hole_cards: Dict[str,str]):
+    @timed(DB_QUERY_SECONDS, "update_board")
+    async def update_board(self, hand_id: int, board_str: str, created_at: datetime):
         async with self.pool.acquire() as conn:
-            await conn.execute(
-                "UPDATE hands SET hole_cards = $1::jsonb WHERE id = $2",
-                json.dumps(hole_cards),
-                hand_id
-            )
+            await conn.execute(UPDATE_BOARD_SQL, encode_cards(board_str), hand_id, created_at)
+        self._cache.invalidate(hand_id)
+
+    @timed(DB_QUERY_SECONDS, "update_payoffs")
+    async def update_payoffs(self, hand_id: int, payoffs: Dict[int,int], created_at: datetime):
+        async with self.pool.acquire() as conn:
+            await conn.execute(UPDATE_PAYOFFS_SQL, payoffs, hand_id, created_at)
+        self._cache.invalidate(hand_id)
+
+    @timed(DB_QUERY_SECONDS, "update_hole_cards")
+    async def update_hole_cards(self, hand_id: int, hole_cards: Dict[str,str], created_at: datetime) -> Optional[int]:
+        """Store the hand's hole cards. Returns its new version, or None if no such hand."""
+        async with self.pool.acquire() as conn:
+            version = await conn.fetchval(UPDATE_HOLE_CARDS_SQL, self._encode_hole_cards(hole_cards), hand_id,
+                                          created_at)
+        self._cache.invalidate(hand_id)
+        return version
             
     def _row_to_hand(self, row) -> Hand:
         if row is None:
@@ -76,23 +394,143 @@ class HandRepository:
         return Hand(
             id=row["id"],
             uuid=row["uuid"],
-            players=json.loads(row["players"]) if isinstance(row["players"], str) else row["players"],
-            stacks=json.loads(row["stacks"]) if isinstance(row["stacks"], str) else row["stacks"],
+            players=row["players"],
+            stacks=row["stacks"],
             dealer=row["dealer"],
             sb=row["sb"],
             bb=row["bb"],
             big_blind=row["big_blind"],
-            hole_cards=json.loads(row["hole_cards"]) if isinstance(row["hole_cards"], str) else row["hole_cards"],
-            board=row["board"] or "",
-            action_history=json.loads(row["action_history"]) if isinstance(row["action_history"], str) else row["action_history"],
+            hole_cards=self._decode_hole_cards(row["hole_cards_bin"]),
+            board=decode_cards(row["board_bin"] or b""),
+            action_history=row["action_history"],
             payoffs=row["payoffs"],
-            created_at=row["created_at"]
+            created_at=row["created_at"],
+            starting_stacks=row["starting_stacks"],
+            version=row.get("version") or 0
         )
 
-    async def update_stacks(self, hand_id: int, stacks: List[int]):
+    @staticmethod
+    def _encode_hole_cards(hole_cards: Dict[str, str]) -> bytes:
+        # two bytes per seat, in seat order
+        return b"".join(encode_cards(hole_cards[str(i)]) for i in range(len(hole_cards)))
+
+    @staticmethod
+    def _decode_hole_cards(data: Optional[bytes]) -> Dict[str, str]:
+        if not data:
+            return {}
+        return {str(i // 2): decode_cards(data[i:i + 2]) for i in range(0, len(data), 2)}
+
+    @timed(DB_QUERY_SECONDS, "update_stacks")
+    async def update_stacks(self, hand_id: int, stacks: List[int], created_at: datetime):
         async with self.pool.acquire() as conn:
-            await conn.execute(
-                "UPDATE hands SET stacks = $1::jsonb WHERE id = $2",
-                json.dumps(stacks),
-                hand_id
-            )
+            await conn.execute(UPDATE_STACKS_SQL, stacks, hand_id, created_at)
+        self._cache.invalidate(hand_id)
+
+    @timed(DB_QUERY_SECONDS, "update_live_state")
+    async def update_live_state(self, hand_id: int, live_state: Optional[bytes], created_at: datetime):
+        async with self.pool.acquire() as conn:
+            await conn.execute(UPDATE_LIVE_STATE_SQL, live_state, hand_id, created_at)
+        self._cache.invalidate(hand_id)
+
+    def unit_of_work(self, hand_id: int, created_at: datetime,
+                     expected_version: Optional[int] = None) -> "HandUnitOfWork":
+        return HandUnitOfWork(self, hand_id, created_at, expected_version)
+
+    @timed(DB_QUERY_SECONDS, "flush_hand")
+    async def flush_hand(self, hand_id: int, created_at: datetime, actions: List[Dict[str, Any]],
+                         stacks: Optional[List[int]] = None,
+                         board: Optional[str] = None, payoffs: Optional[Dict[int, int]] = None,
+                         live_state: Optional[bytes] = None, expected_version: Optional[int] = None,
+                         idempotency_keys: Optional[List[Optional[str]]] = None) -> Optional[Hand]:
+        """Append actions and update stacks/board/payoffs in one statement, returning the updated hand.
+
+        The hand's version is bumped and `live_state` replaces its stored snapshot. With
+        `expected_version`, nothing is written unless the hand is still at that version,
+        and None is returned instead. `idempotency_keys`, one per action (None for
+        actions without), are stored beside the actions; if one is already stored for
+        the hand, nothing is written and None is returned too. When this flush writes
+        the hand's payoffs, the same statement adds the hand to player_stats.
+        """
+        async with self.pool.acquire() as conn:
+            try:
+                row = await conn.fetchrow(
+                    FLUSH_HAND_SQL,
+                    hand_id, actions, stacks, encode_cards(board) if board is not None else None, payoffs,
+                    live_state, expected_version, created_at, idempotency_keys
+                )
+            except asyncpg.UniqueViolationError as e:
+                if e.constraint_name != "idx_hand_actions_idempotency_key":
+                    raise
+                row = None
+        if row is None:
+            self._cache.invalidate(hand_id)  # ours is stale, or the hand is gone
+            return None
+        hand = self._row_to_hand(row)
+        self._cache.put(hand)
+        return hand
+
+    @timed(DB_QUERY_SECONDS, "find_action")
+    async def find_action(self, hand_id: int, idempotency_key: str) -> Optional[Dict[str, Any]]:
+        """The hand's action stored with `idempotency_key`, or None."""
+        async with self.pool.acquire() as conn:
+            return await conn.fetchval(FIND_ACTION_SQL, hand_id, idempotency_key)
+
+    @timed(DB_QUERY_SECONDS, "get_live_state")
+    async def get_live_state(self, hand_id: int) -> Optional[Tuple[Optional[bytes], int, datetime]]:
+        """The hand's stored state snapshot (None if there is none), version and created_at, or None if no such hand."""
+        async with self.pool.acquire() as conn:
+            row = await conn.fetchrow(GET_LIVE_STATE_SQL, hand_id)
+            return (row["live_state"], row["version"], row["created_at"]) if row else None
+
+
+class HandUnitOfWork:
+    """Buffers the writes for one hand and flushes them in a single statement.
+
+    Exposes HandRepository's write methods, less their `created_at`: the unit of
+    work is bound to the hand's whole key. `append_action` also takes the action's
+    idempotency key. Nothing reaches the DB until `commit`, and the flush is one
+    statement, so a partially applied hand is never persisted.
+    """
+
+    def __init__(self, repo: HandRepository, hand_id: int, created_at: datetime,
+                 expected_version: Optional[int] = None):
+        self.repo = repo
+        self.hand_id = hand_id
+        self.created_at = created_at
+        self.expected_version = expected_version
+        self.actions: List[Dict[str, Any]] = []
+        self.idempotency_keys: List[Optional[str]] = []
+        self.stacks: Optional[List[int]] = None
+        self.board: Optional[str] = None
+        self.payoffs: Optional[Dict[int, int]] = None
+        self.live_state: Optional[bytes] = None
+
+    async def append_action(self, hand_id: int, action: Dict[str, Any], idempotency_key: Optional[str] = None):
+        self._check(hand_id)
+        self.actions.append(action)
+        self.idempotency_keys.append(idempotency_key)
+
+    async def update_stacks(self, hand_id: int, stacks: List[int]):
+        self._check(hand_id)
+        self.stacks = stacks
+
+    async def update_board(self, hand_id: int, board_str: str):
+        self._check(hand_id)
+        self.board = board_str
+
+    async def update_payoffs(self, hand_id: int, payoffs: Dict[int, int]):
+        self._check(hand_id)
+        self.payoffs = payoffs
+
+    async def update_live_state(self, hand_id: int, live_state: Optional[bytes]):
+        self._check(hand_id)
+        self.live_state = live_state
+
+    async def commit(self) -> Optional[Hand]:
+        keys = self.idempotency_keys if any(k is not None for k in self.idempotency_keys) else None
+        return await self.repo.flush_hand(self.hand_id, self.created_at, self.actions, self.stacks, self.board,
+                                          self.payoffs, self.live_state, self.expected_version, keys)
+
+    def _check(self, hand_id: int):
+        if hand_id != self.hand_id:
+            raise ValueError(f"Unit of work is bound to hand {self.hand_id}, not {hand_id}")
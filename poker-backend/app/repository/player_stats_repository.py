@@ -0,0 +1,74 @@
+from typing import Any, Dict, List, Optional
+import asyncpg
+from app.db.connection import get_db_pool
+from app.metrics import DB_QUERY_SECONDS, timed
+
+GET_STATS_SQL = """
+SELECT player, hands, vpip_hands, pfr_hands, aggressive_actions, passive_actions,
+       winnings, hands_won, updated_at
+FROM player_stats WHERE player = $1
+"""
+
+
+class PlayerStatsRepository:
+    def __init__(self, pool: asyncpg.pool.Pool):
+        self._pool = pool
+
+    @property
+    def pool(self) -> asyncpg.pool.Pool:
+        return self._pool or get_db_pool()
+
+    @timed(DB_QUERY_SECONDS, "get_stats")
+    async def get_stats(self, player: str) -> Optional[Dict[str, Any]]:
+        async with self.pool.acquire() as conn:
+            row = await conn.fetchrow(GET_STATS_SQL, player)
+            return dict(row) if row else None
+
+    @timed(DB_QUERY_SECONDS, "rebuild")
+    async def rebuild(self) -> int:
+        """Recompute player_stats from every finished hand. Returns the number of players."""
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute("TRUNCATE player_stats")
+                status = await conn.execute(
+                    """
+                    INSERT INTO player_stats (player, hands, vpip_hands, pfr_hands, aggressive_actions,
+                                              passive_actions, winnings, hands_won)
+                    SELECT s.player, sum(s.hands), sum(s.vpip_hands), sum(s.pfr_hands), sum(s.aggressive_actions),
+                           sum(s.passive_actions), sum(s.winnings), sum(s.hands_won)
+                    FROM all_hands h
+                    CROSS JOIN LATERAL hand_player_stats(h.players, h.action_history, h.payoffs) s
+                    WHERE h.payoffs IS NOT NULL
+                    GROUP BY s.player
+                    """
+                )
+                return int(status.split()[-1])
+
+    @timed(DB_QUERY_SECONDS, "set_action_streets")
+    async def set_action_streets(self, hand_id: int, streets: List[int]):
+        """Tag a hand's actions, in seq order, with the street they were taken on."""
+        async with self.pool.acquire() as conn:
+            await conn.execute(
+                """
+                WITH hot AS (
+                    UPDATE hand_actions a
+                    SET action = a.action || jsonb_build_object('street', s.street)
+                    FROM (
+                        SELECT seq, row_number() OVER (ORDER BY seq) AS n FROM hand_actions WHERE hand_id = $1
+                    ) o
+                    JOIN unnest($2::int[]) WITH ORDINALITY AS s(street, n) ON s.n = o.n
+                    WHERE a.hand_id = $1 AND a.seq = o.seq
+                )
+                -- an archived hand has its actions inlined instead
+                UPDATE hands_archive h
+                SET action_history = (
+                    SELECT jsonb_agg(CASE WHEN s.street IS NULL THEN t.action
+                                          ELSE t.action || jsonb_build_object('street', s.street) END
+                                     ORDER BY t.n)
+                    FROM jsonb_array_elements(h.action_history) WITH ORDINALITY AS t(action, n)
+                    LEFT JOIN unnest($2::int[]) WITH ORDINALITY AS s(street, n) ON s.n = t.n
+                )
+                WHERE h.id = $1 AND jsonb_array_length(h.action_history) > 0
+                """,
+                hand_id, streets
+            )
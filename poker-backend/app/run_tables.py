@@ -0,0 +1,62 @@
+"""Run many bot-filled tables concurrently in one process and store their hands.
+
+    poetry run run-tables --tables 2000 --players 6 --stack 4000 --seed 1
+    poetry run run-tables --tables 100 --hands 50 --no-db
+
+Each table plays until one player holds every chip, or `--hands` hands. Hands are
+COPYed to Postgres in batches and added to player_stats.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+from dotenv import load_dotenv
+
+from app.db.connection import create_pool
+from app.repository.hand_repository import HandRepository
+from app.services.table_manager import DEFAULT_STEPS_PER_TICK, DEFAULT_WRITE_BATCH, HandWriter, Scheduler, TableManager
+
+
+async def run(args) -> dict:
+    pool = None if args.no_db else await create_pool(args.database_url, min_size=1, max_size=4)
+    writer = HandWriter(HandRepository(pool), batch_size=args.batch_size) if pool is not None else None
+    manager = TableManager(writer=writer, scheduler=Scheduler(args.steps_per_tick))
+    try:
+        await manager.start()
+        for t in range(args.tables):
+            seed = None if args.seed is None else args.seed * 1_000_003 + t
+            manager.open_table([f"t{t}-bot{s}" for s in range(args.players)], [args.stack] * args.players,
+                               args.big_blind, max_hands=args.hands, seed=seed)
+        await manager.wait()
+    finally:
+        await manager.stop()
+        if pool is not None:
+            await pool.close()
+    return manager.stats()
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tables", type=int, default=1000)
+    parser.add_argument("--players", type=int, default=6)
+    parser.add_argument("--stack", type=int, default=4000)
+    parser.add_argument("--big-blind", type=int, default=40)
+    parser.add_argument("--hands", type=int, default=None, help="hands per table (default: until one player is left)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--steps-per-tick", type=int, default=DEFAULT_STEPS_PER_TICK)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_WRITE_BATCH)
+    parser.add_argument("--no-db", action="store_true", help="play without storing hands")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"))
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    print(json.dumps(report, indent=2))
+    print(f"{report['hands']:,} hands on {report['tables']:,} tables in {report['seconds']:.1f}s "
+          f"({report['hands_per_sec']:,.0f} hands/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
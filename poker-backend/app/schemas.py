@@ -1,5 +1,7 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, root_validator
+from datetime import datetime
 from typing import List, Optional, Dict
+from app.utils.deck import CARD_INDEX
 
 class StartHandRequest(BaseModel):
     players: List[str]
@@ -13,6 +15,17 @@ class ActionRequest(BaseModel):
     action: str
     amount: Optional[int] = None
     meta: Optional[dict] = None
+    # At least one is required, so a retried submission is recognised: `version` is the
+    # hand version the action was chosen on (HandResponse.version), `idempotency_key` a
+    # client-chosen id for the submission
+    version: Optional[int] = None
+    idempotency_key: Optional[str] = None
+
+    @root_validator(skip_on_failure=True)
+    def _identified(cls, values):
+        if values.get("version") is None and not values.get("idempotency_key"):
+            raise ValueError("version or idempotency_key is required")
+        return values
 
 class HandResponse(BaseModel):
     id: int
@@ -27,4 +40,81 @@ class HandResponse(BaseModel):
     board: str
     action_history: List[Dict]
     payoffs: Optional[Dict[int,int]] = None
-    created_at: Optional[str] = None
+    created_at: Optional[datetime] = None
+    version: int = 0
+
+class SeatEquity(BaseModel):
+    seat: int
+    win: float
+    tie: float
+    equity: float
+
+class EquityResponse(BaseModel):
+    hand_id: int
+    method: str
+    samples: int
+    seats: List[SeatEquity]
+
+class HandImport(BaseModel):
+    """One hand in a bulk import: the HandResponse shape, ids assigned on insert."""
+    id: Optional[int] = None
+    uuid: str
+    players: List[str]
+    stacks: List[int]
+    starting_stacks: Optional[List[int]] = None
+    dealer: int
+    sb: int
+    bb: int
+    big_blind: int
+    hole_cards: Dict[str, str]
+    board: str = ""
+    action_history: List[Dict] = []
+    payoffs: Optional[Dict[int,int]] = None
+    created_at: Optional[datetime] = None
+
+    @root_validator(skip_on_failure=True)
+    def _consistent(cls, values):
+        # Checked here so a bad record is rejected on its own line instead of failing its whole COPY
+        n = len(values["players"])
+        if len(values["stacks"]) != n:
+            raise ValueError("stacks must have one entry per player")
+        if values.get("starting_stacks") is not None and len(values["starting_stacks"]) != n:
+            raise ValueError("starting_stacks must have one entry per player")
+        hole_cards = values["hole_cards"]
+        if hole_cards:
+            if set(hole_cards) != {str(i) for i in range(n)}:
+                raise ValueError(f"hole_cards must have seats 0..{n - 1}")
+            for seat, cards in hole_cards.items():
+                if len(cards) != 4 or not _known_cards(cards):
+                    raise ValueError(f"hole_cards[{seat}] must be two cards, got {cards!r}")
+        board = values.get("board") or ""
+        if len(board) % 2 or len(board) > 10 or not _known_cards(board):
+            raise ValueError(f"board must be up to five cards, got {board!r}")
+        return values
+
+def _known_cards(cards: str) -> bool:
+    return all(cards[i:i + 2] in CARD_INDEX for i in range(0, len(cards), 2))
+
+class IngestReport(BaseModel):
+    read: int
+    inserted: int
+    skipped: int
+    rejected: int
+    errors: List[Dict]
+    seconds: float
+    rows_per_sec: float
+
+class PlayerStatsResponse(BaseModel):
+    player: str
+    hands: int
+    vpip_hands: int
+    pfr_hands: int
+    aggressive_actions: int
+    passive_actions: int
+    winnings: int
+    hands_won: int
+    vpip: float
+    pfr: float
+    aggression_factor: Optional[float] = None
+    winnings_per_hand: float
+    updated_at: Optional[datetime] = None
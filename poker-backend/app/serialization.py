@@ -0,0 +1,78 @@
+"""Opt-in fast JSON responses (FAST_JSON=1) that skip Pydantic and jsonable_encoder.
+
+By default a route returning a Hand has FastAPI validate and copy it into its
+response_model, run jsonable_encoder over the copy and json.dumps the result.
+For hands with long action histories that is most of the request. In fast mode
+the routes hand the object to a ModelEncoder instead: it reads the model's
+fields straight off the object, in the model's field order, and orjson encodes
+them in one call. The bytes are the same as the default path's
+(tests/test_serialization.py checks this); what is skipped is the validation, so
+the objects must already have the model's types, as repository hands do.
+
+One known difference: floats Python writes in exponent form (1e+16, 1e-05) come
+out as orjson writes them (1e16, 0.00001). Hands only hold ints, so this can only show up in
+client-supplied action `meta`; both forms parse to the same number.
+"""
+import os
+from functools import lru_cache
+from operator import attrgetter
+from typing import Any, Dict, Mapping, Optional, Type
+
+import orjson
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+ENABLED = os.getenv("FAST_JSON", "0") == "1"
+
+# Same output as starlette's JSONResponse: compact, UTF-8, dict keys as JSON strings
+OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, option=OPTIONS)
+
+
+class ModelEncoder:
+    """Encodes any object carrying a model's fields as that model's JSON, without building the model."""
+
+    def __init__(self, model: Type[BaseModel]):
+        self.model = model
+        self.fields = tuple(model.__fields__)
+        self._get = attrgetter(*self.fields)
+
+    def to_dict(self, obj: Any) -> Dict[str, Any]:
+        return dict(zip(self.fields, self._get(obj)))
+
+    def encode(self, obj: Any) -> bytes:
+        return dumps(self.to_dict(obj))
+
+
+@lru_cache(maxsize=None)
+def encoder_for(model: Type[BaseModel]) -> ModelEncoder:
+    """The model's encoder, built once per model."""
+    return ModelEncoder(model)
+
+
+def _json(body: bytes, status_code: int = 200, headers: Optional[Mapping[str, str]] = None) -> Response:
+    return Response(body, status_code=status_code, headers=headers, media_type="application/json")
+
+
+def model_response(model: Type[BaseModel], obj: Any, status_code: int = 200,
+                   headers: Optional[Mapping[str, str]] = None) -> Any:
+    """In fast mode, `obj` encoded as `model`; otherwise `obj` itself, for the route's response_model."""
+    if ENABLED:
+        try:
+            return _json(encoder_for(model).encode(obj), status_code, headers)
+        except orjson.JSONEncodeError:
+            pass  # e.g. an int beyond 64 bits in an action's meta: let the default path encode it
+    return obj
+
+
+def json_response(content: Any) -> Any:
+    """In fast mode, `content` (plain dicts and lists) encoded by orjson; otherwise `content` itself."""
+    if ENABLED:
+        try:
+            return _json(dumps(content))
+        except orjson.JSONEncodeError:
+            pass
+    return content
@@ -0,0 +1,170 @@
+"""Replay stored hands through the engine and check what was stored for them.
+
+For every hand, the stored hole cards, board and action history are replayed
+with engine.replay_state (the same path that rebuilds live hands), and the
+stored stacks, board and payoffs must match the replay's. A hand whose actions
+cannot be replayed is reported with the engine's error.
+
+Hands are read in (created_at, id) order in chunks and replayed across a process
+pool, with a bounded number of chunks in flight. Chunks may finish out of order;
+the checkpoint only advances over chunks whose predecessors are all done, so a
+resumed audit starts right after the last hand known to be audited, and
+mismatches are written out together with the checkpoint that covers them.
+"""
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, TextIO, Tuple
+
+from app.models import Hand
+from app.services.engine import board_str, replay_state
+
+DEFAULT_CHUNK_SIZE = 500
+CHECKPOINT_VERSION = 1
+
+
+def _payoffs(payoffs: Optional[Dict[Any, Any]]) -> Optional[Dict[int, int]]:
+    # JSONB object keys come back as strings
+    return None if payoffs is None else {int(k): int(v) for k, v in payoffs.items()}
+
+
+def audit_hand(hand: Hand) -> Optional[Dict[str, Any]]:
+    """None if the stored hand is what replaying it gives, else what differs."""
+    try:
+        state = replay_state(hand)
+    except (ValueError, KeyError, TypeError) as exc:
+        return {"hand_id": hand.id, "uuid": hand.uuid, "error": f"{type(exc).__name__}: {exc}"}
+
+    replayed = {
+        "stacks": list(state.stacks),
+        "board": board_str(state),
+        "payoffs": None if state.status else dict(enumerate(state.payoffs)),
+    }
+    stored = {"stacks": list(hand.stacks), "board": hand.board or "", "payoffs": _payoffs(hand.payoffs)}
+    if not hand.action_history:
+        del replayed["stacks"]  # stored at creation, before the blinds went in
+    diff = {field: {"stored": stored[field], "replayed": replayed[field]}
+            for field in replayed if stored[field] != replayed[field]}
+    if not diff:
+        return None
+    return {"hand_id": hand.id, "uuid": hand.uuid, "fields": diff}
+
+
+def audit_chunk(hands: List[Hand]) -> Tuple[int, int, List[Dict[str, Any]]]:
+    """Replay a chunk: (hands audited, actions replayed, mismatches)."""
+    mismatches = []
+    actions = 0
+    for hand in hands:
+        actions += len(hand.action_history)
+        result = audit_hand(hand)
+        if result is not None:
+            mismatches.append(result)
+    return len(hands), actions, mismatches
+
+
+def load_checkpoint(path: str) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        checkpoint = json.load(f)
+    if checkpoint.get("version") != CHECKPOINT_VERSION:
+        raise ValueError(f"Unsupported audit checkpoint: {path}")
+    return checkpoint
+
+
+def save_checkpoint(path: str, checkpoint: Dict[str, Any]) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp, path)  # never leaves a half-written checkpoint
+
+
+async def audit_hands(repo: Any, workers: int = 1, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                      checkpoint_path: Optional[str] = None, out: Optional[TextIO] = None,
+                      until: Optional[datetime] = None, executor: Optional[Executor] = None,
+                      progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """Audit every hand after the checkpoint (if any) and return the report.
+
+    Mismatches are written to `out` as NDJSON. With `workers` > 1, chunks are
+    replayed in a process pool; `progress` is called with the running report each
+    time the checkpoint advances.
+    """
+    checkpoint = load_checkpoint(checkpoint_path) if checkpoint_path else None
+    totals = {"hands": 0, "actions": 0, "mismatches": 0}
+    since, after_id = None, 0
+    if checkpoint is not None:
+        totals = {k: checkpoint[k] for k in totals}
+        since, after_id = datetime.fromisoformat(checkpoint["created_at"]), checkpoint["id"]
+
+    own_executor = executor is None and workers > 1
+    if own_executor:
+        executor = ProcessPoolExecutor(max_workers=workers)
+    loop = asyncio.get_running_loop()
+    pending: List[Tuple[Tuple[datetime, int], "asyncio.Future"]] = []  # (last hand's cursor, result) per chunk
+    report: Dict[str, Any] = {"resumed": checkpoint is not None, "audited": 0, "actions": 0, "mismatches": 0}
+    started = time.perf_counter()
+
+    def commit_done() -> None:
+        # Advance over the chunks at the front that are done, in order
+        while pending and pending[0][1].done():
+            (created_at, hand_id), fut = pending.pop(0)
+            count, actions, mismatches = fut.result()
+            if out is not None and mismatches:
+                out.writelines(json.dumps(m, separators=(",", ":")) + "\n" for m in mismatches)
+                out.flush()
+            for key, n in (("audited", count), ("actions", actions), ("mismatches", len(mismatches))):
+                report[key] += n
+            if checkpoint_path:
+                save_checkpoint(checkpoint_path, {
+                    "version": CHECKPOINT_VERSION, "created_at": created_at.isoformat(), "id": hand_id,
+                    "hands": totals["hands"] + report["audited"], "actions": totals["actions"] + report["actions"],
+                    "mismatches": totals["mismatches"] + report["mismatches"],
+                })
+            if progress is not None:
+                progress(_finish(report, started))
+
+    async def submit(hands: List[Hand]) -> None:
+        if executor is None:
+            fut = loop.create_future()
+            fut.set_result(audit_chunk(hands))
+        else:
+            fut = loop.run_in_executor(executor, audit_chunk, hands)
+        pending.append(((hands[-1].created_at, hands[-1].id), fut))
+        commit_done()
+        while len(pending) > 2 * max(workers, 1):  # keep the pool busy without reading far ahead
+            await asyncio.wait([pending[0][1]])
+            commit_done()
+
+    try:
+        hands: List[Hand] = []
+        async for hand in repo.iter_hands(since=since, until=until, page_size=chunk_size, after_id=after_id):
+            hands.append(hand)
+            if len(hands) >= chunk_size:
+                await submit(hands)
+                hands = []
+        if hands:
+            await submit(hands)
+        if pending:
+            await asyncio.wait([f for _, f in pending])
+            commit_done()
+    finally:
+        if own_executor:
+            executor.shutdown(cancel_futures=True)
+
+    result = _finish(report, started)
+    result["total"] = {k: totals[k] + report[key] for k, key in
+                       (("hands", "audited"), ("actions", "actions"), ("mismatches", "mismatches"))}
+    return result
+
+
+def _finish(report: Dict[str, Any], started: float) -> Dict[str, Any]:
+    elapsed = time.perf_counter() - started
+    return {
+        **report,
+        "seconds": elapsed,
+        "hands_per_sec": report["audited"] / elapsed if elapsed else 0.0,
+        "actions_per_sec": report["actions"] / elapsed if elapsed else 0.0,
+    }
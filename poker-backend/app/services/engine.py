@@ -0,0 +1,95 @@
+"""Driving PokerKit states: dealing, applying API actions, and replaying stored hands.
+
+Plain functions over a PokerKit state, shared by everything that plays hands:
+HandService for API hands, the table manager, the simulator, and the audit and
+player_stats replays. Nothing here touches the DB or the bots.
+"""
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.models import Hand
+from app.services.state_snapshot import create_state
+from app.utils.deck import Deck, cards_to_str
+
+
+def deal_hand(num_players: int, seed: Optional[int] = None) -> Tuple[Dict[str, str], str]:
+    """Hole cards by seat and a five-card board, dealt from one (seeded) Deck."""
+    deck = Deck.shuffled(seed)
+    hole_cards = {str(i): cards_to_str(cards) for i, cards in enumerate(deck.deal_hole_cards(num_players))}
+    return hole_cards, cards_to_str(deck.deal(5))
+
+
+def start_state(num_players: int, starting_stacks: List[int], big_blind: int,
+                hole_cards: Dict[str, Any], board: str = ""):
+    """A new state with the hole cards dealt, and the board cards kept for dealing as the hand goes."""
+    state = create_state(num_players, starting_stacks, big_blind)
+    for i in range(num_players):
+        cards = hole_cards[str(i)]
+        state.deal_hole(cards if isinstance(cards, str) else "".join(cards))
+    reserve_cards(state, board)
+    deal_board(state, board)
+    return state
+
+
+def replay_state(hand: Hand, streets: Optional[List[int]] = None):
+    """Rebuild a PokerKit state from stored hole cards, board and action history.
+
+    If `streets` is given, the street index of each replayed action is appended to it.
+    """
+    if not hand.hole_cards:
+        raise ValueError("Hand has no hole cards to replay")
+    starting = hand.starting_stacks
+    if starting is None:
+        if hand.action_history:
+            # the stored stacks are the current ones, not what the hand started with
+            raise ValueError("Hand has no starting stacks to replay")
+        starting = hand.stacks
+    board = hand.board or ""
+    state = start_state(len(hand.players), starting, hand.big_blind, hand.hole_cards, board)
+    for action in hand.action_history:
+        deal_board(state, board)
+        if streets is not None:
+            streets.append(state.street_index)
+        apply_action(state, action.get("player_seat"), action["action"], action.get("amount"))
+    deal_board(state, board)
+    return state
+
+
+def apply_action(state: Any, seat: Optional[int], act: str, amount: Optional[int] = None) -> None:
+    """Translate an API action into the matching PokerKit operation."""
+    if seat is not None and seat != state.actor_index:
+        raise ValueError(f"It is not seat {seat}'s turn")
+    if act == "fold":
+        state.fold()
+    elif act in ("check", "call"):
+        state.check_or_call()
+    elif act in ("bet", "raise"):
+        state.complete_bet_or_raise_to(amount)
+    elif act == "allin":
+        state.complete_bet_or_raise_to(state.max_completion_betting_or_raising_to_amount)
+    else:
+        raise ValueError(f"Unknown action: {act}")
+
+
+def deal_board(state: Any, board: str = "") -> None:
+    """Deal pending streets, taking recorded board cards first and the deck after."""
+    while state.can_deal_board():
+        dealt = len(board_str(state))
+        count = state.board_dealing_count
+        recorded = board[dealt:dealt + 2 * count]
+        if len(recorded) == 2 * count:
+            state.deal_board(recorded)
+        else:
+            state.deal_board()
+
+
+def reserve_cards(state: Any, cards: str) -> None:
+    """Move cards that will be dealt explicitly to the bottom of PokerKit's deck so they can't be burned."""
+    reserved = set(cards[i:i + 2] for i in range(0, len(cards), 2))
+    if reserved:
+        rest = [c for c in state.deck_cards if repr(c) not in reserved]
+        state.deck_cards = deque(rest + [c for c in state.deck_cards if repr(c) in reserved])
+
+
+def board_str(state: Any) -> str:
+    return "".join(repr(card) for card in state.get_board_cards(0))
@@ -0,0 +1,124 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+from math import comb
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.models import Hand
+from app.utils.evaluator import evaluate_array, parse_cards
+
+EXACT_MAX_RUNOUTS = 20_000  # enumerate every runout up to this many (turn/river, most flops)
+BATCH_SIZE = 10_000
+# Caps on what a GET /hands/{id}/equity request may ask of an equity worker; requests
+# that leave the parameters out get compute_equity's defaults (50_000 iterations, 200 ms)
+MAX_ITERATIONS = int(os.getenv("EQUITY_MAX_ITERATIONS", "1000000"))  # largest `iterations` accepted
+MAX_TIME_BUDGET_MS = int(os.getenv("EQUITY_MAX_TIME_BUDGET_MS", "2000"))  # largest `time_budget_ms` accepted
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def get_equity_executor() -> ProcessPoolExecutor:
+    """Process pool used to keep equity calculations off the event loop."""
+    global _executor
+    if _executor is None:
+        workers = int(os.getenv("EQUITY_WORKERS", "0")) or None
+        _executor = ProcessPoolExecutor(max_workers=workers)
+    return _executor
+
+
+def shutdown_equity_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(cancel_futures=True)
+        _executor = None
+
+
+def hand_equity_inputs(hand: Hand) -> Dict[str, Any]:
+    """Extract the card ints and live seats that compute_equity needs from a stored hand."""
+    folded = {a.get("player_seat") for a in hand.action_history if a.get("action") == "fold"}
+    seats = [i for i in range(len(hand.players)) if i not in folded and str(i) in hand.hole_cards]
+    return {
+        "seats": seats,
+        "hole_cards": [parse_cards(hand.hole_cards[str(i)]) for i in seats],
+        "board": parse_cards(hand.board or ""),
+    }
+
+
+def compute_equity(seats: Sequence[int], hole_cards: Sequence[Sequence[int]], board: Sequence[int],
+                   iterations: int = 50_000, time_budget: float = 0.2,
+                   seed: Optional[int] = None) -> Dict[str, Any]:
+    """Win/tie equity for each live seat.
+
+    Enumerates every runout when there are at most EXACT_MAX_RUNOUTS of them,
+    otherwise samples runouts in NumPy batches until `iterations` samples are
+    taken or `time_budget` seconds have passed (at least one batch always runs).
+    """
+    if iterations < 1:
+        raise ValueError("iterations must be at least 1")
+    missing = 5 - len(board)
+    dead = set(board).union(*hole_cards)
+    remaining = np.array([c for c in range(52) if c not in dead], dtype=np.int64)
+    holes = np.array(hole_cards, dtype=np.int64).reshape(len(seats), 2)
+    known = np.array(board, dtype=np.int64)
+
+    wins = np.zeros(len(seats))
+    ties = np.zeros(len(seats))
+    shares = np.zeros(len(seats))  # split-pot fractions won in ties
+    samples = 0
+
+    if len(seats) < 2:
+        wins[:] = 1.0
+        samples = 1
+        method = "trivial"
+    elif comb(len(remaining), missing) <= EXACT_MAX_RUNOUTS:
+        runouts = np.array(list(combinations(remaining.tolist(), missing)), dtype=np.int64)
+        runouts = runouts.reshape(comb(len(remaining), missing), missing)
+        _score_runouts(holes, known, runouts, wins, ties, shares)
+        samples = len(runouts)
+        method = "exact"
+    else:
+        rng = np.random.default_rng(seed)
+        deadline = time.perf_counter() + time_budget
+        while samples < iterations:
+            n = min(BATCH_SIZE, iterations - samples)
+            # k smallest of n x len(remaining) random keys = k cards drawn without replacement
+            picks = np.argpartition(rng.random((n, len(remaining))), missing, axis=1)[:, :missing]
+            _score_runouts(holes, known, remaining[picks], wins, ties, shares)
+            samples += n
+            if time.perf_counter() >= deadline:
+                break
+        method = "monte_carlo"
+
+    return {
+        "method": method,
+        "samples": samples,
+        "seats": [
+            {
+                "seat": seat,
+                "win": float(wins[i] / samples),
+                "tie": float(ties[i] / samples),
+                "equity": float((wins[i] + shares[i]) / samples),
+            }
+            for i, seat in enumerate(seats)
+        ],
+    }
+
+
+def _score_runouts(holes: np.ndarray, known: np.ndarray, runouts: np.ndarray,
+                   wins: np.ndarray, ties: np.ndarray, shares: np.ndarray) -> None:
+    """Evaluate every seat on every runout and accumulate wins, ties and tie shares in place."""
+    n = len(runouts)
+    boards = np.concatenate([np.broadcast_to(known, (n, len(known))), runouts], axis=1)
+    scores = np.stack([
+        evaluate_array(np.concatenate([np.broadcast_to(hole, (n, 2)), boards], axis=1))
+        for hole in holes
+    ])
+    best = scores == scores.max(axis=0)
+    winners = best.sum(axis=0)
+    sole = winners == 1
+    wins += (best & sole).sum(axis=1)
+    ties += (best & ~sole).sum(axis=1)
+    shares += (best & ~sole).astype(np.float64) @ np.where(sole, 0.0, 1.0 / winners)
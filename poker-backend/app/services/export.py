@@ -0,0 +1,43 @@
+import csv
+import io
+import json
+from typing import Any, AsyncIterator, Dict
+
+from app.models import Hand
+
+# HandResponse's fields in its order, then starting_stacks, which HandImport takes back:
+# without it, re-imported hands would replay from their end-of-hand stacks
+EXPORT_FIELDS = [
+    "id", "uuid", "players", "stacks", "dealer", "sb", "bb", "big_blind",
+    "hole_cards", "board", "action_history", "payoffs", "created_at", "version", "starting_stacks",
+]
+
+
+def hand_to_record(hand: Hand) -> Dict[str, Any]:
+    record = {field: getattr(hand, field) for field in EXPORT_FIELDS}
+    if record["created_at"] is not None:
+        record["created_at"] = record["created_at"].isoformat()
+    return record
+
+
+async def ndjson_lines(hands: AsyncIterator[Hand]) -> AsyncIterator[str]:
+    async for hand in hands:
+        yield json.dumps(hand_to_record(hand), separators=(",", ":")) + "\n"
+
+
+async def csv_lines(hands: AsyncIterator[Hand]) -> AsyncIterator[str]:
+    """CSV with one row per hand; list and dict columns are JSON-encoded."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(EXPORT_FIELDS)
+    async for hand in hands:
+        record = hand_to_record(hand)
+        writer.writerow([
+            json.dumps(v, separators=(",", ":")) if isinstance(v, (list, dict)) else ("" if v is None else v)
+            for v in record.values()
+        ])
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue()
@@ -0,0 +1,131 @@
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from app.metrics import REGISTRY, Sampled
+
+DEFAULT_MAX_HANDS = int(os.getenv("LIVE_HANDS_MAX", "10000"))
+DEFAULT_IDLE_TTL = float(os.getenv("LIVE_HANDS_IDLE_TTL", "1800"))  # seconds
+
+
+class LiveHandRegistry:
+    """Process-wide store of live PokerKit states keyed by hand id.
+
+    Bounded by `max_hands` (least recently used hands are evicted first) and by
+    `idle_ttl` seconds without access. Evicted hands are not lost: HandService
+    restores them from the stored state snapshot (or replays them) on a miss.
+    Each state can carry the hand version it reflects, which the next write of
+    that hand checks so a state gone stale under another worker is never used,
+    and the hand's created_at, which keys those writes to the hand's partition.
+    """
+
+    def __init__(self, max_hands: int = DEFAULT_MAX_HANDS, idle_ttl: Optional[float] = DEFAULT_IDLE_TTL,
+                 clock=time.monotonic):
+        self.max_hands = max_hands
+        self.idle_ttl = idle_ttl
+        self._clock = clock
+        self._states: "OrderedDict[int, Any]" = OrderedDict()
+        self._touched: Dict[int, float] = {}
+        self._versions: Dict[int, Optional[int]] = {}
+        self._created: Dict[int, Optional[datetime]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, hand_id: int) -> Optional[Any]:
+        state = self._states.get(hand_id)
+        now = self._clock()
+        if state is not None and self._expired(hand_id, now):
+            self._evict(hand_id)
+            state = None
+        if state is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._states.move_to_end(hand_id)
+        self._touched[hand_id] = now
+        return state
+
+    def __setitem__(self, hand_id: int, state: Any) -> None:
+        self.set(hand_id, state)
+
+    def set(self, hand_id: int, state: Any, version: Optional[int] = None,
+            created_at: Optional[datetime] = None) -> None:
+        self._states[hand_id] = state
+        self._states.move_to_end(hand_id)
+        self._touched[hand_id] = self._clock()
+        self._versions[hand_id] = version
+        self._created[hand_id] = created_at
+        self._prune()
+
+    def version(self, hand_id: int) -> Optional[int]:
+        """Hand version the stored state reflects, or None if unknown."""
+        return self._versions.get(hand_id)
+
+    def created_at(self, hand_id: int) -> Optional[datetime]:
+        """The hand's created_at, or None if unknown."""
+        return self._created.get(hand_id)
+
+    def __contains__(self, hand_id: int) -> bool:
+        return hand_id in self._states
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def pop(self, hand_id: int, default: Any = None) -> Any:
+        self._touched.pop(hand_id, None)
+        self._versions.pop(hand_id, None)
+        self._created.pop(hand_id, None)
+        return self._states.pop(hand_id, default)
+
+    def clear(self) -> None:
+        self._states.clear()
+        self._touched.clear()
+        self._versions.clear()
+        self._created.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._states),
+            "max_hands": self.max_hands,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def _expired(self, hand_id: int, now: float) -> bool:
+        return self.idle_ttl is not None and now - self._touched[hand_id] > self.idle_ttl
+
+    def _evict(self, hand_id: int) -> None:
+        self.pop(hand_id)
+        self.evictions += 1
+
+    def _prune(self) -> None:
+        now = self._clock()
+        # Oldest entries sit at the front, so stop at the first one still fresh
+        while self._states:
+            oldest = next(iter(self._states))
+            if len(self._states) > self.max_hands or self._expired(oldest, now):
+                self._evict(oldest)
+            else:
+                break
+
+
+# Shared by every HandService instance in this process
+live_hands = LiveHandRegistry()
+
+REGISTRY.register(Sampled(
+    "poker_live_hands", "Live PokerKit states held in this process.", (), lambda: {(): len(live_hands)},
+))
+REGISTRY.register(Sampled(
+    "poker_live_hands_lookups_total", "Live state lookups by result; misses replay the hand from the DB.",
+    ("result",), lambda: {("hit",): live_hands.hits, ("miss",): live_hands.misses}, kind="counter",
+))
+REGISTRY.register(Sampled(
+    "poker_live_hands_evictions_total", "Live states evicted for size or idleness.", (),
+    lambda: {(): live_hands.evictions}, kind="counter",
+))
@@ -1,26 +1,61 @@
+import os
 import uuid
 import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from app.repository.hand_repository import HandRepository
+from app.metrics import ENGINE_SECONDS
 from app.models import Hand
-from app.utils.deck import shuffle_deck, deal_hole_cards
-from pokerkit import Automation, NoLimitTexasHoldem
+from app.services.hand_registry import LiveHandRegistry, live_hands
+from app.services.idempotency import ActionResults, HandLocks, action_results, hand_locks
+from app.services.engine import apply_action, board_str, deal_board, replay_state, start_state
+from app.services.llm_bot import LLMBot, get_llm_bot
+from app.services.state_snapshot import SnapshotError, load_state, snapshot_or_none
+from app.services.strategy import StrategyTables, heuristic_action, load_strategy
+from app.services.table_feed import TableFeed, table_feed
+from app.utils.deck import Deck, cards_to_str
 
 USER_SEAT_INDEX = 0  # first player in list is the user
+BOT_BACKEND = os.getenv("BOT_BACKEND", "tables")  # "tables", or "gemini" for app/services/llm_bot.py
+
+_APPLY_ACTION_SECONDS = ENGINE_SECONDS.labels("apply_action")
+_BOT_DECISION_SECONDS = ENGINE_SECONDS.labels("bot_decision")
+_REPLAY_SECONDS = ENGINE_SECONDS.labels("replay")
+_RESTORE_SECONDS = ENGINE_SECONDS.labels("restore_snapshot")
+
+
+class StaleHandState(Exception):
+    """The hand was written by someone else since this process's live state was loaded."""
+
+
+class ActionConflict(Exception):
+    """The submission does not apply to the hand as it is now: the API answers 409."""
+
 
 class HandService:
-    def __init__(self, repo: HandRepository):
+    def __init__(self, repo: HandRepository, registry: Optional[LiveHandRegistry] = None,
+                 feed: Optional[TableFeed] = None, strategy: Optional[StrategyTables] = None,
+                 bot: Optional[LLMBot] = None, results: Optional[ActionResults] = None,
+                 locks: Optional[HandLocks] = None):
         self.repo = repo
-        self._in_memory_states: Dict[int, Any] = {}  # store PokerKit states
+        # PokerKit states are shared across requests; see app/services/hand_registry.py
+        self._in_memory_states = registry if registry is not None else live_hands
+        # Committed changes are pushed to WebSocket subscribers; see app/services/table_feed.py
+        self._feed = feed if feed is not None else table_feed
+        # Bot decisions are lookups in precomputed tables; see app/services/strategy.py
+        self._strategy = strategy if strategy is not None else load_strategy()
+        # ...or, with BOT_BACKEND=gemini, model answers within a latency budget; see app/services/llm_bot.py
+        self._bot = bot if bot is not None else (get_llm_bot() if BOT_BACKEND == "gemini" else None)
+        # Responses to recent submissions, for retries; see app/services/idempotency.py
+        self._results = results if results is not None else action_results
+        self._locks = locks if locks is not None else hand_locks
 
     async def start_hand(
         self, players: List[str], stacks: List[int], dealer: int = 0, big_blind: int = 40
     ) -> Hand:
         n = len(players)
         uuid_str = str(uuid.uuid4())
-        deck = shuffle_deck()
-        hole_cards_list, deck = deal_hole_cards(deck, n)
-        hole_cards = {str(i): hole_cards_list[i] for i in range(n)}
+        deck = Deck.shuffled()
+        hole_cards = {str(i): cards_to_str(cards) for i, cards in enumerate(deck.deal_hole_cards(n))}
 
         sb = (dealer + 1) % n
         bb = (dealer + 2) % n
@@ -29,82 +64,197 @@ class HandService:
         hand = await self.repo.create_hand(uuid_str, players, stacks, dealer, sb, bb, big_blind, hole_cards)
 
         # Initialize PokerKit state
-        state = self._create_poker_state(n, stacks, big_blind)
-        for hc in hole_cards_list:
-            state.deal_hole(hc)
-        state._deck = deck
+        state = start_state(n, stacks, big_blind, hole_cards)
+
+        self._in_memory_states.set(hand.id, state, hand.version, hand.created_at)
 
-        self._in_memory_states[hand.id] = state
+        # Let the bots act until it is the user's turn
+        uow = self.repo.unit_of_work(hand.id, hand.created_at, hand.version)
+        try:
+            if await self._play_bots(hand.id, state, uow):
+                await self._persist_progress(hand.id, state, uow)
+                hand = await self._commit(uow, state)
+        except Exception:
+            self._in_memory_states.pop(hand.id)
+            raise
+        self._feed.publish(hand, state)
         return hand
 
-    def _create_poker_state(self, num_players: int, starting_stacks: List[int], big_blind: int):
-        automations = (
-            Automation.ANTE_POSTING,
-            Automation.BET_COLLECTION,
-            Automation.BLIND_OR_STRADDLE_POSTING,
-            Automation.CARD_BURNING,
-            Automation.HOLE_CARDS_SHOWING_OR_MUCKING,
-            Automation.HAND_KILLING,
-            Automation.CHIPS_PUSHING,
-            Automation.CHIPS_PULLING,
-        )
-        small_blind = big_blind // 2
-        state = NoLimitTexasHoldem.create_state(
-            automations,
-            verbose=False,
-            ante=0,
-            blinds=(small_blind, big_blind),
-            default_bet=big_blind,
-            stacks=tuple(starting_stacks),
-            num_players=num_players
-        )
+    async def get_state(self, hand_id: int):
+        """Return the live state for a hand, restoring or rebuilding it from the DB on a miss."""
+        state = self._in_memory_states.get(hand_id)
+        if state is None:
+            stored = await self.repo.get_live_state(hand_id)
+            if stored is None:
+                raise ValueError("Hand not found")
+            snapshot, version, created_at = stored
+            if snapshot is not None:
+                try:
+                    with _RESTORE_SECONDS.time():
+                        state = load_state(snapshot)
+                except SnapshotError:
+                    state = None  # written by an incompatible build; replay instead
+            if state is None:
+                hand = await self.repo.get_hand(hand_id)
+                if not hand:
+                    raise ValueError("Hand not found")
+                with _REPLAY_SECONDS.time():
+                    state = replay_state(hand)
+                version = hand.version
+            self._in_memory_states.set(hand_id, state, version, created_at)
         return state
 
-    async def submit_action(self, hand_id: int, action: Dict[str, Any]):
-        hand = await self.repo.get_hand(hand_id)
-        if not hand:
-            raise ValueError("Hand not found")
+    async def _play_bots(self, hand_id: int, state: Any, writer: Any) -> bool:
+        """Loop through bots until it's the user's turn or hand is over. Returns True if any acted."""
+        acted = False
+        deal_board(state)
+        while state.status and state.actor_index != USER_SEAT_INDEX:
+            with _BOT_DECISION_SECONDS.time():
+                bot_action = await self.bot_action(state)
+            bot_action["street"] = state.street_index
+            with _APPLY_ACTION_SECONDS.time():
+                apply_action(state, bot_action["player_seat"], bot_action["action"], bot_action.get("amount"))
+            bot_action["ts"] = datetime.datetime.utcnow().isoformat()
+            await writer.append_action(hand_id, bot_action)
+            deal_board(state)
+            acted = True
+        return acted
 
-        state = self._in_memory_states.get(hand_id)
-        if not state:
-            raise ValueError("In-memory state not found")
+    async def _persist_progress(self, hand_id: int, state: Any, writer: Any) -> None:
+        # Update DB with current stacks, board, payoffs
+        await writer.update_stacks(hand_id, list(state.stacks))
+        await writer.update_board(hand_id, board_str(state))
+        if not state.status:
+            await writer.update_payoffs(hand_id, dict(enumerate(state.payoffs)))
+        await writer.update_live_state(hand_id, snapshot_or_none(state))
+
+    async def _commit(self, uow: Any, state: Any) -> Hand:
+        hand = await uow.commit()
+        if hand is None:
+            raise StaleHandState(f"Hand {uow.hand_id} changed since version {uow.expected_version}")
+        self._in_memory_states.set(hand.id, state, hand.version, hand.created_at)
+        return hand
+
+    async def submit_action(self, hand_id: int, action: Dict[str, Any], version: Optional[int] = None,
+                            idempotency_key: Optional[str] = None):
+        """Apply the user's action and the bots' replies, returning the updated hand.
+
+        With `version`, the action applies only to the hand at that version (the
+        client's sequence number) and ActionConflict is raised otherwise. A repeat
+        of an earlier submission, by `idempotency_key` or else by `version`, gets
+        that submission's hand back without acting twice; the key is stored with the
+        action, so a retry that lands on another worker is caught there when the
+        write it attempts is refused. Submissions to one hand take turns on an
+        in-process lock; one that arrives while a different one
+        is in flight fails at once if it names a version, which will be gone by
+        the time it gets the lock.
+        """
+        if idempotency_key is not None:
+            key = ("key", idempotency_key)
+        else:
+            key = None if version is None else ("version", version)
+        seat = action.get("player_seat")
+        submitted = (USER_SEAT_INDEX if seat is None else seat, action["action"], action.get("amount"))
+        if version is not None and self._locks.busy(hand_id) and self._locks.key(hand_id) != key:
+            self._results.conflicts += 1
+            raise ActionConflict(f"Hand {hand_id} is being updated by another action")
+
+        async with self._locks.hold(hand_id, key):
+            if key is not None:
+                prior = self._results.get(hand_id, key)
+                if prior is not None:
+                    if prior[0] != submitted:
+                        self._results.conflicts += 1
+                        raise ActionConflict(f"{key[0].capitalize()} {key[1]!r} was used for a different action")
+                    self._results.duplicates += 1
+                    return prior[1]
+            try:
+                hand = await self._submit_action(hand_id, action, version, idempotency_key)
+            except (StaleHandState, ActionConflict, ValueError) as exc:
+                # A retry of a submission already stored, through another worker or before
+                # this process lost its results, fails against the hand it moved on
+                stored = None
+                if idempotency_key is not None:
+                    stored = await self._stored_submission(hand_id, idempotency_key, submitted)
+                if stored is not None:
+                    hand = stored
+                elif isinstance(exc, StaleHandState) and version is None:
+                    # Another worker moved the hand on; retry once from its stored state
+                    hand = await self._submit_action(hand_id, action, None, idempotency_key)
+                else:
+                    if not isinstance(exc, ValueError):
+                        self._results.conflicts += 1
+                    if isinstance(exc, StaleHandState):
+                        raise ActionConflict(f"Hand {hand_id} changed since version {version}") from exc
+                    raise
+            if key is not None:
+                self._results.put(hand_id, key, submitted, hand)
+            return hand
+
+    async def _stored_submission(self, hand_id: int, idempotency_key: str, submitted: Any) -> Optional[Hand]:
+        """The hand if an action is stored under `idempotency_key`, or None; ActionConflict if it is another action."""
+        stored = await self.repo.find_action(hand_id, idempotency_key)
+        if stored is None:
+            return None
+        if (stored.get("player_seat"), stored["action"], stored.get("amount")) != submitted:
+            self._results.conflicts += 1
+            raise ActionConflict(f"Key {idempotency_key!r} was used for a different action")
+        self._results.duplicates += 1
+        return await self.repo.get_hand(hand_id)
+
+    async def _submit_action(self, hand_id: int, action: Dict[str, Any], version: Optional[int] = None,
+                             idempotency_key: Optional[str] = None):
+        state = await self.get_state(hand_id)
+        if version is not None and self._in_memory_states.version(hand_id) != version:
+            current = self._in_memory_states.version(hand_id)
+            if current is None or current < version:
+                # This process's state may be behind the DB; check against the stored hand
+                self._in_memory_states.pop(hand_id)
+                state = await self.get_state(hand_id)
+                current = self._in_memory_states.version(hand_id)
+            if current != version:
+                raise ActionConflict(f"Hand {hand_id} is at version {current}, not {version}")
+        if not state.status:
+            raise ValueError("Hand is already over")
+
+        # Everything below is buffered and written in a single statement on commit,
+        # and only if nobody else wrote the hand since our state was loaded
+        uow = self.repo.unit_of_work(hand_id, self._in_memory_states.created_at(hand_id),
+                                     self._in_memory_states.version(hand_id))
 
         # Apply user action
         action_seat = action.get("player_seat", USER_SEAT_INDEX)
+        if action_seat is None:
+            action_seat = USER_SEAT_INDEX
         act = action["action"]
         amt = action.get("amount")
-        NoLimitTexasHoldem.apply_action(state, action_seat, act, amt)
-
-        # Save user action to DB
-        action["ts"] = datetime.datetime.utcnow().isoformat()
-        await self.repo.append_action(hand_id, action)
-
-        # Loop through bots until it's the user's turn or hand is over
-        while not state.hand_over and state.current_player_index != USER_SEAT_INDEX:
-            bot_action = self._choose_bot_action(state)
-            NoLimitTexasHoldem.apply_action(
-                state, bot_action["player_seat"], bot_action["action"], bot_action.get("amount")
-            )
-            bot_action["ts"] = datetime.datetime.utcnow().isoformat()
-            await self.repo.append_action(hand_id, bot_action)
+        try:
+            street = state.street_index
+            with _APPLY_ACTION_SECONDS.time():
+                apply_action(state, action_seat, act, amt)
 
-        # Update DB with current stacks, board, payoffs
-        await self.repo.update_stacks(hand_id, list(state.stacks))
-        await self.repo.update_board(hand_id, state.board)
-        if state.hand_over:
-            await self.repo.update_payoffs(hand_id, state.payoffs)
+            action["player_seat"] = action_seat
+            action["street"] = street
+            action["ts"] = datetime.datetime.utcnow().isoformat()
+            await uow.append_action(hand_id, action, idempotency_key)
 
-        return await self.repo.get_hand(hand_id)
+            await self._play_bots(hand_id, state, uow)
+            await self._persist_progress(hand_id, state, uow)
 
-    def _choose_bot_action(self, state: Any) -> Dict[str, Any]:
-        """Simple bot strategy placeholder. Replace this with Gemini LLM later."""
-        seat = state.current_player_index
-        stack = state.stacks[seat]
+            hand = await self._commit(uow, state)
+        except Exception:
+            # The live state may now be ahead of the DB; rebuild it from the DB next time
+            self._in_memory_states.pop(hand_id)
+            raise
+        self._feed.publish(hand, state)
+        return hand
 
-        possible_actions = NoLimitTexasHoldem.available_actions(state)
-        if "call" in possible_actions:
-            return {"player_seat": seat, "action": "call", "amount": state.current_bet}
-        elif "check" in possible_actions:
-            return {"player_seat": seat, "action": "check"}
-        else:
-            return {"player_seat": seat, "action": "fold"}
+    async def bot_action(self, state: Any) -> Dict[str, Any]:
+        """The acting bot's next action, from the LLM bot if one is configured, else the strategy tables."""
+        if self._bot is not None:
+            return await self._bot.decide(state)
+        return self.choose_bot_action(state)
+
+    def choose_bot_action(self, state: Any) -> Dict[str, Any]:
+        """The strategy tables' action, or check/call without a strategy file."""
+        return heuristic_action(state, self._strategy)
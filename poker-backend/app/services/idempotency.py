@@ -0,0 +1,123 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Hashable, Optional, Tuple
+
+from app.metrics import REGISTRY, Sampled
+
+DEFAULT_MAX_RESULTS = int(os.getenv("ACTION_RESULTS_MAX", "10000"))
+DEFAULT_RESULT_TTL = float(os.getenv("ACTION_RESULTS_TTL", "600"))  # seconds
+
+# A submission is named by ("key", its idempotency key) or ("version", the version it
+# names): kinds apart, so a client key can never pass for a version or the reverse.
+SubmissionKey = Tuple[str, Hashable]
+Key = Tuple[int, SubmissionKey]
+
+
+class ActionResults:
+    """Process-wide store of the responses to recent action submissions.
+
+    Keyed by (hand id, SubmissionKey), so a client retrying a
+    submission gets the response it missed instead of a second action. Each entry
+    remembers what was submitted, so a key reused for a different action is told
+    apart from a retry. Bounded by `max_results` (least recently used first) and
+    `ttl` seconds; a retry that comes later than that gets a 409 from the version
+    check instead, or is found by its key in the hand's stored actions.
+    """
+
+    def __init__(self, max_results: int = DEFAULT_MAX_RESULTS, ttl: Optional[float] = DEFAULT_RESULT_TTL,
+                 clock=time.monotonic):
+        self.max_results = max_results
+        self.ttl = ttl
+        self._clock = clock
+        self._results: "OrderedDict[Key, Tuple[float, Any, Any]]" = OrderedDict()
+        self.duplicates = 0
+        self.conflicts = 0
+
+    def get(self, hand_id: int, key: SubmissionKey) -> Optional[Tuple[Any, Any]]:
+        """(what was submitted, the response) for an earlier submission, or None."""
+        entry = self._results.get((hand_id, key))
+        if entry is None:
+            return None
+        stored_at, submitted, response = entry
+        if self.ttl is not None and self._clock() - stored_at > self.ttl:
+            del self._results[(hand_id, key)]
+            return None
+        self._results.move_to_end((hand_id, key))
+        return submitted, response
+
+    def put(self, hand_id: int, key: SubmissionKey, submitted: Any, response: Any) -> None:
+        self._results[(hand_id, key)] = (self._clock(), submitted, response)
+        self._results.move_to_end((hand_id, key))
+        while len(self._results) > self.max_results:
+            self._results.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def clear(self) -> None:
+        self._results.clear()
+
+
+class HandLocks:
+    """One asyncio lock per hand with submissions in flight in this process.
+
+    Submissions to a hand run one at a time here, so they queue on the event loop
+    rather than on the hand's row lock in Postgres. The key of the submission
+    holding the lock is visible to the others, so a retry of it can wait for its
+    response while a different submission can be turned away without waiting.
+    Locks are dropped once nobody holds or waits for them.
+    """
+
+    def __init__(self):
+        self._locks: Dict[int, asyncio.Lock] = {}
+        self._users: Dict[int, int] = {}
+        self._keys: Dict[int, Optional[SubmissionKey]] = {}
+
+    def busy(self, hand_id: int) -> bool:
+        return hand_id in self._keys
+
+    def key(self, hand_id: int) -> Optional[SubmissionKey]:
+        """Key of the submission holding the hand's lock (None if it has none or nobody does)."""
+        return self._keys.get(hand_id)
+
+    @asynccontextmanager
+    async def hold(self, hand_id: int, key: Optional[SubmissionKey] = None) -> AsyncIterator[None]:
+        lock = self._locks.get(hand_id)
+        if lock is None:
+            lock = self._locks[hand_id] = asyncio.Lock()
+        self._users[hand_id] = self._users.get(hand_id, 0) + 1
+        try:
+            async with lock:
+                self._keys[hand_id] = key
+                try:
+                    yield
+                finally:
+                    del self._keys[hand_id]
+        finally:
+            self._users[hand_id] -= 1
+            if not self._users[hand_id]:
+                del self._users[hand_id]
+                del self._locks[hand_id]
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+
+# Shared by every HandService instance in this process
+action_results = ActionResults()
+hand_locks = HandLocks()
+
+REGISTRY.register(Sampled(
+    "poker_action_results", "Action responses held for duplicate submissions.", (),
+    lambda: {(): len(action_results)},
+))
+REGISTRY.register(Sampled(
+    "poker_action_submissions_rejected_total",
+    "Action submissions answered without being applied: retries served their earlier response, "
+    "conflicts got a 409.",
+    ("result",), lambda: {("duplicate",): action_results.duplicates, ("conflict",): action_results.conflicts},
+    kind="counter",
+))
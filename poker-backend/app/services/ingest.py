@@ -0,0 +1,70 @@
+import json
+import time
+from typing import Any, AsyncIterable, AsyncIterator, Dict, List, Optional, Union
+
+from pydantic import ValidationError
+
+from app.repository.hand_repository import HandRepository
+from app.schemas import HandImport
+
+DEFAULT_CHUNK_SIZE = 5000
+MAX_REPORTED_ERRORS = 20
+
+
+async def iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+    """Split a byte stream into lines without holding more than one partial line.
+
+    Lines are left undecoded: ingest_ndjson decodes each one inside its own
+    validation, so a line that is not UTF-8 is rejected like any other bad line.
+    """
+    pending = b""
+    async for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line
+    if pending:
+        yield pending
+
+
+async def ingest_ndjson(repo: HandRepository, lines: AsyncIterable[Union[str, bytes]],
+                        chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[str, Any]:
+    """Validate NDJSON hands (HandResponse shape) as they stream in and COPY them in chunks.
+
+    Invalid lines are counted and skipped; hands whose uuid already exists are skipped,
+    so re-running an import is safe. Finished hands are added to player_stats with the
+    chunk that inserts them, as the table manager's writes are.
+    """
+    started = time.perf_counter()
+    report: Dict[str, Any] = {"read": 0, "inserted": 0, "skipped": 0, "rejected": 0, "errors": []}
+    chunk: List[HandImport] = []
+
+    async def flush():
+        inserted = await repo.bulk_insert_hands(chunk, fold_stats=True)
+        report["inserted"] += inserted
+        report["skipped"] += len(chunk) - inserted
+        chunk.clear()
+
+    line_no = 0
+    async for line in lines:
+        line_no += 1
+        if not line.strip():
+            continue
+        report["read"] += 1
+        try:
+            # json.loads decodes bytes as UTF-8; UnicodeDecodeError is a ValueError
+            chunk.append(HandImport.parse_obj(json.loads(line)))
+        except (ValueError, ValidationError) as e:
+            report["rejected"] += 1
+            if len(report["errors"]) < MAX_REPORTED_ERRORS:
+                report["errors"].append({"line": line_no, "error": str(e)})
+            continue
+        if len(chunk) >= chunk_size:
+            await flush()
+    if chunk:
+        await flush()
+
+    elapsed = time.perf_counter() - started
+    report["seconds"] = elapsed
+    report["rows_per_sec"] = report["inserted"] / elapsed if elapsed else 0.0
+    return report
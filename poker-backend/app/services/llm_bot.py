@@ -0,0 +1,232 @@
+"""Bot decisions from an LLM (Gemini), kept off the request's critical path.
+
+HandService awaits `LLMBot.decide` for every bot move, so a slow model must not
+stall a table. Each decision is first abstracted to the same situation key the
+strategy tables use (app/services/strategy.py), then:
+
+- a cached answer for that situation is used as is (LRU, `cache_size` entries);
+- otherwise one model request per situation is in flight at a time, and any
+  other bot reaching the same situation waits on it instead of asking again;
+- requests share a semaphore of `max_concurrency` slots;
+- a decision waits at most `budget` seconds (slot wait included) and then falls
+  back to the heuristic bot. The request carries on in the background and its
+  answer still fills the cache, so the next bot in that spot gets it.
+
+The prompt only describes the abstract situation, which is what makes answers
+reusable across hands.
+"""
+import asyncio
+import os
+import re
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+import httpx
+
+from app.metrics import REGISTRY, Sampled
+from app.services.strategy import (
+    ALLIN, CALL, DEPTH_EDGES, FOLD, ODDS_EDGES, POSITION_NAMES, RAISE, STRENGTH_NAMES, heuristic_action,
+    legal_action, load_strategy, situation,
+)
+from app.utils.deck import RANKS
+
+GEMINI_BASE_URL = os.getenv("GEMINI_BASE_URL", "https://generativelanguage.googleapis.com")
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
+DEFAULT_CONCURRENCY = int(os.getenv("LLM_BOT_CONCURRENCY", "8"))  # model requests in flight
+DEFAULT_BUDGET = float(os.getenv("LLM_BOT_BUDGET", "0.25"))  # seconds a decision may wait for the model
+DEFAULT_CACHE_SIZE = int(os.getenv("LLM_BOT_CACHE", "4096"))  # situations remembered
+REQUEST_TIMEOUT = float(os.getenv("LLM_BOT_REQUEST_TIMEOUT", "10"))  # seconds before a background request is dropped
+
+STREET_NAMES = ("preflop", "flop", "turn", "river")
+_ACTION_WORDS = {"fold": FOLD, "check": CALL, "call": CALL, "bet": RAISE, "raise": RAISE, "allin": ALLIN,
+                 "all-in": ALLIN, "shove": ALLIN}
+_WORD = re.compile(r"[a-z-]+")
+
+
+class LLMError(Exception):
+    """The model could not be reached or gave no usable answer."""
+
+
+class GeminiClient:
+    """Minimal async client for the Gemini generateContent endpoint."""
+
+    def __init__(self, api_key: str, model: str = GEMINI_MODEL, base_url: str = GEMINI_BASE_URL,
+                 timeout: float = REQUEST_TIMEOUT, http: Optional[httpx.AsyncClient] = None):
+        self._url = f"{base_url.rstrip('/')}/v1beta/models/{model}:generateContent"
+        self._headers = {"x-goog-api-key": api_key}
+        self._http = http or httpx.AsyncClient(timeout=timeout)
+
+    async def generate(self, prompt: str) -> str:
+        body = {
+            "contents": [{"parts": [{"text": prompt}]}],
+            "generationConfig": {"temperature": 0, "maxOutputTokens": 8},
+        }
+        try:
+            resp = await self._http.post(self._url, json=body, headers=self._headers)
+            resp.raise_for_status()
+            return resp.json()["candidates"][0]["content"]["parts"][0]["text"]
+        except (httpx.HTTPError, ValueError, KeyError, IndexError, TypeError) as exc:
+            raise LLMError(f"Gemini request failed: {exc!r}") from exc
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+
+
+def class_name(cls: int) -> str:
+    """"AA", "AKs" or "AKo" for a `hand_class` index."""
+    row, col = divmod(cls, 13)
+    if row == col:
+        return RANKS[row] * 2
+    if row > col:
+        return RANKS[row] + RANKS[col] + "s"
+    return RANKS[col] + RANKS[row] + "o"
+
+
+def _bucket_range(edges, i: int, unit: str) -> str:
+    if i == 0:
+        return f"at most {edges[0]}{unit}"
+    if i == len(edges):
+        return f"more than {edges[-1]}{unit}"
+    return f"{edges[i - 1]}-{edges[i]}{unit}"
+
+
+def situation_prompt(key: Tuple[int, ...]) -> str:
+    """Describe a `Situation.key` for the model."""
+    if key[0] == 0:
+        _, facing, pos, depth, cls = key
+        lines = [
+            "Street: preflop",
+            f"Position: {POSITION_NAMES[pos]}",
+            f"Hand: {class_name(cls)}",
+            f"Effective stack: {_bucket_range(DEPTH_EDGES, depth, ' big blinds')}",
+            f"Facing a raise: {'yes' if facing else 'no'}",
+        ]
+    else:
+        street, odds, strength = key
+        price = "nothing (no bet to call)" if odds == 0 else _bucket_range(ODDS_EDGES, odds - 1, " of the pot")
+        lines = [
+            f"Street: {STREET_NAMES[street]}",
+            f"Hand strength: {STRENGTH_NAMES[strength].replace('_', ' ')}",
+            f"Price to call: {price}",
+        ]
+    return ("You are a No-Limit Texas Hold'em bot. Situation:\n" + "\n".join(lines)
+            + "\nAnswer with exactly one word: fold, call, raise or allin.")
+
+
+def parse_action(text: str) -> int:
+    for word in _WORD.findall(text.lower()):
+        if word in _ACTION_WORDS:
+            return _ACTION_WORDS[word]
+    raise LLMError(f"No action in model answer: {text[:80]!r}")
+
+
+class LLMBot:
+    """Async bot backend that asks a model and falls back to `fallback` when it is slow or failing."""
+
+    def __init__(self, client: Any, fallback: Optional[Callable[[Any], Dict[str, Any]]] = None,
+                 max_concurrency: int = DEFAULT_CONCURRENCY, budget: float = DEFAULT_BUDGET,
+                 cache_size: int = DEFAULT_CACHE_SIZE, request_timeout: float = REQUEST_TIMEOUT):
+        self.client = client
+        self.fallback = fallback or (lambda state: heuristic_action(state, load_strategy()))
+        self.budget = budget
+        self.cache_size = cache_size
+        self.request_timeout = request_timeout
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._cache: "OrderedDict[Tuple[int, ...], int]" = OrderedDict()
+        self._inflight: Dict[Tuple[int, ...], "asyncio.Task[int]"] = {}
+        self._orphaned: Set["asyncio.Task[int]"] = set()  # requests some decision stopped waiting for
+        self.counts = {"cache": 0, "model": 0, "coalesced": 0, "timeout": 0, "error": 0}
+
+    async def decide(self, state: Any) -> Dict[str, Any]:
+        spot = situation(state)
+        code = self._cache.get(spot.key)
+        if code is not None:
+            self._cache.move_to_end(spot.key)
+            self.counts["cache"] += 1
+            return legal_action(state, spot, code)
+
+        task = self._inflight.get(spot.key)
+        if task is None:
+            task = self._inflight[spot.key] = asyncio.ensure_future(self._ask(spot.key))
+            task.add_done_callback(lambda _, key=spot.key: self._inflight.pop(key, None))
+            source = "model"
+        else:
+            source = "coalesced"
+        try:
+            # shield: a timeout here must not cancel the request other bots may be waiting on
+            code = await asyncio.wait_for(asyncio.shield(task), self.budget)
+        except asyncio.TimeoutError:
+            self.counts["timeout"] += 1
+            if task not in self._orphaned:
+                self._orphaned.add(task)
+                task.add_done_callback(self._late_result)
+            return self.fallback(state)
+        except LLMError:
+            self.counts["error"] += 1
+            return self.fallback(state)
+        self.counts[source] += 1
+        return legal_action(state, spot, code)
+
+    async def _ask(self, key: Tuple[int, ...]) -> int:
+        async with self._slots:
+            try:
+                text = await asyncio.wait_for(self.client.generate(situation_prompt(key)), self.request_timeout)
+            except asyncio.TimeoutError as exc:
+                raise LLMError("Model request timed out") from exc
+        code = parse_action(text)
+        self._cache[key] = code
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return code
+
+    def _late_result(self, task: "asyncio.Task[int]") -> None:
+        # Nobody may await a request that outlived its budget; retrieve its error here
+        self._orphaned.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            self.counts["error"] += 1
+
+    def pending(self) -> int:
+        return len(self._inflight)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"cached": len(self._cache), "inflight": len(self._inflight), **self.counts}
+
+    async def aclose(self) -> None:
+        for task in list(self._inflight.values()):
+            task.cancel()
+        await self.client.aclose()
+
+
+_bot: Optional[LLMBot] = None
+
+
+def get_llm_bot() -> LLMBot:
+    """The process-wide LLM bot, created on first use from GEMINI_* / LLM_BOT_* settings."""
+    global _bot
+    if _bot is None:
+        api_key = os.getenv("GEMINI_API_KEY")
+        if not api_key:
+            raise RuntimeError("GEMINI_API_KEY is required for BOT_BACKEND=gemini")
+        _bot = LLMBot(GeminiClient(api_key))
+    return _bot
+
+
+async def close_llm_bot() -> None:
+    global _bot
+    if _bot is not None:
+        await _bot.aclose()
+        _bot = None
+
+
+def _decisions():
+    if _bot is None:
+        return {}
+    return {(source,): n for source, n in _bot.counts.items()}
+
+
+REGISTRY.register(Sampled(
+    "poker_llm_bot_decisions_total", "LLM bot decisions by source: cache, model, coalesced, or a fallback "
+    "(timeout, error) to the heuristic bot; error also counts requests that failed after their decision "
+    "timed out.", ("source",), _decisions, kind="counter",
+))
@@ -0,0 +1,43 @@
+from typing import Any, Dict, Optional
+
+from app.repository.hand_repository import HandRepository
+from app.repository.player_stats_repository import PlayerStatsRepository
+from app.services.engine import replay_state
+
+
+def summarize(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Add the derived rates to a player_stats row."""
+    hands = row["hands"] or 0
+    passive = row["passive_actions"] or 0
+    return {
+        **row,
+        "vpip": row["vpip_hands"] / hands if hands else 0.0,
+        "pfr": row["pfr_hands"] / hands if hands else 0.0,
+        # (bets + raises) / calls; None when the player never called
+        "aggression_factor": row["aggressive_actions"] / passive if passive else None,
+        "winnings_per_hand": row["winnings"] / hands if hands else 0.0,
+    }
+
+
+async def backfill_action_streets(hands: HandRepository, stats: PlayerStatsRepository,
+                                  page_size: int = 1000) -> int:
+    """Tag actions recorded before streets were stored, by replaying their hands. Returns hands updated."""
+    updated = 0
+    async for hand in hands.iter_hands(page_size=page_size):
+        if not hand.hole_cards or all("street" in a for a in hand.action_history):
+            continue
+        streets = []
+        try:
+            replay_state(hand, streets)
+        except ValueError:
+            continue  # not replayable; its actions stay without streets
+        await stats.set_action_streets(hand.id, streets)
+        updated += 1
+    return updated
+
+
+async def rebuild_player_stats(hands: HandRepository, stats: PlayerStatsRepository,
+                               backfill_streets: bool = True) -> Dict[str, Optional[int]]:
+    backfilled = await backfill_action_streets(hands, stats) if backfill_streets else None
+    players = await stats.rebuild()
+    return {"hands_backfilled": backfilled, "players": players}
@@ -0,0 +1,172 @@
+"""Compact, versioned snapshots of in-progress PokerKit states.
+
+A snapshot holds only what changes during a hand (deck remainder, cards, stacks,
+bets, street, actor queue and the betting bookkeeping) as a pickle of plain
+ints, bools, tuples and bytes. Cards are one byte each, as in the `*_bin`
+columns. Everything fixed for the table (blinds, streets, automations) comes
+from a template state built once per (players, starting stacks, big blind).
+Restoring is a few dict and list builds instead of a full replay, so any worker
+can pick up a hand where another left off.
+"""
+import io
+import pickle
+from collections import deque
+from functools import lru_cache
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from pokerkit import Automation, Card, NoLimitTexasHoldem, State
+
+from app.utils.deck import CARDS
+
+FORMAT_VERSION = 1
+
+AUTOMATIONS = (
+    Automation.ANTE_POSTING,
+    Automation.BET_COLLECTION,
+    Automation.BLIND_OR_STRADDLE_POSTING,
+    Automation.CARD_BURNING,
+    Automation.HOLE_CARDS_SHOWING_OR_MUCKING,
+    Automation.HAND_KILLING,
+    Automation.CHIPS_PUSHING,
+    Automation.CHIPS_PULLING,
+)
+
+_PK_CARDS: Tuple[Card, ...] = tuple(Card.parse("".join(CARDS)))
+_PK_INDEX: Dict[Card, int] = {card: i for i, card in enumerate(_PK_CARDS)}
+
+# Dynamic State attributes by encoding. Anything not listed here (and not
+# `operations`, the history log) is fixed at creation and taken from the template.
+_SCALARS = (
+    "bet_collection_status", "bring_in_status", "card_burning_status", "completion_status",
+    "completion_betting_or_raising_amount", "completion_betting_or_raising_count", "opener_index", "street_index",
+)
+_BOOL_LISTS = (  # one flag per seat, packed into an int
+    "ante_posting_statuses", "blind_or_straddle_posting_statuses", "chips_pulling_statuses",
+    "hand_killing_statuses", "runout_count_selector_statuses", "standing_pat_or_discarding_statuses", "statuses",
+)
+_INT_LISTS = (
+    "bets", "stacks", "payoffs", "board_dealing_counts", "consecutive_all_in_completion_betting_or_raising_amounts",
+)
+_CARD_LISTS = ("burn_cards", "mucked_cards")
+_NESTED_CARD_LISTS = ("board_cards", "hole_cards", "discarded_cards")
+_INDEX_SETS = ("acted_player_indices",)
+_INDEX_DEQUES = ("actor_indices", "showdown_indices")
+_NESTED_BOOL_LISTS = ("hole_card_statuses",)
+_NESTED_BOOL_DEQUES = ("hole_dealing_statuses",)
+
+DYNAMIC_FIELDS = frozenset(
+    _SCALARS + _BOOL_LISTS + _INT_LISTS + _CARD_LISTS + _NESTED_CARD_LISTS + _INDEX_SETS + _INDEX_DEQUES
+    + _NESTED_BOOL_LISTS + _NESTED_BOOL_DEQUES + ("deck_cards", "_sub_pots", "operations")
+)
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+def create_state(num_players: int, starting_stacks: Sequence[int], big_blind: int) -> State:
+    """The table's initial PokerKit state, before hole cards are dealt."""
+    return NoLimitTexasHoldem.create_state(
+        AUTOMATIONS,
+        True,  # ante trimming
+        0,  # antes
+        (big_blind // 2, big_blind),
+        big_blind,  # min bet
+        tuple(starting_stacks),
+        num_players,
+    )
+
+
+@lru_cache(maxsize=1024)
+def _template(num_players: int, starting_stacks: Tuple[int, ...], big_blind: int) -> Dict[str, Any]:
+    """Fixed attributes of a table's state. They are all immutable, so restored states share them."""
+    return {k: v for k, v in vars(create_state(num_players, starting_stacks, big_blind)).items()
+            if k not in DYNAMIC_FIELDS}
+
+
+def _cards(cards) -> bytes:
+    index = _PK_INDEX
+    return bytes([index[c] for c in cards])
+
+
+def _mask(flags) -> int:
+    mask = 0
+    for i, flag in enumerate(flags):
+        if flag:
+            mask |= 1 << i
+    return mask
+
+
+def dump_state(state: State) -> bytes:
+    """Encode an in-progress state. Finished hands have nothing to resume and are rejected."""
+    if not state.status or "_pots" in vars(state):
+        raise SnapshotError("Only in-progress hands can be snapshotted")
+    payload = (
+        FORMAT_VERSION,
+        state.player_count,
+        tuple(state.starting_stacks),
+        max(state.blinds_or_straddles),  # the big blind create_state was given
+        tuple(getattr(state, k) for k in _SCALARS),
+        tuple(_mask(getattr(state, k)) for k in _BOOL_LISTS),
+        tuple(tuple(getattr(state, k)) for k in _INT_LISTS),
+        tuple(_cards(getattr(state, k)) for k in _CARD_LISTS),
+        tuple(tuple(_cards(cards) for cards in getattr(state, k)) for k in _NESTED_CARD_LISTS),
+        tuple(bytes(sorted(getattr(state, k))) for k in _INDEX_SETS),
+        tuple(bytes(getattr(state, k)) for k in _INDEX_DEQUES),
+        tuple(tuple(tuple(flags) for flags in getattr(state, k)) for k in _NESTED_BOOL_LISTS + _NESTED_BOOL_DEQUES),
+        _cards(state.deck_cards),
+        tuple(state._sub_pots),
+    )
+    return pickle.dumps(payload, protocol=5)
+
+
+class _PlainUnpickler(pickle.Unpickler):
+    """Snapshots only ever contain builtin values, so never import anything while loading one."""
+
+    def find_class(self, module, name):
+        raise SnapshotError(f"Unexpected object in state snapshot: {module}.{name}")
+
+
+def load_state(data: bytes) -> State:
+    """Rebuild a PokerKit state from `dump_state` output."""
+    try:
+        payload = _PlainUnpickler(io.BytesIO(data)).load()
+    except (pickle.UnpicklingError, EOFError, ValueError) as exc:
+        raise SnapshotError(f"Unreadable state snapshot: {exc}") from exc
+    fmt = payload[0] if isinstance(payload, tuple) and payload else None
+    if fmt != FORMAT_VERSION:
+        raise SnapshotError(f"Unsupported state snapshot format: {fmt!r}")
+
+    (_, n, starting_stacks, big_blind, scalars, bool_masks, int_lists, card_lists, nested_cards,
+     index_sets, index_deques, nested_bools, deck_cards, sub_pots) = payload
+
+    state = State.__new__(State)
+    attrs = vars(state)
+    attrs.update(_template(n, starting_stacks, big_blind))
+    cards = _PK_CARDS
+    attrs.update(zip(_SCALARS, scalars))
+    for k, mask in zip(_BOOL_LISTS, bool_masks):
+        attrs[k] = [bool(mask >> i & 1) for i in range(n)]
+    for k, values in zip(_INT_LISTS, int_lists):
+        attrs[k] = list(values)
+    for k, raw in zip(_CARD_LISTS, card_lists):
+        attrs[k] = [cards[c] for c in raw]
+    for k, groups in zip(_NESTED_CARD_LISTS, nested_cards):
+        attrs[k] = [[cards[c] for c in group] for group in groups]
+    for k, raw in zip(_INDEX_SETS, index_sets):
+        attrs[k] = set(raw)
+    for k, raw in zip(_INDEX_DEQUES, index_deques):
+        attrs[k] = deque(raw)
+    for k, groups in zip(_NESTED_BOOL_LISTS, nested_bools):
+        attrs[k] = [list(flags) for flags in groups]
+    for k, groups in zip(_NESTED_BOOL_DEQUES, nested_bools[len(_NESTED_BOOL_LISTS):]):
+        attrs[k] = [deque(flags) for flags in groups]
+    attrs["deck_cards"] = deque(cards[c] for c in deck_cards)
+    attrs["_sub_pots"] = list(sub_pots)
+    attrs["operations"] = []  # history is in hand_actions, not needed to continue the hand
+    return state
+
+
+def snapshot_or_none(state: Any) -> Optional[bytes]:
+    """The snapshot to store with a hand: None once it is over."""
+    return dump_state(state) if state.status else None
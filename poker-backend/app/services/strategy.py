@@ -0,0 +1,279 @@
+"""Local bot strategy: precomputed preflop and postflop tables in a memory-mapped file.
+
+A bot decision is a table lookup keyed on a small abstraction of the situation:
+
+- preflop: (facing a raise, position, effective stack depth, starting-hand class),
+  where the 169 classes are the pairs, suited and offsuit rank combinations;
+- postflop: (street, pot-odds bucket, hand-strength bucket).
+
+Each cell is one byte, an action code. The tables are built offline by
+app/services/strategy_builder.py (`poetry run build-strategy`) and shipped as
+app/data/strategy.bin; the file is memory-mapped once per process, so forked
+workers share its pages and a decision costs a few evaluator calls and one byte
+read, with nothing on the network.
+"""
+import mmap
+import os
+import struct
+from typing import Any, Dict, NamedTuple, Optional, Sequence, Tuple
+
+from pokerkit import Card
+
+from app.utils.deck import CARDS
+from app.utils.evaluator import FLUSH, FULL_HOUSE, STRAIGHT, category, evaluate_indices
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "strategy.bin")
+STRATEGY_PATH = os.getenv("STRATEGY_TABLES", DEFAULT_PATH)
+
+MAGIC = b"PKST"
+FORMAT_VERSION = 1
+
+# Action codes stored in the tables. FOLD becomes a check when checking is free,
+# RAISE a call when raising is not allowed.
+FOLD, CALL, RAISE, ALLIN = range(4)
+ACTION_NAMES = ("fold", "call", "raise", "allin")
+
+# Preflop abstraction
+EP, MP, CO, BTN, SB, BB = range(6)
+POSITION_NAMES = ("EP", "MP", "CO", "BTN", "SB", "BB")
+DEPTH_EDGES = (15, 30, 60)  # effective stack in big blinds; buckets <=15, <=30, <=60, deeper
+NUM_CLASSES = 169
+NUM_FACING = 2  # 0: no raise yet (blinds or limps), 1: facing a raise
+
+# Postflop abstraction
+FLOP, TURN, RIVER = range(3)
+ODDS_EDGES = (0.15, 0.25, 0.33, 0.40, 0.50)  # call / (pot + call); bucket 0 is "no bet to call"
+AIR, DRAW, WEAK_PAIR, TOP_PAIR, TWO_PAIR, TRIPS, STRAIGHT_HAND, FLUSH_HAND, MONSTER = range(9)
+STRENGTH_NAMES = ("air", "draw", "weak_pair", "top_pair", "two_pair", "trips", "straight", "flush", "monster")
+
+SHAPE_PREFLOP = (NUM_FACING, len(POSITION_NAMES), len(DEPTH_EDGES) + 1, NUM_CLASSES)
+SHAPE_POSTFLOP = (3, len(ODDS_EDGES) + 2, len(STRENGTH_NAMES))
+_HEADER = struct.Struct("<4sH7H")
+
+# Bet sizing, in big blinds preflop and as a fraction of the pot after
+OPEN_SIZE = 2.5
+RERAISE_FACTOR = 3
+BET_POT_FRACTION = 2 / 3
+
+_PK_INDEX: Dict[Card, int] = {card: i for i, card in enumerate(Card.parse("".join(CARDS)))}
+
+
+class StrategyError(ValueError):
+    pass
+
+
+def _cells(shape: Sequence[int]) -> int:
+    n = 1
+    for d in shape:
+        n *= d
+    return n
+
+
+def hand_class(c1: int, c2: int) -> int:
+    """Index 0..168 of a starting hand in the 13x13 grid: pairs on the diagonal,
+    suited hands at (high, low), offsuit hands at (low, high)."""
+    r1, r2 = c1 >> 2, c2 >> 2
+    hi, lo = (r1, r2) if r1 >= r2 else (r2, r1)
+    if (c1 & 3) == (c2 & 3):
+        return hi * 13 + lo
+    return lo * 13 + hi
+
+
+def position(seat: int, num_players: int) -> int:
+    """PokerKit seats post the blinds from seat 0 (heads-up: seat 1 is the button and small blind)."""
+    if num_players == 2:
+        return SB if seat == 1 else BB
+    if seat < 2:
+        return (SB, BB)[seat]
+    to_button = num_players - 1 - seat
+    return (BTN, CO, MP)[to_button] if to_button < 3 else EP
+
+
+def depth_bucket(effective_bb: float) -> int:
+    for i, edge in enumerate(DEPTH_EDGES):
+        if effective_bb <= edge:
+            return i
+    return len(DEPTH_EDGES)
+
+
+def odds_bucket(to_call: int, pot: int) -> int:
+    if to_call <= 0:
+        return 0
+    odds = to_call / (pot + to_call)
+    for i, edge in enumerate(ODDS_EDGES):
+        if odds <= edge:
+            return i + 1
+    return len(ODDS_EDGES) + 1
+
+
+def _has_draw(cards: Sequence[int], hole: Sequence[int]) -> bool:
+    """A flush draw or an open-ended straight draw that uses a hole card."""
+    suits = [0] * 4
+    for c in cards:
+        suits[c & 3] += 1
+    if any(suits[c & 3] == 4 for c in hole):
+        return True
+    ranks = {c >> 2 for c in cards}
+    hole_ranks = {c >> 2 for c in hole}
+    for low in range(1, 9):  # four in a row with a rank free on both ends: 3456 up to TJQK
+        window = set(range(low, low + 4))
+        if window <= ranks and window & hole_ranks:
+            return True
+    return False
+
+
+def strength_bucket(hole: Sequence[int], board: Sequence[int]) -> int:
+    """Hand-strength bucket of two hole cards on a 3-5 card board, counting only what the hole cards add."""
+    cards = list(hole) + list(board)
+    made = category(evaluate_indices(cards))
+    plays_board = len(board) == 5 and evaluate_indices(board) == evaluate_indices(cards)
+    board_ranks = [c >> 2 for c in board]
+    r1, r2 = hole[0] >> 2, hole[1] >> 2
+    paired = {r for r in (r1, r2) if r in board_ranks}
+    pocket_pair = r1 == r2
+
+    if not plays_board:
+        if made >= FULL_HOUSE and (paired or pocket_pair):
+            return MONSTER
+        if made == FLUSH:
+            return FLUSH_HAND
+        if made == STRAIGHT:
+            return STRAIGHT_HAND
+        if (pocket_pair and r1 in board_ranks) or any(board_ranks.count(r) >= 2 for r in paired):
+            return TRIPS
+        if len(paired) == 2:
+            return TWO_PAIR
+        top = max(board_ranks)
+        if (pocket_pair and r1 > top) or top in paired:
+            return TOP_PAIR
+        if pocket_pair or paired:
+            return WEAK_PAIR
+    if len(board) < 5 and _has_draw(cards, hole):
+        return DRAW
+    return AIR
+
+
+class StrategyTables:
+    """Read-only view of a strategy file. Lookups read single bytes from the mapping."""
+
+    def __init__(self, data):
+        self._data = data
+        if len(data) < _HEADER.size:
+            raise StrategyError("Strategy file is truncated")
+        magic, version, *shape = _HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise StrategyError(f"Unsupported strategy file: {magic!r} version {version}")
+        if tuple(shape) != SHAPE_PREFLOP + SHAPE_POSTFLOP:
+            raise StrategyError(f"Strategy file was built for another abstraction: {shape}")
+        self._postflop = _HEADER.size + _cells(SHAPE_PREFLOP)
+        if len(data) != self._postflop + _cells(SHAPE_POSTFLOP):
+            raise StrategyError("Strategy file has the wrong size")
+
+    @classmethod
+    def open(cls, path: str) -> "StrategyTables":
+        with open(path, "rb") as f:
+            # The mapping stays valid after the file is closed
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def preflop(self, facing: int, pos: int, depth: int, cls: int) -> int:
+        _, positions, depths, classes = SHAPE_PREFLOP
+        return self._data[_HEADER.size + ((facing * positions + pos) * depths + depth) * classes + cls]
+
+    def postflop(self, street: int, odds: int, strength: int) -> int:
+        _, odds_buckets, strengths = SHAPE_POSTFLOP
+        return self._data[self._postflop + (street * odds_buckets + odds) * strengths + strength]
+
+    def lookup(self, key: Tuple[int, ...]) -> int:
+        """The action code for a `Situation.key`."""
+        if key[0] == 0:
+            return self.preflop(*key[1:])
+        return self.postflop(key[0] - 1, *key[1:])
+
+
+def pack_tables(preflop: Sequence[int], postflop: Sequence[int]) -> bytes:
+    """The file format: header, then both tables as row-major bytes."""
+    if len(preflop) != _cells(SHAPE_PREFLOP) or len(postflop) != _cells(SHAPE_POSTFLOP):
+        raise StrategyError("Tables do not match the abstraction's shape")
+    return _HEADER.pack(MAGIC, FORMAT_VERSION, *SHAPE_PREFLOP, *SHAPE_POSTFLOP) + bytes(preflop) + bytes(postflop)
+
+
+_tables: Optional[StrategyTables] = None
+_loaded = False
+
+
+def load_strategy(path: Optional[str] = None) -> Optional[StrategyTables]:
+    """Map the strategy file, once per process; None if it does not exist."""
+    global _tables, _loaded
+    if not _loaded:
+        path = path or STRATEGY_PATH
+        _tables = StrategyTables.open(path) if os.path.exists(path) else None
+        _loaded = True
+    return _tables
+
+
+class Situation(NamedTuple):
+    """The abstraction of a decision, plus what is needed to turn an action code back into an action."""
+    key: Tuple[int, ...]  # (0, facing, position, depth, hand class) preflop; (street, odds, strength) after
+    seat: int
+    raise_to: int
+    facing_bet: bool
+
+
+def situation(state: Any) -> Situation:
+    """Abstract the decision of the player to act."""
+    seat = state.actor_index
+    hole = [_PK_INDEX[c] for c in state.hole_cards[seat]]
+    big_blind = max(state.blinds_or_straddles)
+    top_bet = max(state.bets)
+
+    if state.street_index == 0:
+        mine = state.stacks[seat] + state.bets[seat]
+        others = [s + b for i, (s, b, live) in enumerate(zip(state.stacks, state.bets, state.statuses))
+                  if live and i != seat]
+        effective = min(mine, max(others)) if others else mine
+        key = (0, int(top_bet > big_blind), position(seat, state.player_count),
+               depth_bucket(effective / big_blind), hand_class(*hole))
+        raise_to = int(OPEN_SIZE * big_blind) if top_bet <= big_blind else RERAISE_FACTOR * top_bet
+    else:
+        board = [_PK_INDEX[c] for c in state.get_board_cards(0)]
+        pot = state.total_pot_amount
+        key = (min(state.street_index, 3), odds_bucket(state.checking_or_calling_amount or 0, pot),
+               strength_bucket(hole, board))
+        raise_to = RERAISE_FACTOR * top_bet if top_bet else int(BET_POT_FRACTION * pot)
+    return Situation(key, seat, raise_to, bool(top_bet))
+
+
+def decide(state: Any, tables: StrategyTables) -> Dict[str, Any]:
+    """The table's action for the player to act, as an API action dict."""
+    spot = situation(state)
+    return legal_action(state, spot, tables.lookup(spot.key))
+
+
+def heuristic_action(state: Any, tables: Optional[StrategyTables] = None) -> Dict[str, Any]:
+    """The tables' action if there are tables, else check or call."""
+    if tables is not None:
+        return decide(state, tables)
+    seat = state.actor_index
+    if state.can_check_or_call():
+        amount = state.checking_or_calling_amount
+        if amount:
+            return {"player_seat": seat, "action": "call", "amount": amount}
+        return {"player_seat": seat, "action": "check"}
+    return {"player_seat": seat, "action": "fold"}
+
+
+def legal_action(state: Any, spot: Situation, code: int) -> Dict[str, Any]:
+    """The API action for an action code, adjusted to what the player may do."""
+    seat = spot.seat
+    if code in (RAISE, ALLIN) and state.can_complete_bet_or_raise_to():
+        low = state.min_completion_betting_or_raising_to_amount
+        high = state.max_completion_betting_or_raising_to_amount
+        if code == ALLIN or spot.raise_to >= high:
+            return {"player_seat": seat, "action": "allin"}
+        return {"player_seat": seat, "action": "raise" if spot.facing_bet else "bet",
+                "amount": max(low, spot.raise_to)}
+    if code != FOLD or not state.checking_or_calling_amount:
+        if state.checking_or_calling_amount:
+            return {"player_seat": seat, "action": "call", "amount": state.checking_or_calling_amount}
+        return {"player_seat": seat, "action": "check"}
+    return {"player_seat": seat, "action": "fold"}
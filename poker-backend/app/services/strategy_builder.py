@@ -0,0 +1,164 @@
+"""Offline construction of the strategy tables read by app/services/strategy.py.
+
+Both tables come from heads-up equities against a random hand, estimated with
+NumPy batches of the 7-card evaluator:
+
+- preflop, every starting-hand class is ranked by equity and each position plays
+  the top share of hands (by combos) given in OPEN_RANGE, tighter when facing a
+  raise and all-in or fold when short-stacked;
+- postflop, the equity of every (street, strength bucket) is estimated from
+  random deals and compared with the price of a call in each pot-odds bucket,
+  plus a margin because a player who bets is stronger than a random hand.
+"""
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from app.services.strategy import (
+    ALLIN, BB, BTN, CALL, CO, DEPTH_EDGES, DRAW, EP, FOLD, MP, NUM_CLASSES, ODDS_EDGES, RAISE, RIVER, SB,
+    SHAPE_POSTFLOP, SHAPE_PREFLOP, STRENGTH_NAMES, hand_class, pack_tables, strength_bucket,
+)
+from app.utils.evaluator import evaluate_array
+
+# Share of starting hands (by combos) each position raises first in
+OPEN_RANGE = {EP: 0.13, MP: 0.18, CO: 0.27, BTN: 0.42, SB: 0.36, BB: 0.15}
+COMPLETE_RANGE = 1.4  # the small blind completes up to this multiple of its raising range
+THREE_BET_RANGE = {EP: 0.035, MP: 0.035, CO: 0.04, BTN: 0.05, SB: 0.05, BB: 0.05}
+CALL_RANGE = 0.5  # facing a raise, continue with this share of the opening range...
+BB_CALL_RANGE = 0.25  # ...except the big blind, which closes the action at a discount
+SHOVE_RANGE = 1.1  # short-stacked: all-in with this multiple of the opening range...
+SHOVE_CALL_RANGE = 0.10  # ...and call all-ins (or re-shove) with this share of hands
+DEEP_CALL_FACTOR = 1.2  # deeper stacks call wider for implied odds
+
+VALUE_BET_EQUITY = 0.62  # bet when checked to with at least this equity
+RAISE_EQUITY = 0.80  # raise a bet with at least this equity
+FACING_BET_MARGIN = 0.15  # equity needed over the price of a call, against a betting range
+DRAW_IMPLIED_ODDS = 0.08  # extra equity credited to draws before the river
+
+_COMBOS = 1326
+
+
+def _class_combos() -> Dict[int, List[Tuple[int, int]]]:
+    combos: Dict[int, List[Tuple[int, int]]] = {}
+    for a in range(52):
+        for b in range(a + 1, 52):
+            combos.setdefault(hand_class(a, b), []).append((a, b))
+    return combos
+
+
+def _random_rest(rng: np.random.Generator, dead: np.ndarray, n: int) -> np.ndarray:
+    """For each row of `dead` card ints, `n` distinct cards from the rest of the deck."""
+    keys = rng.random((len(dead), 52))
+    np.put_along_axis(keys, dead, 2.0, axis=1)  # dead cards sort last
+    return np.argsort(keys, axis=1)[:, :n]
+
+
+def _showdown(hero: np.ndarray, villain: np.ndarray, board: np.ndarray) -> np.ndarray:
+    """1 for a win, 0.5 for a split, 0 for a loss, per row."""
+    mine = evaluate_array(np.concatenate([hero, board], axis=1))
+    theirs = evaluate_array(np.concatenate([villain, board], axis=1))
+    return (mine > theirs) + 0.5 * (mine == theirs)
+
+
+def preflop_equities(samples: int, rng: np.random.Generator) -> np.ndarray:
+    """Equity of each of the 169 classes against a random hand."""
+    combos = _class_combos()
+    equities = np.zeros(NUM_CLASSES)
+    for cls, hands in combos.items():
+        hero = np.array(hands, dtype=np.int64)[rng.integers(len(hands), size=samples)]
+        rest = _random_rest(rng, hero, 7)
+        equities[cls] = _showdown(hero, rest[:, :2], rest[:, 2:]).mean()
+    return equities
+
+
+def class_percentiles(equities: np.ndarray) -> np.ndarray:
+    """Share of all combos at least as strong as each class, after sorting by equity."""
+    weight = np.zeros(NUM_CLASSES)
+    for cls, hands in _class_combos().items():
+        weight[cls] = len(hands)
+    order = np.argsort(-equities, kind="stable")
+    percentiles = np.empty(NUM_CLASSES)
+    percentiles[order] = np.cumsum(weight[order]) / _COMBOS
+    return percentiles
+
+
+def preflop_table(percentiles: np.ndarray) -> List[int]:
+    facing_n, positions, depths, classes = SHAPE_PREFLOP
+    table = []
+    for facing in range(facing_n):
+        for pos in range(positions):
+            for depth in range(depths):
+                for cls in range(classes):
+                    table.append(_preflop_action(facing, pos, depth, percentiles[cls]))
+    return table
+
+
+def _preflop_action(facing: int, pos: int, depth: int, p: float) -> int:
+    short, deep = depth == 0, depth == len(DEPTH_EDGES)
+    if not facing:
+        if short:
+            return ALLIN if p <= OPEN_RANGE[pos] * SHOVE_RANGE else FOLD
+        if p <= OPEN_RANGE[pos]:
+            return RAISE
+        if pos == SB and p <= OPEN_RANGE[pos] * COMPLETE_RANGE:
+            return CALL
+        return FOLD  # the big blind checks instead
+    if short:
+        return ALLIN if p <= SHOVE_CALL_RANGE else FOLD
+    if p <= THREE_BET_RANGE[pos]:
+        return ALLIN if depth == 1 else RAISE
+    call = OPEN_RANGE[pos] * (BB_CALL_RANGE if pos == BB else CALL_RANGE) * (DEEP_CALL_FACTOR if deep else 1)
+    return CALL if p <= call else FOLD
+
+
+def postflop_equities(samples: int, rng: np.random.Generator) -> np.ndarray:
+    """Mean equity against a random hand per (street, strength bucket); NaN where a bucket never came up."""
+    streets, _, strengths = SHAPE_POSTFLOP
+    equities = np.full((streets, strengths), np.nan)
+    for street in range(streets):
+        shown = 3 + street
+        deal = _random_rest(rng, np.zeros((samples, 0), dtype=np.int64), 9)
+        hero, board, villain = deal[:, :2], deal[:, 2:7], deal[:, 7:]
+        results = _showdown(hero, villain, board)
+        buckets = np.array([strength_bucket(h, b[:shown]) for h, b in zip(hero.tolist(), board.tolist())])
+        for bucket in range(strengths):
+            hits = buckets == bucket
+            if hits.any():
+                equities[street, bucket] = results[hits].mean()
+    return equities
+
+
+def postflop_table(equities: np.ndarray) -> List[int]:
+    streets, odds_n, strengths = SHAPE_POSTFLOP
+    prices = (0.0,) + ODDS_EDGES + (1.0,)
+    table = []
+    for street in range(streets):
+        for odds in range(odds_n):
+            for bucket in range(strengths):
+                equity = equities[street, bucket]
+                if np.isnan(equity):  # unseen in sampling: play it like the next weaker bucket seen
+                    seen = equities[street, :bucket][~np.isnan(equities[street, :bucket])]
+                    equity = seen[-1] if len(seen) else 0.0
+                table.append(_postflop_action(street, odds, bucket, float(equity), prices[odds]))
+    return table
+
+
+def _postflop_action(street: int, odds: int, bucket: int, equity: float, price: float) -> int:
+    if bucket == DRAW and street != RIVER:
+        equity += DRAW_IMPLIED_ODDS
+    if odds == 0:
+        return RAISE if equity >= VALUE_BET_EQUITY else CALL  # bet or check
+    if equity >= RAISE_EQUITY:
+        return RAISE
+    return CALL if equity >= price + FACING_BET_MARGIN else FOLD
+
+
+def build_tables(preflop_samples: int = 20_000, postflop_samples: int = 100_000, seed: int = 0) -> bytes:
+    """The strategy file's contents. Deterministic for a given seed."""
+    rng = np.random.default_rng(seed)
+    percentiles = class_percentiles(preflop_equities(preflop_samples, rng))
+    return pack_tables(preflop_table(percentiles), postflop_table(postflop_equities(postflop_samples, rng)))
+
+
+def describe_postflop(equities: np.ndarray) -> Dict[str, List[float]]:
+    return {name: [round(float(e), 3) for e in equities[:, i]] for i, name in enumerate(STRENGTH_NAMES)}
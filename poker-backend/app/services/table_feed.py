@@ -0,0 +1,172 @@
+import asyncio
+import json
+import os
+from typing import Any, Dict, Optional, Set
+
+from app.metrics import REGISTRY, Sampled
+from app.models import Hand
+from app.utils.deck import card_list
+
+DEFAULT_QUEUE_SIZE = int(os.getenv("TABLE_FEED_QUEUE", "64"))  # messages buffered per subscriber
+HEARTBEAT_INTERVAL = float(os.getenv("TABLE_FEED_HEARTBEAT", "15"))  # seconds without a message before a ping
+SEND_TIMEOUT = float(os.getenv("TABLE_FEED_SEND_TIMEOUT", "10"))  # seconds a single send may take
+
+PING = json.dumps({"type": "ping"})
+
+
+def table_snapshot(hand: Hand, state: Any = None) -> Dict[str, Any]:
+    """Public view of a table: everything but the hole cards. `state` is the live PokerKit state, if known."""
+    live = state is not None and bool(state.status)
+    return {
+        "handId": hand.id,
+        "players": list(hand.players),
+        "stacks": list(state.stacks) if state is not None else list(hand.stacks),
+        "board": card_list(hand.board or ""),
+        "pot": state.total_pot_amount if state is not None else 0,
+        "currentPlayerIndex": state.actor_index if live else None,
+        "handOver": state is not None and not live,
+        "payoffs": hand.payoffs,
+        "actions": list(hand.action_history),
+    }
+
+
+def table_diff(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """Fields of `new` that changed since `old`; `actions` holds only the actions appended since."""
+    diff = {k: v for k, v in new.items() if k != "actions" and old.get(k) != v}
+    added = new["actions"][len(old["actions"]):]
+    if added:
+        diff["actions"] = added
+    return diff
+
+
+class Subscriber:
+    """One client following a table. Messages are pre-encoded JSON strings."""
+
+    __slots__ = ("hand_id", "queue", "resyncs")
+
+    def __init__(self, hand_id: int, maxsize: int):
+        self.hand_id = hand_id
+        self.queue: "asyncio.Queue[str]" = asyncio.Queue(maxsize)
+        self.resyncs = 0
+
+    async def get(self) -> str:
+        return await self.queue.get()
+
+
+class _Table:
+    __slots__ = ("snapshot", "version", "subscribers")
+
+    def __init__(self):
+        self.snapshot: Optional[Dict[str, Any]] = None
+        self.version = 0
+        self.subscribers: Set[Subscriber] = set()
+
+
+class TableFeed:
+    """Fan-out of table changes to WebSocket subscribers in this process.
+
+    HandService publishes after every committed change; each subscriber gets a
+    full snapshot once and compact diffs after that, all numbered with a per-table
+    version. Tables without subscribers cost nothing. A subscriber whose queue is
+    full (a slow consumer) has its backlog dropped and replaced by one fresh
+    snapshot, so memory per client stays bounded and it never sees a gap.
+    """
+
+    def __init__(self, queue_size: int = DEFAULT_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._tables: Dict[int, _Table] = {}
+        self.published = 0
+        self.resyncs = 0
+
+    def subscribe(self, hand_id: int) -> Subscriber:
+        table = self._tables.setdefault(hand_id, _Table())
+        subscriber = Subscriber(hand_id, self.queue_size)
+        table.subscribers.add(subscriber)
+        if table.snapshot is not None:
+            subscriber.queue.put_nowait(self._snapshot_message(table))
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        table = self._tables.get(subscriber.hand_id)
+        if table is None:
+            return
+        table.subscribers.discard(subscriber)
+        if not table.subscribers:
+            del self._tables[subscriber.hand_id]
+
+    def has_snapshot(self, hand_id: int) -> bool:
+        table = self._tables.get(hand_id)
+        return table is not None and table.snapshot is not None
+
+    def seed(self, hand: Hand, state: Any = None) -> None:
+        """Set the first snapshot of a table that subscribers are waiting on, unless a publish got there first."""
+        table = self._tables.get(hand.id)
+        if table is not None and table.snapshot is None:
+            self._update(table, table_snapshot(hand, state))
+
+    def publish(self, hand: Hand, state: Any = None) -> None:
+        table = self._tables.get(hand.id)
+        if table is not None:
+            self._update(table, table_snapshot(hand, state))
+
+    def subscriber_count(self, hand_id: Optional[int] = None) -> int:
+        if hand_id is not None:
+            table = self._tables.get(hand_id)
+            return len(table.subscribers) if table else 0
+        return sum(len(t.subscribers) for t in self._tables.values())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tables": len(self._tables),
+            "subscribers": self.subscriber_count(),
+            "published": self.published,
+            "resyncs": self.resyncs,
+        }
+
+    def _update(self, table: _Table, snapshot: Dict[str, Any]) -> None:
+        previous = table.snapshot
+        if previous is not None:
+            diff = table_diff(previous, snapshot)
+            if not diff:
+                return
+        table.snapshot = snapshot
+        table.version += 1
+        self.published += 1
+
+        # Encode once per change, not once per subscriber
+        if previous is None:
+            message = self._snapshot_message(table)
+        else:
+            message = json.dumps({"type": "diff", "v": table.version, **diff}, default=str)
+        resync: Optional[str] = None
+        for subscriber in table.subscribers:
+            try:
+                subscriber.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                if resync is None:
+                    resync = self._snapshot_message(table)
+                self._drain(subscriber.queue)
+                subscriber.queue.put_nowait(resync)
+                subscriber.resyncs += 1
+                self.resyncs += 1
+
+    def _snapshot_message(self, table: _Table) -> str:
+        return json.dumps({"type": "snapshot", "v": table.version, "table": table.snapshot}, default=str)
+
+    @staticmethod
+    def _drain(queue: asyncio.Queue) -> None:
+        while not queue.empty():
+            queue.get_nowait()
+
+
+# Shared by every HandService instance and WebSocket in this process
+table_feed = TableFeed()
+
+REGISTRY.register(Sampled(
+    "poker_table_feed_subscribers", "WebSocket clients following a table.", (),
+    lambda: {(): table_feed.subscriber_count()},
+))
+REGISTRY.register(Sampled(
+    "poker_table_feed_resyncs_total", "Snapshots sent to slow subscribers in place of dropped diffs.", (),
+    lambda: {(): table_feed.resyncs}, kind="counter",
+))
@@ -0,0 +1,415 @@
+"""Many continuously running tables in one process.
+
+A table seats the same players hand after hand: the button moves one live seat
+per hand, stacks carry over, and players who bust sit out until the table is
+down to one player (or has played `max_hands`). Each table runs as its own
+asyncio task, driving PokerKit through app/services/engine.py, so a table is
+only ever touched by its own task and needs no locks.
+
+Tables take turns through a Scheduler: before every action a table queues for a
+turn, and the scheduler grants turns first come, first served, at most
+`steps_per_tick` per event-loop pass. Every waiting table acts once before any
+acts twice, and network I/O (DB flushes, model requests, WebSockets) gets the
+loop between passes however many tables there are.
+
+Bots act through HandService (strategy tables or the LLM bot). Human seats wait
+for `submit` up to `action_timeout` seconds, then check or fold. Finished hands
+go to a HandWriter, which COPYs them to Postgres in batches shared by all tables.
+"""
+import asyncio
+import datetime
+import os
+import time
+import uuid
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Optional
+
+from app.metrics import REGISTRY, Sampled
+from app.models import Hand
+from app.services.engine import apply_action, board_str, deal_board, deal_hand, start_state
+from app.services.hand_service import HandService
+
+DEFAULT_STEPS_PER_TICK = int(os.getenv("TABLE_STEPS_PER_TICK", "256"))  # actions per event-loop pass
+DEFAULT_ACTION_TIMEOUT = float(os.getenv("TABLE_ACTION_TIMEOUT", "30"))  # seconds a human seat may think
+DEFAULT_HAND_INTERVAL = float(os.getenv("TABLE_HAND_INTERVAL", "0"))  # seconds between hands at a table
+DEFAULT_WRITE_BATCH = int(os.getenv("TABLE_WRITE_BATCH", "500"))  # hands per COPY
+DEFAULT_WRITE_INTERVAL = float(os.getenv("TABLE_WRITE_INTERVAL", "1"))  # seconds a finished hand may wait
+DEFAULT_MAX_PENDING = int(os.getenv("TABLE_WRITE_MAX_PENDING", "20000"))  # unwritten hands before tables wait
+DEFAULT_MAX_BATCH_FAILURES = int(os.getenv("TABLE_WRITE_MAX_FAILURES", "3"))  # failed COPYs before going row by row
+
+
+class Scheduler:
+    """Round-robin turns for many tasks sharing one event loop."""
+
+    def __init__(self, steps_per_tick: int = DEFAULT_STEPS_PER_TICK):
+        self.steps_per_tick = steps_per_tick
+        self._ready: Deque[asyncio.Future] = deque()
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.steps = 0
+        self.ticks = 0
+
+    async def turn(self) -> None:
+        """Wait until this task's turn comes round."""
+        fut = asyncio.get_running_loop().create_future()
+        self._ready.append(fut)
+        self._wake.set()
+        await fut
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        while self._ready:
+            self._ready.popleft().cancel()
+
+    async def _run(self) -> None:
+        while True:
+            if not self._ready:
+                self._wake.clear()
+                await self._wake.wait()
+            # Granted tasks run on the loop's next pass, and queue again behind everyone already waiting
+            for _ in range(min(len(self._ready), self.steps_per_tick)):
+                fut = self._ready.popleft()
+                if not fut.done():
+                    fut.set_result(None)
+                    self.steps += 1
+            self.ticks += 1
+            await asyncio.sleep(0)
+
+    def waiting(self) -> int:
+        return len(self._ready)
+
+
+class HandWriter:
+    """Buffers finished hands from every table and writes them with HandRepository.bulk_insert_hands.
+
+    A batch goes out when `batch_size` hands are waiting or the oldest has waited
+    `interval` seconds. A failed batch is kept and retried; once `max_pending` hands
+    are waiting, `add` blocks, which slows the tables down to what the DB takes.
+    After `max_failures` failures in a row the batch is written one hand at a time,
+    so a single bad hand cannot hold up the rest: hands that still fail go to
+    `dead_letter` and the writer carries on with the next batch.
+    """
+
+    def __init__(self, repo: Any, batch_size: int = DEFAULT_WRITE_BATCH, interval: float = DEFAULT_WRITE_INTERVAL,
+                 max_pending: int = DEFAULT_MAX_PENDING, max_failures: int = DEFAULT_MAX_BATCH_FAILURES):
+        self.repo = repo
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_pending = max_pending
+        self.max_failures = max_failures
+        self._pending: List[Hand] = []
+        self._full = asyncio.Event()
+        self._drained = asyncio.Event()
+        self._drained.set()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._failures = 0  # consecutive failures of the oldest batch
+        self.dead_letter: List[Hand] = []
+        self.written = 0
+        self.batches = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+
+    async def add(self, hand: Hand) -> None:
+        while len(self._pending) >= self.max_pending:
+            self._drained.clear()
+            await self._drained.wait()
+        self._pending.append(hand)
+        if len(self._pending) >= self.batch_size:
+            self._full.set()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background flushes and write what is left.
+
+        A batch that keeps failing goes out hand by hand after `max_failures` tries,
+        as in the background; raises if that leaves any of them in `dead_letter`.
+        """
+        if self._task is not None:
+            # not cancel(): wait_for in _run can swallow a cancellation that races with _full being set
+            self._stopping = True
+            self._full.set()
+            await self._task
+            self._task = None
+        dead = len(self.dead_letter)
+        while self._pending:
+            # each failure counts towards the batch's hand-by-hand write
+            if not await self.flush():
+                await asyncio.sleep(self.interval)
+        if len(self.dead_letter) > dead:
+            raise RuntimeError(f"{len(self.dead_letter) - dead} hands could not be written: {self.last_error}")
+
+    async def flush(self) -> bool:
+        """Write the oldest batch. False if the write failed; the batch is then kept.
+
+        The batch that has failed `max_failures` times goes out hand by hand instead,
+        and is dropped from the queue whatever happens to its hands.
+        """
+        batch = self._pending[:self.batch_size]
+        if not batch:
+            return True
+        if self._failures >= self.max_failures:
+            await self._write_one_by_one(batch)
+        else:
+            try:
+                await self.repo.bulk_insert_hands(batch, fold_stats=True)
+            except Exception as exc:
+                self.errors += 1
+                self.last_error = repr(exc)
+                self._failures += 1
+                return False
+            self.written += len(batch)
+        self._failures = 0
+        del self._pending[:len(batch)]
+        self.batches += 1
+        if len(self._pending) < self.max_pending:
+            self._drained.set()
+        return True
+
+    async def _write_one_by_one(self, batch: List[Hand]) -> None:
+        for hand in batch:
+            try:
+                await self.repo.bulk_insert_hands([hand], fold_stats=True)
+            except Exception as exc:
+                self.errors += 1
+                self.last_error = repr(exc)
+                self.dead_letter.append(hand)
+            else:
+                self.written += 1
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._full.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._full.clear()
+            # Full batches go out back to back; after a failure, wait for the next interval
+            while await self.flush() and len(self._pending) >= self.batch_size:
+                pass
+
+    def pending(self) -> int:
+        return len(self._pending)
+
+
+class Table:
+    """Seats, stacks and button of one table between hands. Seats in `humans` act through `submit`."""
+
+    def __init__(self, table_id: int, players: List[str], stacks: List[int], big_blind: int = 40,
+                 humans: Iterable[int] = (), max_hands: Optional[int] = None, seed: Optional[int] = None):
+        if len(players) != len(stacks) or len(players) < 2:
+            raise ValueError("A table needs at least two players, each with a stack")
+        self.id = table_id
+        self.players = list(players)
+        self.stacks = list(stacks)
+        self.big_blind = big_blind
+        self.max_hands = max_hands
+        self.seed = seed
+        self.button = len(players) - 1  # moves to seat 0 before the first hand
+        self.hands_played = 0
+        self.inbox: Dict[int, "asyncio.Queue[Dict[str, Any]]"] = {seat: asyncio.Queue() for seat in humans}
+        self.timeouts = 0
+        self.finished = False
+
+    def live_seats(self) -> List[int]:
+        return [seat for seat, stack in enumerate(self.stacks) if stack > 0]
+
+    def done(self) -> bool:
+        return len(self.live_seats()) < 2 or (self.max_hands is not None and self.hands_played >= self.max_hands)
+
+    def next_hand_seats(self) -> List[int]:
+        """Move the button to the next live seat; return the live seats in PokerKit order, small blind first."""
+        live = self.live_seats()
+        self.button = next((s for s in live if s > self.button), live[0])
+        start = live.index(self.button) + 1
+        return live[start:] + live[:start]
+
+    def submit(self, seat: int, action: Dict[str, Any]) -> None:
+        if seat not in self.inbox:
+            raise ValueError(f"Seat {seat} at table {self.id} is not a human seat")
+        self.inbox[seat].put_nowait(action)
+
+
+class TableManager:
+    """Opens tables, runs each as a task under one Scheduler, and writes their hands through one HandWriter."""
+
+    def __init__(self, service: Optional[HandService] = None, writer: Optional[HandWriter] = None,
+                 scheduler: Optional[Scheduler] = None, action_timeout: float = DEFAULT_ACTION_TIMEOUT,
+                 hand_interval: float = DEFAULT_HAND_INTERVAL):
+        self.service = service if service is not None else HandService(None)
+        self.writer = writer  # None: hands are played but not stored
+        self.scheduler = scheduler if scheduler is not None else Scheduler()
+        self.action_timeout = action_timeout
+        self.hand_interval = hand_interval
+        self.tables: Dict[int, Table] = {}
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._next_id = 1
+        self.hands = 0
+        self.actions = 0
+        self.started_at: Optional[float] = None
+
+    async def start(self) -> None:
+        self.started_at = time.perf_counter()
+        self.scheduler.start()
+        if self.writer is not None:
+            self.writer.start()
+        _managers.add(self)
+
+    def open_table(self, players: List[str], stacks: List[int], big_blind: int = 40, humans: Iterable[int] = (),
+                   max_hands: Optional[int] = None, seed: Optional[int] = None) -> Table:
+        table = Table(self._next_id, players, stacks, big_blind, humans, max_hands, seed)
+        self._next_id += 1
+        self.tables[table.id] = table
+        self._tasks[table.id] = asyncio.ensure_future(self._run_table(table))
+        return table
+
+    def submit(self, table_id: int, seat: int, action: Dict[str, Any]) -> None:
+        table = self.tables.get(table_id)
+        if table is None:
+            raise ValueError("Table not found")
+        table.submit(seat, action)
+
+    async def wait(self) -> None:
+        """Until every open table has finished; a table's error is raised here."""
+        await asyncio.gather(*self._tasks.values())
+
+    async def stop(self) -> None:
+        """Cancel the tables still playing, then write every finished hand."""
+        for task in self._tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        await self.scheduler.stop()
+        if self.writer is not None:
+            await self.writer.stop()
+        _managers.discard(self)
+
+    def running(self) -> int:
+        return sum(not t.done() for t in self._tasks.values())
+
+    def stats(self) -> Dict[str, Any]:
+        elapsed = time.perf_counter() - self.started_at if self.started_at else 0.0
+        return {
+            "tables": len(self.tables),
+            "running": self.running(),
+            "hands": self.hands,
+            "actions": self.actions,
+            "timeouts": sum(t.timeouts for t in self.tables.values()),
+            "seconds": elapsed,
+            "hands_per_sec": self.hands / elapsed if elapsed else 0.0,
+            "scheduler": {"steps": self.scheduler.steps, "ticks": self.scheduler.ticks,
+                          "waiting": self.scheduler.waiting()},
+            "writer": None if self.writer is None else {
+                "written": self.writer.written, "batches": self.writer.batches, "pending": self.writer.pending(),
+                "errors": self.writer.errors, "last_error": self.writer.last_error,
+                "dead_letter": len(self.writer.dead_letter),
+            },
+        }
+
+    async def _run_table(self, table: Table) -> None:
+        try:
+            while not table.done():
+                hand = await self._play_hand(table)
+                self.hands += 1
+                if self.writer is not None:
+                    await self.writer.add(hand)
+                if self.hand_interval:
+                    await asyncio.sleep(self.hand_interval)
+        finally:
+            table.finished = True
+
+    async def _play_hand(self, table: Table) -> Hand:
+        svc = self.service
+        seats = table.next_hand_seats()
+        n = len(seats)
+        starting = [table.stacks[s] for s in seats]
+        seed = None if table.seed is None else table.seed * 1_000_003 + table.hands_played
+        hole_cards, board = deal_hand(n, seed)
+        state = start_state(n, starting, table.big_blind, hole_cards, board)
+
+        actions: List[Dict[str, Any]] = []
+        while state.status:
+            await self.scheduler.turn()
+            seat = seats[state.actor_index]
+            if seat in table.inbox:
+                action = await self._human_action(table, seat, state)
+            else:
+                action = await svc.bot_action(state)
+            action["street"] = state.street_index
+            apply_action(state, action["player_seat"], action["action"], action.get("amount"))
+            action["ts"] = datetime.datetime.utcnow().isoformat()
+            actions.append(action)
+            deal_board(state, board)
+        self.actions += len(actions)
+
+        for i, seat in enumerate(seats):
+            table.stacks[seat] = state.stacks[i]
+        table.hands_played += 1
+        return Hand(
+            id=None, uuid=str(uuid.uuid4()), players=[table.players[s] for s in seats], stacks=list(state.stacks),
+            starting_stacks=starting, dealer=n - 1, sb=1 if n == 2 else 0, bb=0 if n == 2 else 1,
+            big_blind=table.big_blind, hole_cards=hole_cards, board=board_str(state), action_history=actions,
+            payoffs=dict(enumerate(state.payoffs)), created_at=datetime.datetime.now(datetime.timezone.utc),
+        )
+
+    async def _human_action(self, table: Table, seat: int, state: Any) -> Dict[str, Any]:
+        """The seat's next submitted action if it is legal, else check or fold once the timeout runs out."""
+        deadline = time.monotonic() + self.action_timeout
+        while True:
+            try:
+                action = await asyncio.wait_for(table.inbox[seat].get(), max(0.0, deadline - time.monotonic()))
+            except asyncio.TimeoutError:
+                table.timeouts += 1
+                act = "check" if state.can_check_or_call() and not state.checking_or_calling_amount else "fold"
+                return {"player_seat": state.actor_index, "action": act, "timeout": True}
+            action = dict(action, player_seat=state.actor_index)
+            try:
+                _check_legal(state, action)
+            except ValueError:
+                continue  # ignore it and keep waiting
+            return action
+
+
+def _check_legal(state: Any, action: Dict[str, Any]) -> None:
+    act, amount = action.get("action"), action.get("amount")
+    if act == "fold" and state.can_fold():
+        return
+    if act in ("check", "call") and state.can_check_or_call():
+        return
+    if act == "allin" and state.can_complete_bet_or_raise_to():
+        return
+    if act in ("bet", "raise") and amount is not None and state.can_complete_bet_or_raise_to(amount):
+        return
+    raise ValueError(f"Illegal action: {action}")
+
+
+_managers: "set[TableManager]" = set()
+
+REGISTRY.register(Sampled(
+    "poker_tables_running", "Tables playing in this process.", (),
+    lambda: {(): sum(m.running() for m in _managers)},
+))
+REGISTRY.register(Sampled(
+    "poker_table_hands_total", "Hands finished by the table manager.", (),
+    lambda: {(): sum(m.hands for m in _managers)}, kind="counter",
+))
+REGISTRY.register(Sampled(
+    "poker_table_write_pending", "Finished hands waiting for a batched write.", (),
+    lambda: {(): sum(m.writer.pending() for m in _managers if m.writer is not None)},
+))
+REGISTRY.register(Sampled(
+    "poker_table_write_dead_letter", "Finished hands given up on after their batch kept failing.", (),
+    lambda: {(): sum(len(m.writer.dead_letter) for m in _managers if m.writer is not None)},
+))
@@ -0,0 +1,114 @@
+"""Headless bot-vs-bot self-play, without FastAPI or Postgres.
+
+    poetry run simulate --hands 1000000 --players 6 --workers 8 --seed 1
+
+Each hand is dealt from Deck.shuffled(seed * HAND_SEED_STRIDE + hand_number), so a
+run is reproducible for a given seed regardless of how it is sharded.
+"""
+import argparse
+import json
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from app.services.engine import apply_action, deal_board, deal_hand, start_state
+from app.services.strategy import StrategyTables, heuristic_action, load_strategy
+
+HAND_SEED_STRIDE = 1_000_000_007
+
+
+def play_hand(strategy: Optional[StrategyTables], num_players: int, stacks: List[int], big_blind: int,
+              seed: int) -> Dict[str, Any]:
+    """Play one complete hand between bots and return its payoffs and actions."""
+    hole_cards, board = deal_hand(num_players, seed)
+    state = start_state(num_players, stacks, big_blind, hole_cards, board)
+
+    actions = []
+    while state.status:
+        bot_action = heuristic_action(state, strategy)
+        apply_action(state, bot_action["player_seat"], bot_action["action"], bot_action.get("amount"))
+        actions.append(bot_action["action"])
+        deal_board(state, board)
+    return {"payoffs": list(state.payoffs), "actions": actions}
+
+
+def simulate_shard(start: int, count: int, num_players: int, stack: int, big_blind: int, seed: int) -> Dict[str, Any]:
+    """Play hands start..start+count-1 and return aggregated counters."""
+    strategy = load_strategy()  # the bots are always the tables, whatever BOT_BACKEND says
+    stacks = [stack] * num_players
+    actions: Counter = Counter()
+    winnings = [0] * num_players
+    for hand_number in range(start, start + count):
+        result = play_hand(strategy, num_players, stacks, big_blind, seed * HAND_SEED_STRIDE + hand_number)
+        actions.update(result["actions"])
+        for seat, payoff in enumerate(result["payoffs"]):
+            winnings[seat] += payoff
+    return {"hands": count, "actions": dict(actions), "winnings": winnings}
+
+
+def simulate(hands: int, num_players: int = 6, stack: int = 4000, big_blind: int = 40,
+             workers: int = 1, seed: int = 0) -> Dict[str, Any]:
+    """Run `hands` hands sharded across `workers` processes and return the merged report."""
+    workers = max(1, min(workers, hands))
+    shard = -(-hands // workers)
+    jobs = [(start, min(shard, hands - start), num_players, stack, big_blind, seed)
+            for start in range(0, hands, shard)]
+
+    started = time.perf_counter()
+    if workers == 1:
+        results = [simulate_shard(*job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(simulate_shard, *zip(*jobs)))
+    elapsed = time.perf_counter() - started
+
+    actions: Counter = Counter()
+    winnings = [0] * num_players
+    for result in results:
+        actions.update(result["actions"])
+        winnings = [w + r for w, r in zip(winnings, result["winnings"])]
+    total_actions = sum(actions.values())
+    return {
+        "hands": hands,
+        "workers": workers,
+        "seed": seed,
+        "seconds": elapsed,
+        "hands_per_sec": hands / elapsed if elapsed else 0.0,
+        "actions": {a: {"count": n, "share": n / total_actions} for a, n in sorted(actions.items())},
+        "seats": [
+            {"seat": seat, "chips": w, "chips_per_hand": w / hands, "bb_per_100": 100 * w / hands / big_blind}
+            for seat, w in enumerate(winnings)
+        ],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hands", type=int, default=100_000)
+    parser.add_argument("--players", type=int, default=6)
+    parser.add_argument("--stack", type=int, default=4000)
+    parser.add_argument("--big-blind", type=int, default=40)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    report = simulate(args.hands, args.players, args.stack, args.big_blind, args.workers, args.seed)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{report['hands']:,} hands on {report['workers']} workers in {report['seconds']:.1f}s "
+          f"({report['hands_per_sec']:,.0f} hands/s)")
+    print("actions:")
+    for action, stats in report["actions"].items():
+        print(f"  {action:<6} {stats['count']:>12,}  {stats['share']:6.1%}")
+    print("chip EV per seat:")
+    for seat in report["seats"]:
+        print(f"  seat {seat['seat']}  {seat['chips_per_hand']:+9.2f} chips/hand  {seat['bb_per_100']:+8.2f} bb/100")
+
+
+if __name__ == "__main__":
+    main()
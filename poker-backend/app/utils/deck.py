@@ -1,5 +1,6 @@
 import random
-from typing import List
+from array import array
+from typing import Dict, Iterable, List, Optional, Sequence, Union
 
 RANKS = "23456789TJQKA"
 SUITS = "cdhs"
@@ -7,6 +8,88 @@ SUITS = "cdhs"
 def make_deck():
     return [r+s for r in RANKS for s in SUITS]
 
+# Cards as ints 0..51 in make_deck() order: rank index * 4 + suit index.
+# Card sets are 64-bit masks with bit `card` set. Strings are for the API edge only.
+CARDS: List[str] = make_deck()
+CARD_INDEX: Dict[str, int] = {card: i for i, card in enumerate(CARDS)}
+FULL_MASK = (1 << len(CARDS)) - 1
+
+Card = Union[int, str]
+
+def parse_cards(cards: Union[str, bytes, Iterable[Card]]) -> List[int]:
+    """Convert "AhKd", ["Ah", "Kd"], encoded bytes or ints into card ints."""
+    if isinstance(cards, str):
+        return [CARD_INDEX[cards[i:i + 2]] for i in range(0, len(cards), 2)]
+    if isinstance(cards, (bytes, bytearray, memoryview, array)):
+        return list(cards)
+    return [c if isinstance(c, int) else CARD_INDEX[c] for c in cards]
+
+def cards_to_str(cards: Iterable[int]) -> str:
+    return "".join([CARDS[c] for c in cards])
+
+def card_list(cards: Union[str, bytes, Iterable[Card]]) -> List[str]:
+    """["Ah", "Kd"] for any card representation; the shape API clients get."""
+    return [CARDS[c] for c in parse_cards(cards)]
+
+def encode_cards(cards: Union[str, Iterable[Card]]) -> bytes:
+    """One byte per card, for the compact `*_bin` columns."""
+    return bytes(parse_cards(cards))
+
+def decode_cards(data: bytes) -> str:
+    return cards_to_str(data)
+
+def cards_mask(cards: Iterable[int]) -> int:
+    mask = 0
+    for c in cards:
+        mask |= 1 << c
+    return mask
+
+def mask_cards(mask: int) -> List[int]:
+    cards = []
+    while mask:
+        low = mask & -mask
+        cards.append(low.bit_length() - 1)
+        mask ^= low
+    return cards
+
+class Deck:
+    """Array-backed deck of card ints; shuffles in place and deals by moving a cursor."""
+
+    __slots__ = ("cards", "pos")
+
+    def __init__(self, cards: Optional[Sequence[int]] = None):
+        self.cards = array("B", range(len(CARDS)) if cards is None else cards)
+        self.pos = 0
+
+    @classmethod
+    def shuffled(cls, seed: int | None = None, exclude_mask: int = 0) -> "Deck":
+        deck = cls(mask_cards(FULL_MASK & ~exclude_mask) if exclude_mask else None)
+        deck.shuffle(seed)
+        return deck
+
+    def shuffle(self, seed: int | None = None) -> None:
+        if seed is not None:
+            random.Random(seed).shuffle(self.cards)
+        else:
+            random.shuffle(self.cards)
+        self.pos = 0
+
+    def deal(self, n: int) -> array:
+        if self.pos + n > len(self.cards):
+            raise ValueError("Not enough cards left in the deck")
+        dealt = self.cards[self.pos:self.pos + n]
+        self.pos += n
+        return dealt
+
+    def deal_hole_cards(self, num_players: int) -> List[array]:
+        return [self.deal(2) for _ in range(num_players)]
+
+    def remaining(self) -> array:
+        return self.cards[self.pos:]
+
+    def __len__(self) -> int:
+        return len(self.cards) - self.pos
+
 def shuffle_deck(seed: int | None = None):
     deck = make_deck()
     if seed is not None:
@@ -0,0 +1,200 @@
+"""Fast 5-, 6- and 7-card high hand evaluator.
+
+Cards are ints 0..51 in `make_deck()` order (rank index * 4 + suit index, using
+RANKS/SUITS from app/utils/deck.py); strings like "Ah" are accepted as well.
+
+Scores are ints where a higher score is a better hand. The hand category sits in
+bits 20+ and the five deciding ranks in 4-bit nibbles below it, so scores from
+any hand size compare directly.
+
+Evaluation is two additions per card plus one table lookup:
+- suit counts are summed into 4-bit nibbles that start at 3, so a nibble reaches
+  8 (its top bit) exactly when that suit has five or more cards (a flush);
+- rank counts are summed into 3-bit fields, which gives a perfect hash of the
+  rank multiset into a precomputed table of every non-flush hand;
+- flushes are looked up by the 13-bit rank mask of the flush suit.
+"""
+from itertools import combinations
+from typing import Dict, Iterable, List, Sequence, Union
+
+import numpy as np
+
+from app.utils.deck import RANKS, SUITS, Card, parse_cards
+
+HIGH_CARD, PAIR, TWO_PAIR, TRIPS, STRAIGHT, FLUSH, FULL_HOUSE, QUADS, STRAIGHT_FLUSH = range(9)
+CATEGORY_NAMES = (
+    "High Card", "One Pair", "Two Pair", "Three of a Kind", "Straight",
+    "Flush", "Full House", "Four of a Kind", "Straight Flush",
+)
+
+_RANK_INC = [1 << (3 * (i // len(SUITS))) for i in range(52)]
+_SUIT_INC = [1 << (4 * (i % len(SUITS))) for i in range(52)]
+_RANK_BIT = [1 << (i // len(SUITS)) for i in range(52)]
+_SUIT_START = 0x3333
+_FLUSH_BITS = 0x8888
+_FLUSH_SUIT = {0x8 << (4 * s): s for s in range(len(SUITS))}
+
+
+def _score(category: int, ranks: Sequence[int]) -> int:
+    score = category
+    for i in range(5):
+        score = (score << 4) | (ranks[i] if i < len(ranks) else 0)
+    return score
+
+
+def _straight_high(mask: int) -> int:
+    """Highest rank of a straight in a 13-bit rank mask, or -1."""
+    for high in range(len(RANKS) - 1, 3, -1):
+        window = 0b11111 << (high - 4)
+        if mask & window == window:
+            return high
+    wheel = (1 << 12) | 0b1111  # A-2-3-4-5
+    return 3 if mask & wheel == wheel else -1
+
+
+def _top_ranks(mask: int, n: int) -> List[int]:
+    return [r for r in range(len(RANKS) - 1, -1, -1) if mask >> r & 1][:n]
+
+
+def _build_flush_table() -> List[int]:
+    table = [0] * (1 << len(RANKS))
+    for mask in range(1 << len(RANKS)):
+        if bin(mask).count("1") < 5:
+            continue
+        high = _straight_high(mask)
+        table[mask] = _score(STRAIGHT_FLUSH, [high]) if high >= 0 else _score(FLUSH, _top_ranks(mask, 5))
+    return table
+
+
+def _rank_multiset_score(counts: Sequence[int]) -> int:
+    by_count = sorted(((c, r) for r, c in enumerate(counts) if c), reverse=True)
+    mask = sum(1 << r for r, c in enumerate(counts) if c)
+    best_count, best_rank = by_count[0]
+
+    def kickers(exclude, n):
+        return [r for r in range(len(RANKS) - 1, -1, -1) if counts[r] and r not in exclude][:n]
+
+    if best_count == 4:
+        return _score(QUADS, [best_rank] + kickers({best_rank}, 1))
+    if best_count == 3 and by_count[1][0] >= 2:
+        return _score(FULL_HOUSE, [best_rank, by_count[1][1]])
+    high = _straight_high(mask)
+    if high >= 0:
+        return _score(STRAIGHT, [high])
+    if best_count == 3:
+        return _score(TRIPS, [best_rank] + kickers({best_rank}, 2))
+    if best_count == 2 and by_count[1][0] == 2:
+        pairs = [best_rank, by_count[1][1]]
+        return _score(TWO_PAIR, pairs + kickers(set(pairs), 1))
+    if best_count == 2:
+        return _score(PAIR, [best_rank] + kickers({best_rank}, 3))
+    return _score(HIGH_CARD, _top_ranks(mask, 5))
+
+
+def _build_rank_table() -> Dict[int, int]:
+    table: Dict[int, int] = {}
+    counts = [0] * len(RANKS)
+
+    def walk(rank: int, remaining: int, key: int, size: int):
+        # Visit every multiset of up to 7 ranks exactly once, scoring those of 5+ cards
+        if rank == len(RANKS):
+            if size >= 5:
+                table[key] = _rank_multiset_score(counts)
+            return
+        for c in range(min(len(SUITS), remaining) + 1):
+            counts[rank] = c
+            walk(rank + 1, remaining - c, key + (c << (3 * rank)), size + c)
+        counts[rank] = 0
+
+    walk(0, 7, 0, 0)
+    return table
+
+
+_FLUSH_TABLE = _build_flush_table()
+_RANK_TABLE = _build_rank_table()
+
+# NumPy views of the same tables for evaluate_array; rank keys are sorted so
+# searchsorted maps a key to its score without a Python-level dict lookup
+_NP_RANK_INC = np.array(_RANK_INC, dtype=np.int64)
+_NP_SUIT_INC = np.array(_SUIT_INC, dtype=np.int64)
+_NP_RANK_BIT = np.array(_RANK_BIT, dtype=np.int64)
+_NP_FLUSH_TABLE = np.array(_FLUSH_TABLE, dtype=np.int64)
+_NP_RANK_KEYS = np.array(sorted(_RANK_TABLE), dtype=np.int64)
+_NP_RANK_SCORES = np.array([_RANK_TABLE[k] for k in _NP_RANK_KEYS.tolist()], dtype=np.int64)
+
+
+def evaluate(cards: Union[str, Iterable[Card]]) -> int:
+    """Score a 5-, 6- or 7-card hand. Higher is better."""
+    return evaluate_indices(parse_cards(cards))
+
+
+def evaluate_indices(cards: Sequence[int]) -> int:
+    """Score a hand given as card ints (the hot path, no parsing)."""
+    suits = _SUIT_START
+    ranks = 0
+    for c in cards:
+        suits += _SUIT_INC[c]
+        ranks += _RANK_INC[c]
+    if suits & _FLUSH_BITS:
+        suit = _FLUSH_SUIT[suits & _FLUSH_BITS]
+        mask = 0
+        for c in cards:
+            if c & 3 == suit:
+                mask |= _RANK_BIT[c]
+        return _FLUSH_TABLE[mask]
+    return _RANK_TABLE[ranks]
+
+
+def evaluate_batch(hands: Iterable[Sequence[int]]) -> List[int]:
+    """Score many hands of card ints in one call."""
+    suit_inc, rank_inc, rank_bit = _SUIT_INC, _RANK_INC, _RANK_BIT
+    flush_table, rank_table, flush_suit = _FLUSH_TABLE, _RANK_TABLE, _FLUSH_SUIT
+    scores = []
+    append = scores.append
+    for cards in hands:
+        suits = _SUIT_START
+        ranks = 0
+        for c in cards:
+            suits += suit_inc[c]
+            ranks += rank_inc[c]
+        if suits & _FLUSH_BITS:
+            suit = flush_suit[suits & _FLUSH_BITS]
+            mask = 0
+            for c in cards:
+                if c & 3 == suit:
+                    mask |= rank_bit[c]
+            append(flush_table[mask])
+        else:
+            append(rank_table[ranks])
+    return scores
+
+
+def evaluate_array(cards: np.ndarray) -> np.ndarray:
+    """Score an (N, 5..7) array of card ints at once; returns an int64 array of N scores."""
+    cards = np.asarray(cards, dtype=np.int64)
+    suits = _SUIT_START + _NP_SUIT_INC[cards].sum(axis=1)
+    scores = _NP_RANK_SCORES[np.searchsorted(_NP_RANK_KEYS, _NP_RANK_INC[cards].sum(axis=1))]
+    flush_bits = suits & _FLUSH_BITS
+    flush = flush_bits != 0
+    if flush.any():
+        fcards = cards[flush]
+        suit = np.zeros(len(fcards), dtype=np.int64)
+        for bits, s in _FLUSH_SUIT.items():
+            suit[flush_bits[flush] == bits] = s
+        # Cards of one suit have distinct ranks, so summing rank bits is an OR
+        mask = np.where((fcards & 3) == suit[:, None], _NP_RANK_BIT[fcards], 0).sum(axis=1)
+        scores[flush] = _NP_FLUSH_TABLE[mask]
+    return scores
+
+
+def category(score: int) -> int:
+    return score >> 20
+
+
+def describe(score: int) -> str:
+    return CATEGORY_NAMES[category(score)]
+
+
+def best_five(cards: Union[str, Iterable[Card]]) -> List[int]:
+    """The five cards making the best hand (slow; for display and audits)."""
+    return list(max(combinations(parse_cards(cards), 5), key=evaluate_indices))
@@ -0,0 +1,50 @@
+"""Compare app.utils.evaluator with pokerkit's hand evaluation, in hands per second.
+
+    python -m benchmarks.bench_evaluator --hands 200000 --size 7
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+from pokerkit import StandardHighHand
+
+from app.utils import evaluator
+from app.utils.deck import make_deck
+
+
+def _rate(n: int, fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return n / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hands", type=int, default=200_000)
+    parser.add_argument("--pokerkit-hands", type=int, default=5_000, help="pokerkit is much slower; use fewer hands")
+    parser.add_argument("--size", type=int, default=7, choices=(5, 6, 7))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    hands = [rng.sample(range(52), args.size) for _ in range(args.hands)]
+    deck = make_deck()
+    strings = ["".join(deck[c] for c in h) for h in hands[:args.pokerkit_hands]]
+
+    array = np.array(hands)
+    results = {
+        "evaluator.evaluate_array": _rate(len(hands), lambda: evaluator.evaluate_array(array)),
+        "evaluator.evaluate_batch": _rate(len(hands), lambda: evaluator.evaluate_batch(hands)),
+        "evaluator.evaluate_indices": _rate(len(hands), lambda: [evaluator.evaluate_indices(h) for h in hands]),
+        "evaluator.evaluate (strings)": _rate(len(strings), lambda: [evaluator.evaluate(s) for s in strings]),
+        "pokerkit StandardHighHand": _rate(len(strings), lambda: [StandardHighHand.from_game(s) for s in strings]),
+    }
+    baseline = results["pokerkit StandardHighHand"]
+    print(f"{args.size}-card hands")
+    for name, rate in results.items():
+        print(f"{name:<30} {rate:>14,.0f} hands/s  {rate / baseline:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
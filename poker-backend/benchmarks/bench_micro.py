@@ -0,0 +1,134 @@
+"""Micro-benchmarks for the hand hot path, with a p50/p95/p99 report.
+
+    python -m benchmarks.bench_micro --iterations 20000 --out micro.json
+    python -m benchmarks.bench_micro --out micro-new.json --baseline micro.json
+
+Exits with status 1 when --baseline is given and a benchmark's p95 or throughput
+regressed by more than --tolerance.
+"""
+import argparse
+import asyncio
+import random
+import time
+from dataclasses import asdict
+from typing import Callable, Dict, List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.db.connection import _jsonb_decode, _jsonb_encode
+from app.repository.hand_repository import HandRepository
+from app.schemas import HandResponse
+from app.serialization import encoder_for
+from app.services.engine import create_state
+from app.services.hand_registry import LiveHandRegistry
+from app.services.hand_service import HandService
+from app.utils.deck import Deck, cards_to_str, deal_hole_cards, encode_cards, make_deck, shuffle_deck
+from benchmarks.memory_repo import MemoryHandRepository
+from benchmarks.report import DEFAULT_TOLERANCE, finish, summarize
+
+
+def time_calls(fn: Callable[[], object], n: int) -> List[float]:
+    samples = []
+    clock = time.perf_counter
+    for _ in range(n):
+        start = clock()
+        fn()
+        samples.append(clock() - start)
+    return samples
+
+
+async def time_submit_action(hands: int, players: int, stack: int, big_blind: int) -> List[float]:
+    """Duration of each submit_action call (user action plus the bot loop) over `hands` full hands."""
+    repo = MemoryHandRepository()
+    svc = HandService(repo, LiveHandRegistry())
+    samples = []
+    clock = time.perf_counter
+    for _ in range(hands):
+        hand = await svc.start_hand([f"p{i}" for i in range(players)], [stack] * players, big_blind=big_blind)
+        while hand.payoffs is None:
+            start = clock()
+            hand = await svc.submit_action(hand.id, {"player_seat": 0, "action": "call"})
+            samples.append(clock() - start)
+    return samples
+
+
+def stored_row(players: int, actions: int, seed: int = 0) -> Dict[str, object]:
+    """A hands row as asyncpg returns it (jsonb decoded by the pool's codecs, cards as bytea)."""
+    deck = Deck.shuffled(seed)
+    return {
+        "id": 1, "uuid": "bench", "dealer": 0, "sb": 1, "bb": 2, "big_blind": 40,
+        "players": [f"p{i}" for i in range(players)],
+        "stacks": [1000] * players,
+        "starting_stacks": [1000] * players,
+        "hole_cards_bin": bytes(deck.deal(2 * players)),
+        "board_bin": encode_cards(deck.deal(5)),
+        "action_history": [
+            {"player_seat": i % players, "action": "call", "amount": 40, "street": i // players,
+             "ts": "2024-01-01T00:00:00"}
+            for i in range(actions)
+        ],
+        "payoffs": {str(i): 0 for i in range(players)},
+        "created_at": None,
+    }
+
+
+def default_encode(hand) -> bytes:
+    """What FastAPI does with a Hand returned under response_model=HandResponse."""
+    return JSONResponse(jsonable_encoder(HandResponse(**asdict(hand)))).body
+
+
+def run(iterations: int, hands: int, players: int, stack: int, big_blind: int, seed: int) -> Dict[str, Dict]:
+    random.seed(seed)
+    svc = HandService(None, LiveHandRegistry())
+    repo = HandRepository(None)
+    shuffled = shuffle_deck(seed)
+    row = stored_row(players, 4 * players, seed)
+    actions_wire = _jsonb_encode(row["action_history"])
+    hand = repo._row_to_hand(row)
+    hand_encoder = encoder_for(HandResponse)
+    stacks = [stack] * players
+    preflop = create_state(players, stacks, big_blind)
+    for cards in Deck.shuffled(seed).deal_hole_cards(players):
+        preflop.deal_hole(cards_to_str(cards))
+
+    results = {
+        "deck.make_deck": summarize(time_calls(make_deck, iterations)),
+        "deck.shuffle_deck": summarize(time_calls(shuffle_deck, iterations)),
+        "deck.deal_hole_cards": summarize(time_calls(lambda: deal_hole_cards(shuffled, players), iterations)),
+        "Deck.shuffled+deal_hole_cards": summarize(
+            time_calls(lambda: Deck.shuffled().deal_hole_cards(players), iterations)),
+        "engine.create_state": summarize(
+            time_calls(lambda: create_state(players, stacks, big_blind), iterations)),
+        "jsonb decode (action_history)": summarize(time_calls(lambda: _jsonb_decode(actions_wire), iterations)),
+        "HandService.choose_bot_action": summarize(
+            time_calls(lambda: svc.choose_bot_action(preflop), iterations)),
+        "HandRepository._row_to_hand": summarize(time_calls(lambda: repo._row_to_hand(row), iterations)),
+        "HandResponse default encode": summarize(time_calls(lambda: default_encode(hand), iterations)),
+        "HandResponse fast encode": summarize(time_calls(lambda: hand_encoder.encode(hand), iterations)),
+    }
+    results["HandService.submit_action"] = summarize(
+        asyncio.run(time_submit_action(hands, players, stack, big_blind)))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20_000, help="calls per synchronous benchmark")
+    parser.add_argument("--hands", type=int, default=300, help="full hands played for the submit_action benchmark")
+    parser.add_argument("--players", type=int, default=6)
+    parser.add_argument("--stack", type=int, default=4000)
+    parser.add_argument("--big-blind", type=int, default=40)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="write the JSON report here")
+    parser.add_argument("--baseline", help="compare against this earlier JSON report")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+
+    config = {k: getattr(args, k) for k in ("iterations", "hands", "players", "stack", "big_blind", "seed")}
+    results = run(args.iterations, args.hands, args.players, args.stack, args.big_blind, args.seed)
+    raise SystemExit(finish("micro", config, results, args.out, args.baseline, args.tolerance))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""In-memory stand-in for HandRepository, so benchmarks can measure the app without Postgres."""
+import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.models import Hand
+from app.repository.hand_repository import HandUnitOfWork
+
+
+class MemoryHandRepository:
+    """Implements the HandRepository methods HandService and the routes use, backed by a dict."""
+
+    def __init__(self):
+        self.hands: Dict[int, Hand] = {}
+        self.live_states: Dict[int, Optional[bytes]] = {}
+        self.keyed_actions: Dict[Tuple[int, str], Dict[str, Any]] = {}
+        self._next_id = 1
+
+    async def create_hand(self, uuid: str, players: List[str], stacks: List[int], dealer: int, sb: int, bb: int,
+                          big_blind: int, hole_cards: Optional[Dict[str, Any]] = None) -> Hand:
+        hand = Hand(id=self._next_id, uuid=uuid, players=players, stacks=stacks, dealer=dealer, sb=sb, bb=bb,
+                    big_blind=big_blind, hole_cards=hole_cards or {}, board="", action_history=[],
+                    created_at=datetime.datetime.utcnow(), starting_stacks=list(stacks))
+        self.hands[hand.id] = hand
+        self._next_id += 1
+        return hand
+
+    async def get_hand(self, hand_id: int) -> Optional[Hand]:
+        return self.hands.get(hand_id)
+
+    async def append_action(self, hand_id: int, action: Dict[str, Any], created_at: datetime.datetime):
+        self.hands[hand_id].action_history.append(action)
+
+    async def update_stacks(self, hand_id: int, stacks: List[int], created_at: datetime.datetime):
+        self.hands[hand_id].stacks = stacks
+
+    async def update_board(self, hand_id: int, board_str: str, created_at: datetime.datetime):
+        self.hands[hand_id].board = board_str
+
+    async def update_payoffs(self, hand_id: int, payoffs: Dict[int, int], created_at: datetime.datetime):
+        self.hands[hand_id].payoffs = payoffs
+
+    async def update_hole_cards(self, hand_id: int, hole_cards: Dict[str, str],
+                                created_at: datetime.datetime) -> Optional[int]:
+        hand = self.hands[hand_id]
+        hand.hole_cards = hole_cards
+        hand.version += 1
+        return hand.version
+
+    def unit_of_work(self, hand_id: int, created_at: datetime.datetime,
+                     expected_version: Optional[int] = None) -> HandUnitOfWork:
+        return HandUnitOfWork(self, hand_id, created_at, expected_version)
+
+    async def update_live_state(self, hand_id: int, live_state: Optional[bytes], created_at: datetime.datetime):
+        self.live_states[hand_id] = live_state
+        self.hands[hand_id].version += 1
+
+    async def find_action(self, hand_id: int, idempotency_key: str) -> Optional[Dict[str, Any]]:
+        return self.keyed_actions.get((hand_id, idempotency_key))
+
+    async def get_live_state(self, hand_id: int) -> Optional[Tuple[Optional[bytes], int, datetime.datetime]]:
+        hand = self.hands.get(hand_id)
+        return (self.live_states.get(hand_id), hand.version, hand.created_at) if hand else None
+
+    async def flush_hand(self, hand_id: int, created_at: datetime.datetime, actions: List[Dict[str, Any]],
+                         stacks: Optional[List[int]] = None,
+                         board: Optional[str] = None, payoffs: Optional[Dict[int, int]] = None,
+                         live_state: Optional[bytes] = None, expected_version: Optional[int] = None,
+                         idempotency_keys: Optional[List[Optional[str]]] = None) -> Optional[Hand]:
+        hand = self.hands.get(hand_id)
+        if hand is None or (expected_version is not None and hand.version != expected_version):
+            return None
+        keyed = {(hand_id, k): a for k, a in zip(idempotency_keys or [], actions) if k is not None}
+        if any(k in self.keyed_actions for k in keyed):
+            return None
+        self.keyed_actions.update(keyed)
+        hand.version += 1
+        self.live_states[hand_id] = live_state
+        hand.action_history.extend(actions)
+        if stacks is not None:
+            hand.stacks = stacks
+        if board is not None:
+            hand.board = board
+        if payoffs is not None:
+            hand.payoffs = payoffs
+        return hand
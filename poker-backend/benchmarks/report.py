@@ -0,0 +1,108 @@
+"""Latency reports shared by the benchmarks: percentiles, JSON output and baseline comparison."""
+import datetime
+import json
+import math
+import platform
+from typing import Any, Dict, List, Optional, Sequence
+
+DEFAULT_TOLERANCE = 0.10  # relative change in p95 or throughput that counts as a regression
+
+
+def percentile(sorted_samples: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of already sorted samples."""
+    if not sorted_samples:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_samples)))
+    return sorted_samples[rank - 1]
+
+
+def summarize(samples: Sequence[float], elapsed: Optional[float] = None, errors: int = 0) -> Dict[str, Any]:
+    """p50/p95/p99 latency in ms plus throughput for a list of per-call durations in seconds.
+
+    Throughput is calls per second of `elapsed` wall-clock time when given (load runs,
+    where calls overlap), otherwise of the summed call time (micro-benchmarks).
+    """
+    ordered = sorted(samples)
+    busy = elapsed if elapsed is not None else sum(ordered)
+    return {
+        "count": len(ordered),
+        "errors": errors,
+        "p50_ms": percentile(ordered, 50) * 1e3,
+        "p95_ms": percentile(ordered, 95) * 1e3,
+        "p99_ms": percentile(ordered, 99) * 1e3,
+        "mean_ms": (sum(ordered) / len(ordered) * 1e3) if ordered else 0.0,
+        "max_ms": (ordered[-1] * 1e3) if ordered else 0.0,
+        "rps": len(ordered) / busy if busy else 0.0,
+    }
+
+
+def build_report(kind: str, config: Dict[str, Any], results: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        "kind": kind,
+        "created_at": datetime.datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "config": config,
+        "results": results,
+    }
+
+
+def write_report(report: Dict[str, Any], path: str) -> None:
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
+
+
+def load_report(path: str) -> Dict[str, Any]:
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = DEFAULT_TOLERANCE) -> List[Dict[str, Any]]:
+    """One row per benchmark present in both reports, flagged when p95 or throughput regressed."""
+    rows = []
+    for name, current in report["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        p95_change = current["p95_ms"] / base["p95_ms"] - 1 if base["p95_ms"] else 0.0
+        rps_change = current["rps"] / base["rps"] - 1 if base["rps"] else 0.0
+        rows.append({
+            "name": name,
+            "p95_ms": current["p95_ms"],
+            "p95_change": p95_change,
+            "rps": current["rps"],
+            "rps_change": rps_change,
+            "regressed": p95_change > tolerance or rps_change < -tolerance,
+        })
+    return rows
+
+
+def print_results(results: Dict[str, Dict[str, Any]]) -> None:
+    print(f"{'benchmark':<34} {'count':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'per sec':>12}")
+    for name, r in results.items():
+        errors = f"  ({r['errors']} errors)" if r["errors"] else ""
+        print(f"{name:<34} {r['count']:>8,} {r['p50_ms']:>9.3f} {r['p95_ms']:>9.3f} {r['p99_ms']:>9.3f} "
+              f"{r['rps']:>12,.0f}{errors}")
+
+
+def print_comparison(rows: List[Dict[str, Any]]) -> bool:
+    """Print the comparison and return True if anything regressed."""
+    print(f"\n{'vs baseline':<34} {'p95':>9} {'per sec':>9}")
+    for row in rows:
+        flag = "  REGRESSED" if row["regressed"] else ""
+        print(f"{row['name']:<34} {row['p95_change']:>+9.1%} {row['rps_change']:>+9.1%}{flag}")
+    return any(row["regressed"] for row in rows)
+
+
+def finish(kind: str, config: Dict[str, Any], results: Dict[str, Dict[str, Any]], out: Optional[str],
+           baseline: Optional[str], tolerance: float) -> int:
+    """Print and save a report and compare it with a baseline. Returns the process exit code."""
+    report = build_report(kind, config, results)
+    print_results(results)
+    if out:
+        write_report(report, out)
+        print(f"\nreport written to {out}")
+    if baseline and print_comparison(compare(report, load_report(baseline), tolerance)):
+        return 1
+    return 0
@@ -0,0 +1,4 @@
+-- Stacks at the start of the hand, needed to replay a hand from its action history.
+-- `stacks` keeps tracking the current stacks as the hand progresses.
+ALTER TABLE hands ADD COLUMN IF NOT EXISTS starting_stacks JSONB;
+UPDATE hands SET starting_stacks = stacks WHERE starting_stacks IS NULL AND action_history = '[]'::jsonb;
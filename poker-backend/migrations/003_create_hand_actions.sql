@@ -0,0 +1,24 @@
+-- Append-only action log. Replaces the read-modify-write of hands.action_history:
+-- appending an action is a single INSERT, and get_hand aggregates the log in seq order.
+CREATE TABLE IF NOT EXISTS hand_actions (
+    hand_id INTEGER NOT NULL REFERENCES hands(id) ON DELETE CASCADE,
+    seq BIGINT GENERATED BY DEFAULT AS IDENTITY,
+    action JSONB NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+    PRIMARY KEY (hand_id, seq)
+);
+
+-- Backfill from the JSONB arrays, keeping their order
+INSERT INTO hand_actions (hand_id, seq, action)
+SELECT h.id, a.ordinality, a.value
+FROM hands h
+CROSS JOIN LATERAL jsonb_array_elements(h.action_history) WITH ORDINALITY AS a(value, ordinality)
+ON CONFLICT DO NOTHING;
+
+-- seq is global, so new actions always sort after backfilled ones
+SELECT setval(
+    pg_get_serial_sequence('hand_actions', 'seq'),
+    GREATEST((SELECT MAX(seq) FROM hand_actions), 1)
+);
+
+-- hands.action_history is no longer written; it is kept only as the backfill source
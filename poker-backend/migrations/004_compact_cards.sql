@@ -0,0 +1,33 @@
+-- Compact card storage: one byte per card (rank index * 4 + suit index, see app/utils/deck.py).
+-- hole_cards_bin holds two bytes per seat in seat order. The hole_cards/board columns
+-- are backfilled into these once and are no longer read or written by the app.
+ALTER TABLE hands ADD COLUMN IF NOT EXISTS hole_cards_bin BYTEA;
+ALTER TABLE hands ADD COLUMN IF NOT EXISTS board_bin BYTEA;
+
+CREATE OR REPLACE FUNCTION cards_to_bytea(cards TEXT) RETURNS BYTEA AS $$
+    SELECT decode(
+        COALESCE(string_agg(
+            lpad(to_hex(
+                (strpos('23456789TJQKA', substr(cards, i, 1)) - 1) * 4
+                + strpos('cdhs', substr(cards, i + 1, 1)) - 1
+            ), 2, '0'),
+            '' ORDER BY i
+        ), ''),
+        'hex'
+    )
+    FROM generate_series(1, length(cards) - 1, 2) AS i
+$$ LANGUAGE SQL IMMUTABLE;
+
+UPDATE hands
+SET board_bin = cards_to_bytea(COALESCE(board, '')),
+    hole_cards_bin = (
+        SELECT cards_to_bytea(string_agg(
+            CASE jsonb_typeof(v)
+                WHEN 'array' THEN (SELECT string_agg(x, '') FROM jsonb_array_elements_text(v) AS x)
+                ELSE v #>> '{}'
+            END,
+            '' ORDER BY k::int
+        ))
+        FROM jsonb_each(hole_cards) AS e(k, v)
+    )
+WHERE board_bin IS NULL;
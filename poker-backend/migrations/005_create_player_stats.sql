@@ -0,0 +1,43 @@
+-- Per-player counters, maintained incrementally when a hand's payoffs are written
+-- (HandRepository.flush_hand) and rebuilt offline by `poetry run rebuild-player-stats`.
+CREATE TABLE IF NOT EXISTS player_stats (
+    player TEXT PRIMARY KEY,
+    hands BIGINT NOT NULL DEFAULT 0,
+    vpip_hands BIGINT NOT NULL DEFAULT 0,        -- voluntarily put chips in preflop
+    pfr_hands BIGINT NOT NULL DEFAULT 0,         -- bet or raised preflop
+    aggressive_actions BIGINT NOT NULL DEFAULT 0, -- bets, raises and all-ins on any street
+    passive_actions BIGINT NOT NULL DEFAULT 0,    -- calls on any street
+    winnings BIGINT NOT NULL DEFAULT 0,
+    hands_won BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT now()
+);
+
+-- One row per seat of a finished hand. Actions carry their street (0 = preflop);
+-- actions recorded without one count towards aggression but not VPIP/PFR.
+CREATE OR REPLACE FUNCTION hand_player_stats(players JSONB, actions JSONB, payoffs JSONB)
+RETURNS TABLE (
+    player TEXT, hands INT, vpip_hands INT, pfr_hands INT,
+    aggressive_actions INT, passive_actions INT, winnings BIGINT, hands_won INT
+) AS $$
+    SELECT p.name,
+           1,
+           COALESCE(bool_or(a.act IN ('call', 'bet', 'raise', 'allin') AND a.street = 0), false)::int,
+           COALESCE(bool_or(a.act IN ('bet', 'raise', 'allin') AND a.street = 0), false)::int,
+           (count(*) FILTER (WHERE a.act IN ('bet', 'raise', 'allin')))::int,
+           (count(*) FILTER (WHERE a.act = 'call'))::int,
+           COALESCE(pay.amount, 0),
+           (COALESCE(pay.amount, 0) > 0)::int
+    FROM jsonb_array_elements_text(players) WITH ORDINALITY AS p(name, seat)
+    CROSS JOIN LATERAL (
+        SELECT (CASE jsonb_typeof(payoffs)
+                    WHEN 'array' THEN payoffs ->> (p.seat::int - 1)
+                    ELSE payoffs ->> (p.seat - 1)::text
+                END)::bigint AS amount
+    ) pay
+    LEFT JOIN LATERAL (
+        SELECT x ->> 'action' AS act, (x ->> 'street')::int AS street
+        FROM jsonb_array_elements(actions) AS x
+        WHERE (x ->> 'player_seat')::int = p.seat - 1
+    ) a ON true
+    GROUP BY p.name, p.seat, pay.amount
+$$ LANGUAGE SQL IMMUTABLE;
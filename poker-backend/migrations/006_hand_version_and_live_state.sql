@@ -0,0 +1,6 @@
+-- version counts the writes to a hand; HandRepository.flush_hand bumps it and can be
+-- made conditional on it, so a worker holding a stale live state can't overwrite a newer one.
+-- live_state is the compact PokerKit snapshot of an in-progress hand (app/services/state_snapshot.py),
+-- written in the same statement; any worker restores from it instead of replaying. NULL once finished.
+ALTER TABLE hands ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE hands ADD COLUMN IF NOT EXISTS live_state BYTEA;
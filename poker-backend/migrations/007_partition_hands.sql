@@ -0,0 +1,139 @@
+-- Range-partition hands by created_at, and move finished hands out to a cold table.
+--
+-- The existing heap is attached as the partition hands_legacy, covering everything
+-- before tomorrow (UTC), so no rows are rewritten. Later hands go to daily
+-- partitions hands_pYYYYMMDD made ahead of time by ensure_hand_partitions() (here,
+-- at app startup and by `poetry run archive-hands`); hands_default catches the rest.
+--
+-- Keys of a partitioned table must include the partition key, so hands is keyed by
+-- (id, created_at): ids still come from hands_id_seq, and uuid is indexed but no
+-- longer unique (HandRepository.bulk_insert_hands checks uuids before inserting).
+-- hand_actions loses its foreign key to hands; archiving deletes a hand's actions.
+-- (009_hand_uuids_and_action_keys.sql gives both back.)
+DO $$
+DECLARE
+    cutover TIMESTAMPTZ := (date_trunc('day', now() AT TIME ZONE 'UTC') + interval '1 day') AT TIME ZONE 'UTC';
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = 'hands'::regclass) = 'p' THEN
+        RETURN;
+    END IF;
+
+    ALTER TABLE hand_actions DROP CONSTRAINT IF EXISTS hand_actions_hand_id_fkey;
+    UPDATE hands SET created_at = 'epoch' WHERE created_at IS NULL;
+    ALTER TABLE hands ALTER COLUMN created_at SET NOT NULL;
+    ALTER TABLE hands RENAME TO hands_legacy;
+    ALTER TABLE hands_legacy DROP CONSTRAINT hands_pkey;
+    ALTER TABLE hands_legacy ADD CONSTRAINT hands_legacy_pkey PRIMARY KEY (id, created_at);
+    ALTER TABLE hands_legacy RENAME CONSTRAINT hands_uuid_key TO hands_legacy_uuid_key;
+
+    CREATE TABLE hands (LIKE hands_legacy INCLUDING DEFAULTS INCLUDING STORAGE INCLUDING COMPRESSION)
+        PARTITION BY RANGE (created_at);
+    ALTER TABLE hands ADD PRIMARY KEY (id, created_at);
+    ALTER SEQUENCE hands_id_seq OWNED BY hands.id;
+    EXECUTE format('ALTER TABLE hands ATTACH PARTITION hands_legacy FOR VALUES FROM (MINVALUE) TO (%L)', cutover);
+    CREATE TABLE hands_default PARTITION OF hands DEFAULT;
+END $$;
+
+CREATE INDEX IF NOT EXISTS idx_hands_created_at_id ON hands (created_at, id);
+CREATE INDEX IF NOT EXISTS idx_hands_uuid ON hands (uuid);
+
+-- Creates the daily partitions from today to `days_ahead` days from now that do not
+-- exist yet. Days already covered by another partition (hands_legacy), or with rows
+-- in hands_default, are skipped. Returns the number of partitions created.
+CREATE OR REPLACE FUNCTION ensure_hand_partitions(days_ahead INTEGER DEFAULT 7) RETURNS INTEGER AS $$
+DECLARE
+    today TIMESTAMP := date_trunc('day', now() AT TIME ZONE 'UTC');
+    day TIMESTAMP;
+    name TEXT;
+    created INTEGER := 0;
+BEGIN
+    FOR i IN 0..days_ahead LOOP
+        day := today + make_interval(days => i);
+        name := 'hands_p' || to_char(day, 'YYYYMMDD');
+        CONTINUE WHEN to_regclass(name) IS NOT NULL;
+        BEGIN
+            EXECUTE format('CREATE TABLE %I PARTITION OF hands FOR VALUES FROM (%L) TO (%L)',
+                           name, day AT TIME ZONE 'UTC', (day + interval '1 day') AT TIME ZONE 'UTC');
+            created := created + 1;
+        EXCEPTION
+            WHEN invalid_object_definition OR check_violation OR duplicate_table THEN
+                NULL;  -- overlaps a partition, the default partition has rows for it, or another session made it
+        END;
+    END LOOP;
+    RETURN created;
+END $$ LANGUAGE plpgsql;
+
+-- Detaches and drops the partitions (not hands_default) that end at or before `before`
+-- and hold no rows, i.e. whose hands have all been archived. Returns how many.
+CREATE OR REPLACE FUNCTION drop_empty_hand_partitions(before TIMESTAMPTZ) RETURNS INTEGER AS $$
+DECLARE
+    part REGCLASS;
+    bound TEXT;
+    has_rows BOOLEAN;
+    dropped INTEGER := 0;
+BEGIN
+    FOR part, bound IN
+        SELECT c.oid::regclass, pg_get_expr(c.relpartbound, c.oid)
+        FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'hands'::regclass
+    LOOP
+        CONTINUE WHEN bound = 'DEFAULT'
+            OR substring(bound FROM 'TO \(''([^'']+)''\)')::timestamptz > before;
+        EXECUTE format('LOCK TABLE %s IN ACCESS EXCLUSIVE MODE', part);
+        EXECUTE format('SELECT EXISTS (SELECT 1 FROM %s)', part) INTO has_rows;
+        CONTINUE WHEN has_rows;
+        EXECUTE format('ALTER TABLE hands DETACH PARTITION %s', part);
+        EXECUTE format('DROP TABLE %s', part);
+        dropped := dropped + 1;
+    END LOOP;
+    RETURN dropped;
+END $$ LANGUAGE plpgsql;
+
+SELECT ensure_hand_partitions(7);
+
+-- Finished hands older than the archive cutoff, one row each with their actions
+-- inlined, written once and read by id. Rows over 128 bytes get their JSONB
+-- compressed (lz4 where the server has it), so cold hands take a fraction of the
+-- space of a hands row plus its hand_actions rows.
+CREATE TABLE IF NOT EXISTS hands_archive (
+    id INTEGER PRIMARY KEY,
+    uuid TEXT NOT NULL,
+    players JSONB NOT NULL,
+    stacks JSONB NOT NULL,
+    starting_stacks JSONB,
+    dealer INTEGER NOT NULL,
+    sb INTEGER NOT NULL,
+    bb INTEGER NOT NULL,
+    big_blind INTEGER NOT NULL,
+    hole_cards_bin BYTEA,
+    board_bin BYTEA,
+    action_history JSONB NOT NULL,
+    payoffs JSONB NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0,
+    archived_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
+) WITH (toast_tuple_target = 128);
+CREATE INDEX IF NOT EXISTS idx_hands_archive_created_at_id ON hands_archive (created_at, id);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_hands_archive_uuid ON hands_archive (uuid);
+
+DO $$
+BEGIN
+    ALTER TABLE hands_archive ALTER COLUMN action_history SET COMPRESSION lz4;
+EXCEPTION WHEN feature_not_supported THEN
+    NULL;  -- server built without lz4: keep the default (pglz)
+END $$;
+
+-- Every hand, hot or archived, in the shape the repository reads. A hand is in
+-- exactly one of the two at any snapshot: archiving moves it in one transaction.
+CREATE OR REPLACE VIEW all_hands AS
+SELECT h.id, h.uuid, h.players, h.stacks, h.dealer, h.sb, h.bb, h.big_blind, h.hole_cards_bin, h.board_bin,
+       COALESCE(
+           (SELECT jsonb_agg(a.action ORDER BY a.seq) FROM hand_actions a WHERE a.hand_id = h.id),
+           '[]'::jsonb
+       ) AS action_history,
+       h.payoffs, h.created_at, h.starting_stacks, h.version
+FROM hands h
+UNION ALL
+SELECT id, uuid, players, stacks, dealer, sb, bb, big_blind, hole_cards_bin, board_bin,
+       action_history, payoffs, created_at, starting_stacks, version
+FROM hands_archive;
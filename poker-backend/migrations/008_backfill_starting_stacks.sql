@@ -0,0 +1,26 @@
+-- 002 only backfilled starting_stacks for hands without actions. Finished hands get
+-- theirs from the final stacks less the payoffs (stored as an object keyed by seat,
+-- or by older builds as an array, as in 005); unfinished hands with actions keep
+-- NULL, which HandService._replay_state reports as not replayable.
+UPDATE hands h
+SET starting_stacks = (
+    SELECT jsonb_agg(s.stack::int - COALESCE((CASE jsonb_typeof(h.payoffs)
+                                                 WHEN 'array' THEN h.payoffs ->> (s.n::int - 1)
+                                                 ELSE h.payoffs ->> (s.n - 1)::text
+                                             END)::int, 0) ORDER BY s.n)
+    FROM jsonb_array_elements_text(h.stacks) WITH ORDINALITY AS s(stack, n)
+)
+WHERE starting_stacks IS NULL AND payoffs IS NOT NULL;
+
+UPDATE hands_archive h
+SET starting_stacks = (
+    SELECT jsonb_agg(s.stack::int - COALESCE((CASE jsonb_typeof(h.payoffs)
+                                                 WHEN 'array' THEN h.payoffs ->> (s.n::int - 1)
+                                                 ELSE h.payoffs ->> (s.n - 1)::text
+                                             END)::int, 0) ORDER BY s.n)
+    FROM jsonb_array_elements_text(h.stacks) WITH ORDINALITY AS s(stack, n)
+)
+WHERE starting_stacks IS NULL;
+
+UPDATE hands h SET starting_stacks = stacks
+WHERE starting_stacks IS NULL AND NOT EXISTS (SELECT 1 FROM hand_actions a WHERE a.hand_id = h.id);
@@ -0,0 +1,46 @@
+-- Gives back what partitioning hands (007) gave up: unique uuids, and hand_actions
+-- rows that belong to a hand and go with it.
+--
+-- A unique index on a partitioned table must include the partition key, and
+-- created_at is not known before a hand is inserted, so uuids get a table of their
+-- own instead. Every hand's uuid is claimed here first, in the same statement or
+-- transaction that inserts the hand; a second claim fails (or, for imports, is
+-- skipped), however many sessions race. Archiving keeps a hand's id, so its claim
+-- stays valid; a uuid is never released.
+CREATE TABLE IF NOT EXISTS hand_uuids (
+    uuid TEXT PRIMARY KEY,
+    hand_id INTEGER NOT NULL
+);
+
+-- Hands that got a duplicate uuid while nothing enforced it keep their rows; the
+-- lowest id keeps the claim.
+INSERT INTO hand_uuids (uuid, hand_id)
+SELECT uuid, min(id) FROM (
+    SELECT uuid, id FROM hands
+    UNION ALL
+    SELECT uuid, id FROM hands_archive
+) all_uuids
+GROUP BY uuid
+ON CONFLICT (uuid) DO NOTHING;
+
+-- The foreign key to hands has to name its whole key, so each action carries its
+-- hand's created_at. Deleting a hand (including archiving it) deletes its actions
+-- again, and an action can no longer be written for a hand that does not exist.
+ALTER TABLE hand_actions ADD COLUMN IF NOT EXISTS hand_created_at TIMESTAMP WITH TIME ZONE;
+
+UPDATE hand_actions a SET hand_created_at = h.created_at
+FROM hands h
+WHERE h.id = a.hand_id AND a.hand_created_at IS NULL;
+
+-- left behind by hands deleted while there was no foreign key
+DELETE FROM hand_actions WHERE hand_created_at IS NULL;
+
+ALTER TABLE hand_actions ALTER COLUMN hand_created_at SET NOT NULL;
+
+DO $$
+BEGIN
+    ALTER TABLE hand_actions ADD CONSTRAINT hand_actions_hand_fkey
+        FOREIGN KEY (hand_id, hand_created_at) REFERENCES hands (id, created_at) ON DELETE CASCADE;
+EXCEPTION WHEN duplicate_object THEN
+    NULL;
+END $$;
@@ -0,0 +1,28 @@
+-- The idempotency key a client sent with an action, in its own column rather than in
+-- the action JSON, so it never reaches the table feed or exports. The unique index
+-- makes a second action with the same key fail the flush that writes it, whichever
+-- worker the retry lands on.
+ALTER TABLE hand_actions ADD COLUMN IF NOT EXISTS idempotency_key TEXT;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_hand_actions_idempotency_key
+    ON hand_actions (hand_id, idempotency_key) WHERE idempotency_key IS NOT NULL;
+
+-- Keys stored inside the JSON so far move to the column (the first action with a key
+-- keeps it), and come out of archived action histories.
+UPDATE hand_actions a
+SET idempotency_key = CASE WHEN k.first THEN a.action ->> 'idempotency_key' END,
+    action = a.action - 'idempotency_key'
+FROM (
+    SELECT hand_id, seq,
+           row_number() OVER (PARTITION BY hand_id, action ->> 'idempotency_key' ORDER BY seq) = 1 AS first
+    FROM hand_actions
+    WHERE action ? 'idempotency_key'
+) k
+WHERE a.hand_id = k.hand_id AND a.seq = k.seq;
+
+UPDATE hands_archive
+SET action_history = (
+    SELECT jsonb_agg(t.action - 'idempotency_key' ORDER BY t.n)
+    FROM jsonb_array_elements(action_history) WITH ORDINALITY AS t(action, n)
+)
+WHERE EXISTS (SELECT 1 FROM jsonb_array_elements(action_history) t(action) WHERE t.action ? 'idempotency_key');
@@ -1,14 +1,22 @@
+import csv
+import io
+import json
+from concurrent.futures import ThreadPoolExecutor
 from fastapi.testclient import TestClient
 from app.main import app
+from app.models import Hand
 client = TestClient(app)
 
+def _hand(**overrides):
+    fields = dict(id=1, uuid="u1", players=["A","B","C"], stacks=[1000,1000,1000], dealer=0, sb=1, bb=2,
+                  big_blind=40, hole_cards={"0":"AhKd", "1":"7c7d", "2":"TsJh"}, board="", action_history=[],
+                  starting_stacks=[1000,1000,1000])
+    fields.update(overrides)
+    return Hand(**fields)
+
 def test_start_hand_api(monkeypatch):
     async def fake_start(*args, **kwargs):
-        class DummyHand:
-            id = 1
-            uuid = "u1"
-            hole_cards = {"0":"AhKd", "1":"7c7d"}
-        return DummyHand()
+        return _hand()
 
     from app.services.hand_service import HandService
     monkeypatch.setattr(HandService, "start_hand", fake_start)
@@ -17,3 +25,165 @@ def test_start_hand_api(monkeypatch):
     assert resp.status_code == 201
     data = resp.json()
     assert data["uuid"] == "u1"
+
+def test_equity_api(monkeypatch):
+    async def fake_get(self, hand_id):
+        return _hand(id=hand_id, board="2h7h9s", action_history=[{"player_seat": 2, "action": "fold"}])
+
+    from app.repository.hand_repository import HandRepository
+    import app.api.hands as hands_api
+    monkeypatch.setattr(HandRepository, "get_hand", fake_get)
+    monkeypatch.setattr(hands_api, "get_equity_executor", lambda: ThreadPoolExecutor(1))
+
+    for bad in ({"iterations": 0}, {"iterations": -5}, {"iterations": 10**9}, {"time_budget_ms": 10**7},
+                {"seed": -1}):
+        assert client.get("/hands/5/equity", params=bad).status_code == 422
+    resp = client.get("/hands/5/equity")
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["method"] == "exact"
+    assert [s["seat"] for s in data["seats"]] == [0, 1]
+    assert abs(sum(s["equity"] for s in data["seats"]) - 1) < 1e-9
+
+def test_export_streams_ndjson_and_csv(monkeypatch):
+    async def fake_iter(self, since=None, until=None, player=None, page_size=1000):
+        for i in (1, 2):
+            yield _hand(id=i, uuid=f"u{i}")
+
+    from app.repository.hand_repository import HandRepository
+    monkeypatch.setattr(HandRepository, "iter_hands", fake_iter)
+
+    resp = client.get("/hands/export")
+    assert resp.status_code == 200
+    lines = resp.text.splitlines()
+    assert [json.loads(line)["uuid"] for line in lines] == ["u1", "u2"]
+    from app.schemas import HandImport
+    assert HandImport.parse_raw(lines[0]).starting_stacks == [1000, 1000, 1000]  # imports back replayable
+
+    resp = client.get("/hands/export", params={"format": "csv"})
+    rows = list(csv.DictReader(io.StringIO(resp.text)))
+    assert [r["id"] for r in rows] == ["1", "2"]
+    assert json.loads(rows[0]["hole_cards"])["0"] == "AhKd"
+
+def test_player_stats_api(monkeypatch):
+    from app.repository.player_stats_repository import PlayerStatsRepository
+    rows = {"A": dict(player="A", hands=4, vpip_hands=2, pfr_hands=1, aggressive_actions=3,
+                      passive_actions=2, winnings=-80, hands_won=1, updated_at=None)}
+    async def fake_get(self, player):
+        return rows.get(player)
+    monkeypatch.setattr(PlayerStatsRepository, "get_stats", fake_get)
+
+    resp = client.get("/players/A/stats")
+    assert resp.status_code == 200
+    body = resp.json()
+    assert (body["vpip"], body["pfr"], body["aggression_factor"], body["winnings_per_hand"]) == (0.5, 0.25, 1.5, -20)
+    assert client.get("/players/Z/stats").status_code == 404
+
+def test_table_socket_sends_snapshot_and_heartbeats(monkeypatch):
+    from app.repository.hand_repository import HandRepository
+    from app.services import table_feed
+    from app.services.hand_registry import live_hands
+    async def fake_get(self, hand_id):
+        if hand_id == 3:  # bots acted, but it predates starting stacks
+            return _hand(id=3, starting_stacks=None, action_history=[{"player_seat": 1, "action": "call"}])
+        return _hand(id=hand_id) if hand_id == 1 else None
+    async def no_snapshot(self, hand_id):
+        return (None, 0, None)
+    monkeypatch.setattr(HandRepository, "get_hand", fake_get)
+    monkeypatch.setattr(HandRepository, "get_live_state", no_snapshot)
+    monkeypatch.setattr(table_feed, "HEARTBEAT_INTERVAL", 0.05)
+
+    try:
+        with client.websocket_connect("/game/ws/1") as ws:
+            snapshot = ws.receive_json()
+            assert snapshot["type"] == "snapshot"
+            assert snapshot["table"]["currentPlayerIndex"] == 2
+            assert snapshot["table"]["pot"] == 60
+            assert ws.receive_json() == {"type": "ping"}
+        with client.websocket_connect("/game/ws/2") as ws:
+            assert ws.receive()["code"] == 4404
+        with client.websocket_connect("/game/ws/3") as ws:
+            message = ws.receive()
+            assert (message["code"], message["reason"]) == (4422, "Hand has no starting stacks to replay")
+    finally:
+        live_hands.pop(1)
+    assert table_feed.table_feed.subscriber_count() == 0
+
+def test_get_hand_etag_and_304(monkeypatch):
+    from app.repository.hand_repository import HandRepository
+    hand = _hand(id=5, version=3)
+    async def fake_get(self, hand_id):
+        return hand if hand_id == 5 else None
+    monkeypatch.setattr(HandRepository, "get_hand", fake_get)
+
+    resp = client.get("/hands/5")
+    assert resp.status_code == 200
+    etag = resp.headers["etag"]
+    assert etag == '"5-3"'
+    resp = client.get("/hands/5", headers={"If-None-Match": etag})
+    assert resp.status_code == 304 and resp.content == b""
+    hand.version = 4
+    assert client.get("/hands/5", headers={"If-None-Match": etag}).status_code == 200
+
+def test_action_needs_a_version_or_key_and_conflicts_are_409(monkeypatch):
+    from app.services.hand_service import ActionConflict, HandService
+    calls = []
+
+    async def fake_submit(self, hand_id, action, version=None, idempotency_key=None):
+        calls.append((action, version, idempotency_key))
+        if version == 1:
+            raise ActionConflict("Hand 7 is at version 2, not 1")
+        return _hand(id=hand_id, version=2)
+
+    monkeypatch.setattr(HandService, "submit_action", fake_submit)
+
+    assert client.post("/hands/7/action", json={"hand_id": 7, "action": "call"}).status_code == 422
+    resp = client.post("/hands/7/action", json={"hand_id": 7, "action": "call", "version": 1})
+    assert resp.status_code == 409 and "version 2" in resp.json()["detail"]
+    resp = client.post("/game/action", json={"hand_id": 7, "action": "call", "idempotency_key": "k"})
+    assert resp.status_code == 200 and resp.json()["state"]["version"] == 2
+    assert calls[-1] == ({"hand_id": 7, "player_seat": None, "action": "call", "amount": None, "meta": None},
+                         None, "k")
+
+def test_deal_does_not_touch_the_cached_hand(monkeypatch):
+    from app.repository.hand_repository import HandRepository
+    cached = _hand(id=3, hole_cards={})
+    written = {}
+
+    async def fake_get(self, hand_id):
+        return cached
+
+    async def fake_update(self, hand_id, hole_cards, created_at):
+        written[hand_id] = hole_cards
+        return cached.version + 1
+
+    monkeypatch.setattr(HandRepository, "get_hand", fake_get)
+    monkeypatch.setattr(HandRepository, "update_hole_cards", fake_update)
+    resp = client.post("/game/deal", params={"hand_id": 3})
+    assert resp.status_code == 200
+    assert [len(p["cards"]) for p in resp.json()["state"]["players"]] == [2, 2, 2]
+    assert cached.hole_cards == {} and set(written[3]) == {"0", "1", "2"}
+    assert resp.json()["state"]["version"] == cached.version + 1  # what the next action must name
+
+def test_partition_maintenance_survives_errors(monkeypatch):
+    import asyncio
+    import app.main as main
+    from app.repository.hand_repository import HandRepository
+    calls = []
+
+    async def flaky_ensure(self, days_ahead):
+        calls.append(days_ahead)
+        if len(calls) == 1:
+            raise ConnectionError("db down")
+
+    monkeypatch.setattr(HandRepository, "ensure_partitions", flaky_ensure)
+    monkeypatch.setattr(main, "HAND_PARTITION_CHECK_INTERVAL", 0)
+
+    async def run():
+        task = asyncio.ensure_future(main._maintain_partitions())
+        while len(calls) < 3 and not task.done():
+            await asyncio.sleep(0)
+        task.cancel()
+
+    asyncio.run(run())
+    assert len(calls) >= 3
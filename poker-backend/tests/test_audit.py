@@ -0,0 +1,97 @@
+import copy
+import io
+import json
+
+import pytest
+from app.services.audit import audit_hand, audit_hands, load_checkpoint
+from app.services.table_manager import HandWriter, TableManager
+from tests.test_table_manager import FakeRepo as WriterRepo
+
+class FakeRepo:
+    def __init__(self, hands):
+        self.hands = hands
+
+    async def iter_hands(self, since=None, until=None, player=None, page_size=1000, after_id=0):
+        for hand in self.hands:
+            if since is None or (hand.created_at, hand.id) > (since, after_id):
+                yield hand
+
+async def _played_hands(n_tables=4, hands_per_table=15):
+    repo = WriterRepo()
+    manager = TableManager(writer=HandWriter(repo, batch_size=1000))
+    await manager.start()
+    for t in range(n_tables):
+        manager.open_table([f"t{t}p{s}" for s in range(4)], [1000] * 4, max_hands=hands_per_table, seed=t)
+    await manager.wait()
+    await manager.stop()
+    hands = sorted((h for batch in repo.batches for h in batch), key=lambda h: h.created_at)
+    for i, hand in enumerate(hands, 1):
+        hand.id = i
+        hand.payoffs = {str(k): v for k, v in hand.payoffs.items()}  # as read back from JSONB
+    return hands
+
+def _tamper(hands):
+    bad = {}
+    hands[3].stacks = [s + 1 for s in hands[3].stacks]
+    bad[hands[3].id] = "stacks"
+    hands[10].payoffs = None
+    bad[hands[10].id] = "payoffs"
+    dealt = next(h for h in hands[11:30] + hands[31:] if h.board)
+    dealt.board = ""  # the replay then deals its own
+    bad[dealt.id] = "board"
+    hands[30].action_history = hands[30].action_history + [{"player_seat": 0, "action": "raise", "amount": 1}]
+    bad[hands[30].id] = "error"
+    return bad
+
+@pytest.mark.asyncio
+async def test_audit_hand_flags_what_does_not_follow():
+    hands = await _played_hands(1, 40)
+    assert all(audit_hand(h) is None for h in hands)
+    bad = copy.deepcopy(hands)
+    bad[0].stacks = [s + 1 for s in bad[0].stacks]
+    assert set(audit_hand(bad[0])["fields"]) == {"stacks"}
+    bad[1].payoffs = {"0": 10**6}
+    assert set(audit_hand(bad[1])["fields"]) == {"payoffs"}
+    bad[2].action_history = [{"player_seat": 1, "action": "check"}]  # not seat 1's turn
+    assert "error" in audit_hand(bad[2])
+
+@pytest.mark.asyncio
+async def test_audit_needs_no_bot(monkeypatch):
+    from app.services import hand_service, llm_bot
+    hands = await _played_hands(1, 5)
+    monkeypatch.setattr(hand_service, "BOT_BACKEND", "gemini")
+    monkeypatch.setattr(llm_bot, "_bot", None)
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    assert all(audit_hand(h) is None for h in hands)  # replaying never builds the LLM bot
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("workers", [1, 2])
+async def test_audit_resumes_from_checkpoint(tmp_path, workers):
+    hands = await _played_hands()
+    bad = _tamper(hands)
+    checkpoint = str(tmp_path / "audit.json")
+    out = io.StringIO()
+
+    class Crash(Exception):
+        pass
+
+    def crash_after_two_chunks(report):
+        if report["audited"] >= 20:
+            raise Crash()
+
+    with pytest.raises(Crash):
+        await audit_hands(FakeRepo(hands), workers, chunk_size=10, checkpoint_path=checkpoint, out=out,
+                          progress=crash_after_two_chunks)
+    assert load_checkpoint(checkpoint)["hands"] == 20
+
+    report = await audit_hands(FakeRepo(hands), workers, chunk_size=10, checkpoint_path=checkpoint, out=out)
+    assert report["resumed"] and report["audited"] == len(hands) - 20
+    assert report["total"]["hands"] == len(hands)
+    assert report["total"]["actions"] == sum(len(h.action_history) for h in hands)
+    assert report["hands_per_sec"] > 0
+
+    found = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert sorted(m["hand_id"] for m in found) == sorted(bad)  # each reported once
+    for m in found:
+        assert ("error" in m) if bad[m["hand_id"]] == "error" else bad[m["hand_id"]] in m["fields"]
+    assert report["total"]["mismatches"] == len(bad)
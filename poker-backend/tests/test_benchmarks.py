@@ -0,0 +1,36 @@
+import pytest
+from app.api import game, hands
+from app.main import app
+from app.services import hand_service
+from app.services.hand_registry import LiveHandRegistry
+from benchmarks.bench_load import run_load
+from benchmarks.memory_repo import MemoryHandRepository
+from benchmarks.report import build_report, compare, percentile, summarize
+
+def test_percentiles_and_summary():
+    samples = [i / 1000 for i in range(1, 101)]  # 1..100 ms
+    assert percentile(samples, 50) == 0.05
+    assert percentile(samples, 99) == 0.099
+    summary = summarize(samples, elapsed=2.0, errors=3)
+    assert (summary["count"], summary["errors"], summary["rps"]) == (100, 3, 50.0)
+    assert summary["p95_ms"] == pytest.approx(95.0)
+
+def test_compare_flags_regressions():
+    base = build_report("micro", {}, {"a": summarize([0.001] * 10), "b": summarize([0.001] * 10)})
+    now = build_report("micro", {}, {"a": summarize([0.001] * 10), "b": summarize([0.002] * 10)})
+    rows = {row["name"]: row for row in compare(now, base)}
+    assert not rows["a"]["regressed"]
+    assert rows["b"]["regressed"] and rows["b"]["p95_change"] == pytest.approx(1.0)
+
+@pytest.mark.asyncio
+async def test_load_generator_against_memory_repository(monkeypatch):
+    repo = MemoryHandRepository()
+    monkeypatch.setattr(hands, "HandRepository", lambda pool: repo)
+    monkeypatch.setattr(game, "HandRepository", lambda pool: repo)
+    monkeypatch.setattr(hand_service, "live_hands", LiveHandRegistry())
+
+    results = await run_load(app, hands=4, concurrency=2, players=3)
+    assert results["all"]["errors"] == 0
+    assert results["POST /hands"]["count"] == results["POST /game/start-hand"]["count"] == 2
+    assert results["GET /hands/{id}"]["count"] == 4
+    assert all(h.payoffs is not None for h in repo.hands.values())
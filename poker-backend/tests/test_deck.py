@@ -0,0 +1,26 @@
+from app.utils.deck import (
+    Deck, cards_mask, cards_to_str, card_list, decode_cards, encode_cards, mask_cards, parse_cards, shuffle_deck
+)
+
+def test_seeded_deck_matches_shuffle_deck():
+    assert cards_to_str(Deck.shuffled(42).cards) == "".join(shuffle_deck(42))
+
+def test_deal_advances_cursor():
+    deck = Deck.shuffled(1)
+    hole = deck.deal_hole_cards(3)
+    assert [len(h) for h in hole] == [2, 2, 2]
+    assert len(deck) == 46
+    dealt = set().union(*hole)
+    assert not dealt & set(deck.remaining())
+
+def test_exclude_mask():
+    used = parse_cards("AhKd")
+    deck = Deck.shuffled(3, exclude_mask=cards_mask(used))
+    assert len(deck) == 50
+    assert not set(used) & set(deck.remaining())
+
+def test_encodings_round_trip():
+    assert decode_cards(encode_cards("AhKd7c")) == "AhKd7c"
+    assert encode_cards(["Ah", "Kd"]) == encode_cards("AhKd")
+    assert mask_cards(cards_mask([0, 51, 7])) == [0, 7, 51]
+    assert card_list("AhKd") == ["Ah", "Kd"]
@@ -0,0 +1,21 @@
+import pytest
+from app.services.equity import compute_equity
+from app.utils.evaluator import parse_cards
+
+def test_equity_exact_and_sampled_agree():
+    holes = [parse_cards("AhAd"), parse_cards("KsKc")]
+    exact = compute_equity([0, 1], holes, parse_cards("2c7d9h"))
+    assert exact["method"] == "exact"
+    sampled = compute_equity([0, 1], holes, [], iterations=20_000, time_budget=10, seed=1)
+    assert sampled["method"] == "monte_carlo"
+    assert sampled["samples"] == 20_000
+    assert 0.78 < sampled["seats"][0]["equity"] < 0.85
+
+def test_equity_on_river_is_exact_single_runout():
+    result = compute_equity([0, 1], [parse_cards("AhKd"), parse_cards("QsQc")], parse_cards("2c7d9hKs3s"))
+    assert result["samples"] == 1
+    assert result["seats"][0]["win"] == 1.0
+
+def test_equity_needs_at_least_one_iteration():
+    with pytest.raises(ValueError):
+        compute_equity([0, 1], [parse_cards("AhKd"), parse_cards("QsQc")], [], iterations=0)
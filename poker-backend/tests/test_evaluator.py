@@ -0,0 +1,40 @@
+import random
+from pokerkit import StandardHighHand
+from app.utils.deck import make_deck
+from app.utils import evaluator
+
+def test_categories():
+    assert evaluator.describe(evaluator.evaluate("AhKhQhJhTh2c3c")) == "Straight Flush"
+    assert evaluator.describe(evaluator.evaluate("5h4d3c2sAh")) == "Straight"
+    assert evaluator.describe(evaluator.evaluate("AhAcAdKsKh")) == "Full House"
+    assert evaluator.describe(evaluator.evaluate("2h3h4h5h7h7c7d")) == "Flush"
+    assert evaluator.describe(evaluator.evaluate("7s7h7c7dKh2c")) == "Four of a Kind"
+    assert evaluator.describe(evaluator.evaluate(["Ah", "Kd", "9c", "7s", "3h"])) == "High Card"
+
+def test_wheel_loses_to_six_high_straight():
+    assert evaluator.evaluate("5h4d3c2sAh") < evaluator.evaluate("6h5h4d3c2s")
+
+def test_ordering_matches_pokerkit():
+    rng = random.Random(7)
+    deck = make_deck()
+    for size in (5, 6, 7):
+        for _ in range(300):
+            cards = rng.sample(deck, 2 * size)
+            a, b = cards[:size], cards[size:]
+            ours = (evaluator.evaluate(a) > evaluator.evaluate(b)) - (evaluator.evaluate(a) < evaluator.evaluate(b))
+            ha = StandardHighHand.from_game("".join(a))
+            hb = StandardHighHand.from_game("".join(b))
+            theirs = (ha > hb) - (ha < hb)
+            assert ours == theirs, (a, b)
+
+def test_batch_matches_single():
+    rng = random.Random(3)
+    hands = [rng.sample(range(52), 7) for _ in range(200)]
+    assert evaluator.evaluate_batch(hands) == [evaluator.evaluate_indices(h) for h in hands]
+
+def test_array_matches_single():
+    import numpy as np
+    rng = random.Random(5)
+    for size in (5, 6, 7):
+        hands = [rng.sample(range(52), size) for _ in range(500)]
+        assert evaluator.evaluate_array(np.array(hands)).tolist() == evaluator.evaluate_batch(hands)
@@ -0,0 +1,63 @@
+import json
+import pytest
+from app.services.ingest import ingest_ndjson, iter_lines
+
+class FakeRepo:
+    def __init__(self):
+        self.chunks = []
+
+    async def bulk_insert_hands(self, hands, fold_stats=False):
+        assert fold_stats  # imported hands count in player_stats like played ones
+        self.chunks.append([h.uuid for h in hands])
+        return len(hands)
+
+def _line(i, **overrides):
+    record = {"id": i, "uuid": f"u{i}", "players": ["A","B"], "stacks": [1000,1000], "dealer": 0, "sb": 1,
+              "bb": 0, "big_blind": 40, "hole_cards": {"0": "AhKd", "1": "7c7d"}, "board": "",
+              "action_history": [{"player_seat": 0, "action": "call"}]}
+    record.update(overrides)
+    return json.dumps(record)
+
+async def _aiter(items):
+    for item in items:
+        yield item
+
+@pytest.mark.asyncio
+async def test_ingest_chunks_and_rejects_bad_lines():
+    repo = FakeRepo()
+    lines = [_line(1), "not json", _line(2), "", _line(3, stacks="x"), _line(4), _line(5)]
+    report = await ingest_ndjson(repo, _aiter(lines), chunk_size=2)
+    assert repo.chunks == [["u1", "u2"], ["u4", "u5"]]
+    assert report["inserted"] == 4
+    assert report["rejected"] == 2
+    assert [e["line"] for e in report["errors"]] == [2, 5]
+
+@pytest.mark.asyncio
+async def test_ingest_rejects_records_that_cannot_be_stored():
+    repo = FakeRepo()
+    lines = [
+        _line(1, hole_cards={"0": "XxYy", "1": "7c7d"}),
+        _line(2, board="zz"),
+        _line(3, board="2c3c4c5c6c7c"),
+        _line(4, hole_cards={"1": "AhKd", "2": "7c7d"}),
+        _line(5, stacks=[1000]),
+        _line(6, starting_stacks=[1000, 1000, 1000]),
+        _line(7, hole_cards={}, board="2c3c4c"),  # not dealt yet is fine
+    ]
+    report = await ingest_ndjson(repo, _aiter(lines))
+    assert report["rejected"] == 6
+    assert repo.chunks == [["u7"]]
+
+@pytest.mark.asyncio
+async def test_iter_lines_joins_split_chunks():
+    chunks = [b'{"a":', b'1}\n{"b":2}\n{"c"', b':3}']
+    assert [line async for line in iter_lines(_aiter(chunks))] == [b'{"a":1}', b'{"b":2}', b'{"c":3}']
+
+@pytest.mark.asyncio
+async def test_ingest_rejects_lines_that_are_not_utf8():
+    repo = FakeRepo()
+    chunks = [_line(1).encode() + b"\n", b'{"uuid": "\xff\xfe"}\n', _line(2).encode()]
+    report = await ingest_ndjson(repo, iter_lines(_aiter(chunks)))
+    assert repo.chunks == [["u1", "u2"]]
+    assert (report["read"], report["rejected"]) == (3, 1)
+    assert report["errors"][0]["line"] == 2
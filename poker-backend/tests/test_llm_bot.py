@@ -0,0 +1,169 @@
+import asyncio
+import gc
+import json
+import time
+
+import pytest
+from app.services.hand_registry import LiveHandRegistry
+from app.services.hand_service import HandService
+from app.services.llm_bot import (
+    GeminiClient, LLMBot, LLMError, class_name, parse_action, situation_prompt,
+)
+from app.services.strategy import ALLIN, CALL, FOLD, RAISE, TOP_PAIR, hand_class
+from app.services.state_snapshot import create_state
+from app.utils.deck import parse_cards
+from tests.test_service import FakeRepo
+
+
+class StubGemini:
+    """Local HTTP server speaking just enough of generateContent for GeminiClient."""
+
+    def __init__(self, reply="call", delay=0.0, status=200):
+        self.reply, self.delay, self.status = reply, delay, status
+        self.requests = []
+        self.active = self.peak = 0
+
+    async def __aenter__(self):
+        self._server = await asyncio.start_server(self._serve, "127.0.0.1", 0)
+        self.url = "http://127.0.0.1:%d" % self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, *exc):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _serve(self, reader, writer):
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = next(int(line.split(b":")[1]) for line in head.split(b"\r\n")
+                              if line.lower().startswith(b"content-length"))
+                self.requests.append(json.loads(await reader.readexactly(length)))
+                self.active += 1
+                self.peak = max(self.peak, self.active)
+                await asyncio.sleep(self.delay)
+                self.active -= 1
+                body = json.dumps({"candidates": [{"content": {"parts": [{"text": self.reply}]}}]}).encode()
+                writer.write(b"HTTP/1.1 %d X\r\nContent-Type: application/json\r\nContent-Length: %d\r\n\r\n"
+                             % (self.status, len(body)) + body)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+
+
+def _state(hole="AhAd", n=6):
+    """Preflop, first to act (seat 2) holding `hole`."""
+    state = create_state(n, [4000] * n, 40)
+    others = iter(["2s3s", "4s5s", "6s7s", "8s9s", "TsJs"])
+    for seat in range(n):
+        state.deal_hole(hole if seat == 2 else next(others))
+    return state
+
+
+def _fallback(state):
+    return {"player_seat": state.actor_index, "action": "fold", "fallback": True}
+
+
+def test_prompt_and_answer_parsing():
+    assert [class_name(hand_class(*parse_cards(h))) for h in ("AhAd", "AhKh", "KdAh", "7c2d")] == \
+        ["AA", "AKs", "AKo", "72o"]
+    prompt = situation_prompt((0, 1, 0, 3, hand_class(*parse_cards("AhKh"))))
+    assert "AKs" in prompt and "more than 60 big blinds" in prompt and "Facing a raise: yes" in prompt
+    prompt = situation_prompt((2, 1, TOP_PAIR))
+    assert "Street: turn" in prompt and "top pair" in prompt and "at most 0.15 of the pot" in prompt
+    assert [parse_action(t) for t in ("Fold.", "I would CHECK", "Raise!", "all-in", "shove")] == \
+        [FOLD, CALL, RAISE, ALLIN, ALLIN]
+    with pytest.raises(LLMError):
+        parse_action("hmm")
+
+
+@pytest.mark.asyncio
+async def test_model_answer_is_used_then_cached():
+    async with StubGemini(reply="raise") as stub:
+        bot = LLMBot(GeminiClient("k", base_url=stub.url), fallback=_fallback, budget=2)
+        state = _state()
+        first = await bot.decide(state)
+        assert first["action"] == "raise" and first["player_seat"] == state.actor_index
+        assert await bot.decide(_state("AsAc")) == first  # same situation: no second request
+        assert len(stub.requests) == 1
+        assert "AA" in stub.requests[0]["contents"][0]["parts"][0]["text"]
+        assert bot.stats()["model"] == 1 and bot.stats()["cache"] == 1
+        await bot.aclose()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_decisions_share_one_request():
+    async with StubGemini(reply="call", delay=0.1) as stub:
+        bot = LLMBot(GeminiClient("k", base_url=stub.url), fallback=_fallback, budget=2)
+        results = await asyncio.gather(*(bot.decide(_state()) for _ in range(10)))
+        assert len(stub.requests) == 1
+        assert {r["action"] for r in results} == {"call"}
+        assert bot.stats()["coalesced"] == 9
+        await bot.aclose()
+
+
+@pytest.mark.asyncio
+async def test_slow_model_falls_back_within_budget_and_warms_cache():
+    async with StubGemini(reply="raise", delay=0.3) as stub:
+        bot = LLMBot(GeminiClient("k", base_url=stub.url), fallback=_fallback, budget=0.05)
+        start = time.perf_counter()
+        assert (await bot.decide(_state())).get("fallback")
+        assert time.perf_counter() - start < 0.2
+        assert bot.pending() == 1  # the request carries on
+        await asyncio.sleep(0.4)
+        assert bot.pending() == 0
+        assert (await bot.decide(_state()))["action"] == "raise"
+        assert bot.stats()["timeout"] == 1 and bot.stats()["cache"] == 1
+        await bot.aclose()
+
+
+@pytest.mark.asyncio
+async def test_request_failing_after_the_budget_is_counted(monkeypatch):
+    async with StubGemini(reply="raise", delay=0.1, status=500) as stub:
+        bot = LLMBot(GeminiClient("k", base_url=stub.url), fallback=_fallback, budget=0.02)
+        unretrieved = []
+        monkeypatch.setattr(asyncio.get_running_loop(), "call_exception_handler", unretrieved.append)
+        assert (await bot.decide(_state())).get("fallback")
+        assert (await bot.decide(_state())).get("fallback")  # same request, timed out again
+        await asyncio.sleep(0.2)
+        assert bot.pending() == 0
+        gc.collect()
+        assert not unretrieved  # no "Task exception was never retrieved"
+        assert bot.stats()["timeout"] == 2 and bot.stats()["error"] == 1
+        await bot.aclose()
+
+
+@pytest.mark.asyncio
+async def test_concurrency_limit():
+    async with StubGemini(reply="fold", delay=0.05) as stub:
+        bot = LLMBot(GeminiClient("k", base_url=stub.url), fallback=_fallback, budget=2, max_concurrency=2)
+        hands = ["AhAd", "KhKd", "QhQd", "JhJd", "ThTd", "9h9d"]  # distinct situations
+        await asyncio.gather(*(bot.decide(_state(h)) for h in hands))
+        assert len(stub.requests) == 6
+        assert stub.peak == 2
+        await bot.aclose()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("reply, status", [("raise", 500), ("no idea", 200)])
+async def test_model_errors_fall_back_and_are_not_cached(reply, status):
+    async with StubGemini(reply=reply, status=status) as stub:
+        bot = LLMBot(GeminiClient("k", base_url=stub.url), fallback=_fallback, budget=2)
+        assert (await bot.decide(_state())).get("fallback")
+        assert (await bot.decide(_state())).get("fallback")
+        assert len(stub.requests) == 2 and bot.stats()["error"] == 2
+        await bot.aclose()
+
+
+@pytest.mark.asyncio
+async def test_hand_service_plays_bots_through_a_slow_model():
+    async with StubGemini(reply="call", delay=1.0) as stub:
+        bot = LLMBot(GeminiClient("k", base_url=stub.url), budget=0.02)
+        svc = HandService(FakeRepo(), LiveHandRegistry(), bot=bot)
+        start = time.perf_counter()
+        hand = await svc.start_hand(["you", "b1", "b2", "b3", "b4", "b5"], [4000] * 6)
+        # every bot fell back to the strategy tables instead of waiting for the model
+        assert time.perf_counter() - start < 0.5
+        assert bot.stats()["timeout"] + bot.stats()["coalesced"] >= 1
+        assert all(a["player_seat"] != 0 for a in hand.action_history)
+        await bot.aclose()
@@ -0,0 +1,31 @@
+from fastapi.testclient import TestClient
+from app.main import app
+from app.metrics import Histogram, Registry, Sampled
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    h = registry.register(Histogram("t_seconds", "Test.", ("op",), buckets=(0.1, 1.0)))
+    for v in (0.05, 0.5, 0.5, 5.0):
+        h.labels("a").observe(v)
+    registry.register(Sampled("t_size", "Size.", (), lambda: {(): 3}))
+    lines = registry.render().splitlines()
+    assert 't_seconds_bucket{op="a",le="0.1"} 1' in lines
+    assert 't_seconds_bucket{op="a",le="1.0"} 3' in lines
+    assert 't_seconds_bucket{op="a",le="+Inf"} 4' in lines
+    assert 't_seconds_count{op="a"} 4' in lines
+    assert 't_seconds_sum{op="a"} 6.05' in lines
+    assert "t_size 3" in lines
+
+def test_metrics_endpoint_labels_requests_by_route(monkeypatch):
+    from app.repository.hand_repository import HandRepository
+    async def fake_get(self, hand_id):
+        return None
+    monkeypatch.setattr(HandRepository, "get_hand", fake_get)
+    client = TestClient(app)
+    assert client.get("/hands/12345").status_code == 404
+
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'poker_http_request_duration_seconds_count{method="GET",route="/hands/{hand_id}",status="404"}' in resp.text
+    assert "# TYPE poker_engine_seconds histogram" in resp.text
@@ -0,0 +1,114 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.serialization as serialization
+from app.main import app
+from app.models import Hand
+from app.repository.hand_repository import HandRepository
+from app.schemas import HandResponse
+from app.services.hand_service import HandService
+
+client = TestClient(app)
+
+
+def _hands():
+    """Hands covering what the encoders have to agree on: long histories, unicode, keys, timestamps."""
+    rng = random.Random(7)
+    yield Hand(id=1, uuid="u1", players=["A", "B"], stacks=[1000, 1000], dealer=0, sb=1, bb=0, big_blind=40,
+               hole_cards={}, board="", action_history=[])
+    yield Hand(id=2, uuid="u2", players=["Zoë", "玩家", 'quo"te\\', "tab\tnl\n\x01"], stacks=[0, 2000, 500, 1500],
+               dealer=3, sb=0, bb=1, big_blind=40, hole_cards={"0": "AhKd", "1": "7c7d", "2": "TsJh", "3": "2c2d"},
+               board="2h7h9sTdQc",
+               action_history=[
+                   {"player_seat": i % 4, "action": rng.choice(["call", "raise", "check", "fold"]),
+                    "amount": rng.choice([None, 40, 80, 123456789]), "street": i // 8,
+                    "ts": (datetime(2024, 1, 1) + timedelta(seconds=i)).isoformat(),
+                    "meta": {"note": "é ", "score": 0.25, "tags": [1, None, True]}}
+                   for i in range(400)
+               ],
+               payoffs={"0": -500, "1": 1000, "2": -500, "3": 0},
+               created_at=datetime(2024, 5, 6, 7, 8, 9, 123456, tzinfo=timezone.utc), version=9)
+    yield Hand(id=3, uuid="u3", players=["A", "B", "C"], stacks=[960, 1040, 1000], dealer=0, sb=1, bb=2,
+               big_blind=40, hole_cards={"0": "AhKd", "1": "7c7d", "2": "TsJh"}, board="",
+               action_history=[{"player_seat": 0, "action": "fold"}], payoffs={1: 40, 0: -40, 2: 0},
+               created_at=datetime(2024, 5, 6, 7, 8, 9, tzinfo=timezone(timedelta(hours=-5))))
+
+
+def _both_modes(monkeypatch, call):
+    """Response bodies and headers of `call()` with fast serialization off, then on."""
+    out = []
+    for enabled in (False, True):
+        monkeypatch.setattr(serialization, "ENABLED", enabled)
+        resp = call()
+        out.append((resp.status_code, resp.headers.get("content-type"), resp.headers.get("etag"), resp.content))
+    return out
+
+
+@pytest.mark.parametrize("hand", list(_hands()), ids=lambda h: f"hand{h.id}")
+def test_hand_routes_encode_byte_for_byte_like_pydantic(monkeypatch, hand):
+    async def fake_get(self, hand_id):
+        return hand
+
+    async def fake_submit(self, hand_id, action, **kwargs):
+        return hand
+
+    async def fake_start(self, *args, **kwargs):
+        return hand
+
+    monkeypatch.setattr(HandRepository, "get_hand", fake_get)
+    monkeypatch.setattr(HandService, "submit_action", fake_submit)
+    monkeypatch.setattr(HandService, "start_hand", fake_start)
+
+    default, fast = _both_modes(monkeypatch, lambda: client.get(f"/hands/{hand.id}"))
+    assert fast == default
+    default, fast = _both_modes(
+        monkeypatch, lambda: client.post(f"/hands/{hand.id}/action", json={"hand_id": hand.id, "action": "call", "version": 1}))
+    assert fast == default
+    default, fast = _both_modes(monkeypatch, lambda: client.post("/hands", json={"players": ["A", "B"]}))
+    assert fast == default and fast[0] == 201
+
+
+@pytest.mark.parametrize("hand", list(_hands())[1:], ids=lambda h: f"hand{h.id}")
+def test_game_routes_encode_byte_for_byte_like_default(monkeypatch, hand):
+    async def fake_get(self, hand_id):
+        return hand
+
+    async def fake_hand(self, *args, **kwargs):
+        return hand
+
+    monkeypatch.setattr(HandRepository, "get_hand", fake_get)
+    monkeypatch.setattr(HandService, "submit_action", fake_hand)
+    monkeypatch.setattr(HandService, "start_hand", fake_hand)
+
+    calls = [
+        lambda: client.post("/game/start-hand", json={"players": hand.players}),
+        lambda: client.post(f"/game/deal?hand_id={hand.id}"),
+        lambda: client.post("/game/action", json={"hand_id": hand.id, "action": "call", "idempotency_key": "k1"}),
+    ]
+    for call in calls:
+        default, fast = _both_modes(monkeypatch, call)
+        assert fast == default
+
+
+def test_model_encoder_matches_model_field_order():
+    hand = list(_hands())[2]
+    encoder = serialization.encoder_for(HandResponse)
+    assert serialization.encoder_for(HandResponse) is encoder  # built once per model
+    assert list(encoder.to_dict(hand)) == list(HandResponse.__fields__)
+    assert encoder.encode(hand) == HandResponse(**vars(hand)).json(separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def test_fast_mode_falls_back_when_orjson_cannot_encode(monkeypatch):
+    hand = list(_hands())[0]
+    big = Hand(**{**vars(hand), "action_history": [{"action": "bet", "meta": {"n": 2 ** 70}}]})
+
+    async def fake_get(self, hand_id):
+        return big
+
+    monkeypatch.setattr(HandRepository, "get_hand", fake_get)
+    default, fast = _both_modes(monkeypatch, lambda: client.get("/hands/1"))
+    assert fast == default
+    assert b"1180591620717411303424" in fast[3]
@@ -1,15 +1,24 @@
+import datetime
+
 import pytest
+from app.services import hand_service
+from app.services.engine import board_str, replay_state
 from app.services.hand_service import HandService
+from app.services.hand_registry import LiveHandRegistry
 from app.models import Hand
+from app.repository.hand_repository import HandUnitOfWork
 
 class FakeRepo:
     def __init__(self):
         self._id = 1
         self.store = {}
+        self.live_states = {}
+        self.keyed_actions = {}
 
     async def create_hand(self, uuid, players, stacks, dealer, sb, bb, big_blind, hole_cards):
         hand = Hand(id=self._id, uuid=uuid, players=players, stacks=stacks, dealer=dealer,
-                    sb=sb, bb=bb, big_blind=big_blind, hole_cards=hole_cards, board="", action_history=[])
+                    sb=sb, bb=bb, big_blind=big_blind, hole_cards=hole_cards, board="", action_history=[],
+                    created_at=datetime.datetime.now(datetime.timezone.utc), starting_stacks=list(stacks))
         self.store[self._id] = hand
         self._id += 1
         return hand
@@ -17,17 +26,283 @@ class FakeRepo:
     async def get_hand(self, hand_id):
         return self.store.get(hand_id)
 
-    async def append_action(self, hand_id, action):
+    async def append_action(self, hand_id, action, created_at):
         self.store[hand_id].action_history.append(action)
 
+    async def update_stacks(self, hand_id, stacks, created_at):
+        self.store[hand_id].stacks = stacks
+
+    async def update_board(self, hand_id, board_str, created_at):
+        self.store[hand_id].board = board_str
+
+    async def update_payoffs(self, hand_id, payoffs, created_at):
+        self.store[hand_id].payoffs = payoffs
+
+    def unit_of_work(self, hand_id, created_at, expected_version=None):
+        return HandUnitOfWork(self, hand_id, created_at, expected_version)
+
+    async def find_action(self, hand_id, idempotency_key):
+        return self.keyed_actions.get((hand_id, idempotency_key))
+
+    async def get_live_state(self, hand_id):
+        hand = self.store.get(hand_id)
+        return (self.live_states.get(hand_id), hand.version, hand.created_at) if hand else None
+
+    async def flush_hand(self, hand_id, created_at, actions, stacks=None, board=None, payoffs=None,
+                         live_state=None, expected_version=None, idempotency_keys=None):
+        self.flushes = getattr(self, "flushes", 0) + 1
+        hand = self.store[hand_id]
+        assert created_at == hand.created_at  # writes carry the hand's whole key
+        if expected_version is not None and hand.version != expected_version:
+            return None
+        keyed = {(hand_id, k): a for k, a in zip(idempotency_keys or [], actions) if k is not None}
+        if any(k in self.keyed_actions for k in keyed):
+            return None
+        self.keyed_actions.update(keyed)
+        hand.version += 1
+        self.live_states[hand_id] = live_state
+        hand.action_history.extend(actions)
+        if stacks is not None:
+            hand.stacks = stacks
+        if board is not None:
+            hand.board = board
+        if payoffs is not None:
+            hand.payoffs = payoffs
+        return hand
+
 @pytest.mark.asyncio
 async def test_start_hand_and_submit_action():
     repo = FakeRepo()
-    service = HandService(repo)
+    service = HandService(repo, LiveHandRegistry())
     players = ["A","B","C"]
     stacks = [1000,1000,1000]
     hand = await service.start_hand(players, stacks, dealer=0, big_blind=40)
     assert hand is not None
-    updated = await service.submit_action(hand.id, {"player_seat":0, "action":"bet", "amount":40})
+    before = len(hand.action_history)
+    updated = await service.submit_action(hand.id, {"player_seat":0, "action":"call"})
+    got = await repo.get_hand(hand.id)
+    assert len(got.action_history) > before
+    assert got.action_history[before]["player_seat"] == 0
+
+@pytest.mark.asyncio
+async def test_submit_action_from_new_service_instance():
+    repo = FakeRepo()
+    registry = LiveHandRegistry()
+    hand = await HandService(repo, registry).start_hand(["A","B","C"], [1000,1000,1000])
+    # Each request builds its own HandService; the live state must survive that
+    await HandService(repo, registry).submit_action(hand.id, {"player_seat":0, "action":"call"})
+    assert registry.hits == 1
+
+@pytest.mark.asyncio
+async def test_evicted_hand_is_rebuilt_from_history():
+    repo = FakeRepo()
+    registry = LiveHandRegistry(max_hands=1)
+    service = HandService(repo, registry)
+    hand = await service.start_hand(["A","B","C"], [1000,1000,1000])
+    await service.submit_action(hand.id, {"player_seat":0, "action":"call"})
+    live = registry.get(hand.id)
+
+    await service.start_hand(["D","E"], [500,500])  # pushes the first hand out
+    assert hand.id not in registry
+    assert registry.evictions == 1
+
+    rebuilt = replay_state(await repo.get_hand(hand.id))
+    assert list(rebuilt.stacks) == list(live.stacks)
+    assert rebuilt.actor_index == live.actor_index
+    assert board_str(rebuilt) == board_str(live)
+
     got = await repo.get_hand(hand.id)
-    assert len(got.action_history) == 1
+    while got.payoffs is None:
+        got = await service.submit_action(hand.id, {"player_seat":0, "action":"call"})
+    assert sum(got.payoffs.values()) == 0
+    assert len(got.board) == 10
+
+@pytest.mark.asyncio
+async def test_hand_without_starting_stacks_is_not_replayed_from_current_stacks():
+    repo = FakeRepo()
+    service = HandService(repo, LiveHandRegistry())
+    hand = await service.start_hand(["A","B","C"], [1000,1000,1000])
+    stored = repo.store[hand.id]
+    assert stored.action_history  # the bots acted
+    stored.starting_stacks = None  # as left by the original backfill
+    with pytest.raises(ValueError, match="starting stacks"):
+        replay_state(stored)
+    stored.action_history = []
+    replay_state(stored)  # nothing has moved yet: the stacks are the starting ones
+
+def test_registry_idle_ttl_and_counters():
+    now = [0.0]
+    registry = LiveHandRegistry(max_hands=10, idle_ttl=5, clock=lambda: now[0])
+    registry[1] = "state"
+    assert registry.get(1) == "state"
+    now[0] = 10.0
+    assert registry.get(1) is None
+    assert registry.stats()["hits"] == 1
+    assert registry.stats()["misses"] == 1
+    assert registry.stats()["evictions"] == 1
+
+@pytest.mark.asyncio
+async def test_submit_action_flushes_once_and_is_all_or_nothing():
+    repo = FakeRepo()
+    registry = LiveHandRegistry()
+    service = HandService(repo, registry)
+    hand = await service.start_hand(["A","B","C"], [1000,1000,1000])
+    before = len(hand.action_history)
+    repo.flushes = 0
+
+    await service.submit_action(hand.id, {"player_seat":0, "action":"call"})
+    assert repo.flushes == 1
+
+    async def failing_flush(*args, **kwargs):
+        raise RuntimeError("db down")
+    repo.flush_hand = failing_flush
+    persisted = len(repo.store[hand.id].action_history)
+    with pytest.raises(RuntimeError):
+        await service.submit_action(hand.id, {"player_seat":0, "action":"call"})
+    assert len(repo.store[hand.id].action_history) == persisted
+    assert hand.id not in registry
+
+@pytest.mark.asyncio
+async def test_committed_actions_are_published_to_table_feed():
+    import json
+    from app.services.table_feed import TableFeed
+    repo = FakeRepo()
+    feed = TableFeed()
+    service = HandService(repo, LiveHandRegistry(), feed)
+    hand = await service.start_hand(["A","B","C"], [1000,1000,1000])
+    sub = feed.subscribe(hand.id)
+    feed.seed(hand, service._in_memory_states.get(hand.id))
+    before = len(hand.action_history)
+    await service.submit_action(hand.id, {"player_seat":0, "action":"call"})
+
+    assert json.loads(sub.queue.get_nowait())["type"] == "snapshot"
+    diff = json.loads(sub.queue.get_nowait())
+    assert diff["type"] == "diff" and diff["v"] == 2
+    assert diff["actions"][0]["player_seat"] == 0
+    assert len(diff["actions"]) == len(repo.store[hand.id].action_history) - before
+
+@pytest.mark.asyncio
+async def test_workers_share_hands_through_snapshots(monkeypatch):
+    repo = FakeRepo()
+    worker_a, worker_b = LiveHandRegistry(), LiveHandRegistry()
+    hand = await HandService(repo, worker_a).start_hand(["A","B","C"], [1000,1000,1000])
+
+    # B has never seen the hand: it restores the stored snapshot instead of replaying
+    def no_replay(*args, **kwargs):
+        raise AssertionError("hand was replayed")
+    with monkeypatch.context() as m:
+        m.setattr(hand_service, "replay_state", no_replay)
+        await HandService(repo, worker_b).submit_action(hand.id, {"player_seat":0, "action":"call"})
+    version = repo.store[hand.id].version
+
+    # A's live state is now stale: its write is refused and retried from B's snapshot
+    before = len(repo.store[hand.id].action_history)
+    got = await HandService(repo, worker_a).submit_action(hand.id, {"player_seat":0, "action":"call"})
+    assert got.version == version + 1
+    assert got.action_history[before]["player_seat"] == 0
+    assert worker_a.version(hand.id) == got.version
+
+@pytest.mark.asyncio
+async def test_retried_action_is_applied_once_and_stale_versions_conflict():
+    from app.services.hand_service import ActionConflict
+    from app.services.idempotency import ActionResults, HandLocks
+    repo = FakeRepo()
+    results = ActionResults()
+    service = HandService(repo, LiveHandRegistry(), results=results, locks=HandLocks())
+    hand = await service.start_hand(["A","B","C"], [1000,1000,1000])
+    version = hand.version
+
+    got = await service.submit_action(hand.id, {"player_seat":0, "action":"call"}, version=version)
+    applied, after = len(repo.store[hand.id].action_history), got.version
+    assert await service.submit_action(hand.id, {"player_seat":0, "action":"call"}, version=version) is got
+    assert len(repo.store[hand.id].action_history) == applied
+    assert results.duplicates == 1
+
+    with pytest.raises(ActionConflict):  # same version, different action
+        await service.submit_action(hand.id, {"player_seat":0, "action":"fold"}, version=version)
+    with pytest.raises(ActionConflict):  # ahead of the hand
+        await service.submit_action(hand.id, {"player_seat":0, "action":"call"}, version=after + 5)
+    assert results.conflicts == 2
+    assert len(repo.store[hand.id].action_history) == applied
+
+    if got.payoffs is None:
+        nxt = await service.submit_action(hand.id, {"player_seat":0, "action":"call"}, version=after)
+        assert nxt.version == after + 1
+
+@pytest.mark.asyncio
+async def test_client_keys_and_versions_do_not_share_names():
+    from app.services.idempotency import ActionResults, HandLocks
+    repo = FakeRepo()
+    service = HandService(repo, LiveHandRegistry(), results=ActionResults(), locks=HandLocks())
+    hand = await service.start_hand(["A","B","C"], [1000,1000,1000])
+    version = hand.version
+
+    got = await service.submit_action(hand.id, {"player_seat":0, "action":"call"}, version=version)
+    if got.payoffs is None:
+        after = got.version
+        # a client key spelled like the version key is a new submission, not a retry
+        nxt = await service.submit_action(hand.id, {"player_seat":0, "action":"call"},
+                                          idempotency_key=f"v{version}")
+        assert nxt.version == after + 1
+
+@pytest.mark.asyncio
+async def test_idempotency_key_is_recognised_by_another_worker():
+    from app.services.hand_service import ActionConflict
+    from app.services.idempotency import ActionResults
+    repo = FakeRepo()
+    worker_a, worker_b = LiveHandRegistry(), LiveHandRegistry()
+    hand = await HandService(repo, worker_a, results=ActionResults()).start_hand(["A","B","C"], [1000,1000,1000])
+
+    lookups = []
+    find = repo.find_action
+
+    async def counted_find(hand_id, key):
+        lookups.append(key)
+        return await find(hand_id, key)
+    repo.find_action = counted_find
+
+    await HandService(repo, worker_a, results=ActionResults()).submit_action(
+        hand.id, {"player_seat":0, "action":"call"}, idempotency_key="tap-1")
+    applied = len(repo.store[hand.id].action_history)
+    assert lookups == []  # a first submission is not looked up, the write enforces the key
+    # the retry lands on a worker that never saw the response: the stored action gives it away
+    got = await HandService(repo, worker_b, results=ActionResults()).submit_action(
+        hand.id, {"player_seat":0, "action":"call"}, idempotency_key="tap-1")
+    assert len(got.action_history) == applied
+    assert not any("idempotency_key" in a for a in got.action_history)  # kept out of the action itself
+    assert lookups == ["tap-1"]
+
+    # ...and the same key with another action is refused there too
+    with pytest.raises(ActionConflict):
+        await HandService(repo, LiveHandRegistry(), results=ActionResults()).submit_action(
+            hand.id, {"player_seat":0, "action":"allin"}, idempotency_key="tap-1")
+    assert len(repo.store[hand.id].action_history) == applied
+
+@pytest.mark.asyncio
+async def test_concurrent_submissions_to_a_hand_take_turns_or_fail_fast():
+    import asyncio
+    from app.services.hand_service import ActionConflict
+    from app.services.idempotency import ActionResults, HandLocks
+    repo = FakeRepo()
+    locks = HandLocks()
+    service = HandService(repo, LiveHandRegistry(), results=ActionResults(), locks=locks)
+    hand = await service.start_hand(["A","B","C"], [1000,1000,1000])
+    flush = repo.flush_hand
+
+    async def slow_flush(*args, **kwargs):
+        await asyncio.sleep(0.01)
+        return await flush(*args, **kwargs)
+    repo.flush_hand = slow_flush
+    repo.flushes = 0
+
+    call = {"player_seat":0, "action":"call"}
+    first, retry, other = await asyncio.gather(
+        service.submit_action(hand.id, dict(call), version=hand.version),
+        service.submit_action(hand.id, dict(call), version=hand.version),  # waits for the first's response
+        service.submit_action(hand.id, dict(call), idempotency_key="other", version=hand.version),
+        return_exceptions=True,
+    )
+    assert retry is first
+    assert isinstance(other, ActionConflict)
+    assert repo.flushes == 1
+    assert len(locks) == 0
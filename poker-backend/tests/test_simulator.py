@@ -0,0 +1,19 @@
+from app.simulator import simulate
+
+def test_simulation_is_deterministic_across_shards():
+    single = simulate(60, num_players=4, seed=3)
+    sharded = simulate(60, num_players=4, seed=3, workers=3)
+    assert single["seats"] == sharded["seats"]
+    assert single["actions"] == sharded["actions"]
+
+def test_simulation_conserves_chips():
+    report = simulate(40, num_players=3, seed=1)
+    assert report["hands"] == 40
+    assert sum(seat["chips"] for seat in report["seats"]) == 0
+    assert abs(sum(a["share"] for a in report["actions"].values()) - 1) < 1e-9
+
+def test_simulation_ignores_the_llm_backend(monkeypatch):
+    from app.services import hand_service
+    monkeypatch.setattr(hand_service, "BOT_BACKEND", "gemini")
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    assert simulate(5, num_players=2, seed=1)["hands"] == 5
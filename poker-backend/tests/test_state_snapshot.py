@@ -0,0 +1,49 @@
+import pickle
+import random
+import pytest
+from app.services.engine import apply_action, create_state, deal_board
+from app.services.hand_registry import LiveHandRegistry
+from app.services.hand_service import HandService
+from app.services.state_snapshot import SnapshotError, dump_state, load_state
+from app.utils.deck import Deck, cards_to_str
+
+def _assert_same(a, b):
+    va, vb = dict(vars(a)), dict(vars(b))
+    va.pop("operations"), vb.pop("operations")
+    assert va.keys() == vb.keys()
+    for k in va:
+        assert va[k] == vb[k] and type(va[k]) is type(vb[k]), k
+
+def test_restored_states_match_and_play_on_identically():
+    svc = HandService(None, LiveHandRegistry())
+    for seed in range(40):
+        n = 2 + seed % 5
+        state = create_state(n, [4000] * n, 40)
+        for cards in Deck.shuffled(seed).deal_hole_cards(n):
+            state.deal_hole(cards_to_str(cards))
+        rng = random.Random(seed)
+        while state.status:
+            data = dump_state(state)
+            assert len(data) < 512
+            restored = load_state(data)
+            _assert_same(state, restored)
+            state = restored  # keep playing on the restored copy
+            if rng.random() < 0.3 and state.can_complete_bet_or_raise_to():
+                apply_action(state, None, "raise", state.min_completion_betting_or_raising_to_amount)
+            else:
+                action = svc.choose_bot_action(state)
+                apply_action(state, None, action["action"], action.get("amount"))
+            deal_board(state)
+        assert sum(state.payoffs) == 0
+
+def test_snapshot_rejects_finished_hands_and_foreign_data():
+    state = create_state(2, [1000, 1000], 40)
+    for cards in Deck.shuffled(1).deal_hole_cards(2):
+        state.deal_hole(cards_to_str(cards))
+    state.fold()
+    with pytest.raises(SnapshotError):
+        dump_state(state)
+    with pytest.raises(SnapshotError):
+        load_state(pickle.dumps(print))  # never imports anything
+    with pytest.raises(SnapshotError):
+        load_state(pickle.dumps((99,)))
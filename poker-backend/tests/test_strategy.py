@@ -0,0 +1,75 @@
+import random
+from collections import Counter
+
+import pytest
+from app.services.engine import apply_action, create_state, deal_board
+from app.services.strategy import (
+    ALLIN, BB, BTN, CALL, CO, DRAW, EP, FOLD, MP, MONSTER, RAISE, SB, StrategyError, StrategyTables, AIR, TOP_PAIR,
+    TRIPS, decide, depth_bucket, hand_class, load_strategy, odds_bucket, position, strength_bucket,
+)
+from app.services.strategy_builder import build_tables
+from app.utils.deck import Deck, cards_to_str, parse_cards
+
+def test_hand_classes_cover_the_grid():
+    classes = Counter(hand_class(a, b) for a in range(52) for b in range(a + 1, 52))
+    assert len(classes) == 169
+    assert sorted(Counter(classes.values()).items()) == [(4, 78), (6, 13), (12, 78)]
+    assert hand_class(*parse_cards("AhKh")) != hand_class(*parse_cards("AhKd"))
+    assert hand_class(*parse_cards("AhKd")) == hand_class(*parse_cards("KcAs"))
+
+def test_situation_buckets():
+    assert [position(s, 6) for s in range(6)] == [SB, BB, EP, MP, CO, BTN]
+    assert [position(s, 3) for s in range(3)] == [SB, BB, BTN]
+    assert [position(s, 2) for s in range(2)] == [BB, SB]
+    assert [depth_bucket(bb) for bb in (10, 15, 16, 50, 100)] == [0, 0, 1, 2, 3]
+    assert odds_bucket(0, 100) == 0
+    assert odds_bucket(50, 100) == 4  # 1/3 of the pot after calling
+    assert odds_bucket(1000, 100) == 6
+
+@pytest.mark.parametrize("hole, board, bucket", [
+    ("AhAs", "Ad7c2s", TRIPS),
+    ("AhKd", "Kc7s2d", TOP_PAIR),
+    ("9h8h", "7h6h2c", DRAW),
+    ("2c3d", "AhAsAdKcKd", AIR),  # plays the board
+    ("KhKs", "Kd7c7s2h", MONSTER),
+    ("2c3d", "AhJs9d", AIR),
+])
+def test_strength_buckets(hole, board, bucket):
+    assert strength_bucket(parse_cards(hole), parse_cards(board)) == bucket
+
+def test_tables_round_trip_and_reject_foreign_files(tmp_path):
+    data = build_tables(preflop_samples=200, postflop_samples=2000, seed=1)
+    assert data == build_tables(preflop_samples=200, postflop_samples=2000, seed=1)
+    path = tmp_path / "strategy.bin"
+    path.write_bytes(data)
+    tables = StrategyTables.open(str(path))
+    aces, seven_deuce = hand_class(*parse_cards("AhAd")), hand_class(*parse_cards("7h2d"))
+    for pos in (EP, MP, CO, BTN, SB, BB):
+        assert tables.preflop(0, pos, 3, aces) == RAISE
+        assert tables.preflop(1, pos, 0, aces) == ALLIN
+    assert tables.preflop(0, EP, 3, seven_deuce) == FOLD
+    assert tables.postflop(2, 6, AIR) == FOLD
+    assert tables.postflop(0, 0, MONSTER) == RAISE
+    assert tables.postflop(0, 1, TOP_PAIR) in (CALL, RAISE)
+
+    for bad in (b"", data[:-1], b"XXXX" + data[4:]):
+        with pytest.raises(StrategyError):
+            StrategyTables(bad)
+
+def test_shipped_tables_play_legal_hands():
+    tables = load_strategy()
+    assert tables is not None
+    actions = Counter()
+    for seed in range(60):
+        n = 2 + seed % 5
+        state = create_state(n, [random.Random(seed).choice([400, 4000])] * n, 40)
+        for cards in Deck.shuffled(seed).deal_hole_cards(n):
+            state.deal_hole(cards_to_str(cards))
+        deal_board(state)
+        while state.status:
+            action = decide(state, tables)
+            assert action["player_seat"] == state.actor_index
+            apply_action(state, action["player_seat"], action["action"], action.get("amount"))
+            actions[action["action"]] += 1
+            deal_board(state)
+    assert {"fold", "raise"} <= set(actions)
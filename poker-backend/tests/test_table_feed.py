@@ -0,0 +1,57 @@
+import json
+import pytest
+from app.models import Hand
+from app.services.table_feed import TableFeed, table_diff, table_snapshot
+
+def _hand(**overrides):
+    fields = dict(id=7, uuid="u7", players=["A","B"], stacks=[1000,1000], dealer=0, sb=1, bb=0,
+                  big_blind=40, hole_cards={"0":"AhKd", "1":"7c7d"}, board="", action_history=[])
+    fields.update(overrides)
+    return Hand(**fields)
+
+def _messages(subscriber):
+    out = []
+    while not subscriber.queue.empty():
+        out.append(json.loads(subscriber.queue.get_nowait()))
+    return out
+
+def test_table_diff_only_carries_changes():
+    old = table_snapshot(_hand())
+    new = table_snapshot(_hand(stacks=[960,1000], board="2c3c4c",
+                               action_history=[{"player_seat": 0, "action": "call"}]))
+    assert table_diff(old, new) == {"stacks": [960,1000], "board": ["2c","3c","4c"],
+                                    "actions": [{"player_seat": 0, "action": "call"}]}
+    assert table_diff(new, new) == {}
+
+@pytest.mark.asyncio
+async def test_subscriber_gets_snapshot_then_diffs():
+    feed = TableFeed()
+    feed.publish(_hand())  # nobody is watching yet: nothing is kept
+    assert feed.stats()["tables"] == 0
+
+    sub = feed.subscribe(7)
+    feed.seed(_hand())
+    feed.publish(_hand(board="2c3c4c"))
+    feed.publish(_hand(board="2c3c4c"))  # unchanged: no message
+    snapshot, diff = _messages(sub)
+    assert snapshot["type"] == "snapshot" and snapshot["v"] == 1
+    assert "hole_cards" not in snapshot["table"]
+    assert diff == {"type": "diff", "v": 2, "board": ["2c","3c","4c"]}
+
+    late = feed.subscribe(7)
+    assert _messages(late)[0]["table"]["board"] == ["2c","3c","4c"]
+    feed.unsubscribe(sub)
+    feed.unsubscribe(late)
+    assert feed.stats()["tables"] == 0
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_is_resynced_with_a_snapshot():
+    feed = TableFeed(queue_size=2)
+    slow = feed.subscribe(7)
+    feed.seed(_hand())
+    for i in range(1, 5):
+        feed.publish(_hand(action_history=[{"action": "call"}] * i))
+    (message,) = _messages(slow)
+    assert message["type"] == "snapshot"
+    assert message["v"] == 5 and len(message["table"]["actions"]) == 4
+    assert slow.resyncs == feed.resyncs == 2
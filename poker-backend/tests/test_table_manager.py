@@ -0,0 +1,124 @@
+import asyncio
+
+import pytest
+from app.services.table_manager import HandWriter, Scheduler, Table, TableManager
+
+class FakeRepo:
+    def __init__(self, fail=0, poison=()):
+        self.batches = []
+        self.fail = fail
+        self.poison = list(poison)
+
+    async def bulk_insert_hands(self, hands, fold_stats=False):
+        if any(h in self.poison for h in hands):
+            raise ValueError("bad hand")
+        if self.fail:
+            self.fail -= 1
+            raise ConnectionError("db down")
+        self.batches.append(list(hands))
+        return len(hands)
+
+def test_button_moves_over_live_seats():
+    table = Table(1, list("abcd"), [100, 100, 0, 100])
+    orders = [table.next_hand_seats() for _ in range(4)]
+    # small blind first, button last; the busted seat 2 is skipped
+    assert orders == [[1, 3, 0], [3, 0, 1], [0, 1, 3], [1, 3, 0]]
+    table.stacks = [0, 0, 0, 100]
+    assert table.done()
+
+@pytest.mark.asyncio
+async def test_scheduler_takes_turns_round_robin():
+    scheduler = Scheduler(steps_per_tick=2)
+    scheduler.start()
+    order = []
+
+    async def player(name):
+        for _ in range(3):
+            await scheduler.turn()
+            order.append(name)
+
+    await asyncio.gather(*(player(n) for n in "abc"))
+    await scheduler.stop()
+    assert order == list("abc" * 3)
+    assert scheduler.steps == 9 and scheduler.ticks >= 5
+
+@pytest.mark.asyncio
+async def test_tables_play_concurrently_and_write_in_batches():
+    repo = FakeRepo()
+    manager = TableManager(writer=HandWriter(repo, batch_size=25, interval=0.01))
+    await manager.start()
+    tables = [manager.open_table([f"t{t}p{s}" for s in range(3)], [1000] * 3, max_hands=10, seed=t)
+              for t in range(20)]
+    await manager.wait()
+    await manager.stop()
+
+    hands = [h for batch in repo.batches for h in batch]
+    assert len(hands) == manager.stats()["hands"] == 200
+    assert all(len(batch) <= 25 for batch in repo.batches) and len(repo.batches) >= 8
+    for table in tables:
+        assert table.hands_played == 10 and sum(table.stacks) == 3000
+    for hand in hands:
+        assert sum(hand.payoffs.values()) == 0
+        assert [a + p for a, p in zip(hand.starting_stacks, hand.payoffs.values())] == hand.stacks
+    # dealer rotation: a player's seat in the hand moves by one each hand
+    first, second = [h for h in hands if h.players[0].startswith("t0p")][:2]
+    assert first.players[1:] + first.players[:1] == second.players
+
+@pytest.mark.asyncio
+async def test_tournament_table_plays_down_to_one_player():
+    manager = TableManager()
+    await manager.start()
+    table = manager.open_table(list("abcd"), [200] * 4, seed=5)
+    await manager.wait()
+    await manager.stop()
+    assert sorted(table.stacks) == [0, 0, 0, 800]
+    assert table.finished and table.hands_played > 1
+
+@pytest.mark.asyncio
+async def test_human_seat_acts_or_times_out():
+    manager = TableManager(action_timeout=0.05)
+    await manager.start()
+    table = manager.open_table(["you", "bot"], [1000, 1000], humans=[0], max_hands=2, seed=1)
+    manager.submit(table.id, 0, {"action": "raise", "amount": 10**6})  # illegal: ignored
+    manager.submit(table.id, 0, {"action": "fold"})
+    await manager.wait()
+    await manager.stop()
+    assert table.hands_played == 2
+    assert table.timeouts >= 1
+    with pytest.raises(ValueError):
+        manager.submit(table.id, 1, {"action": "fold"})
+
+@pytest.mark.asyncio
+async def test_writer_retries_failed_batches():
+    repo = FakeRepo(fail=2)
+    writer = HandWriter(repo, batch_size=2, interval=0.01, max_pending=3)
+    writer.start()
+    for i in range(6):  # blocks while 3 hands wait for the DB to come back
+        await writer.add(i)
+    await writer.stop()
+    assert [h for batch in repo.batches for h in batch] == list(range(6))
+    assert writer.errors == 2 and "db down" in writer.last_error
+
+@pytest.mark.asyncio
+async def test_writer_sets_aside_a_hand_that_keeps_failing():
+    repo = FakeRepo(poison=[1])
+    writer = HandWriter(repo, batch_size=3, interval=0.01, max_failures=2)
+    for i in range(6):
+        await writer.add(i)
+    assert not await writer.flush() and not await writer.flush()
+    assert await writer.flush()  # third try: one hand at a time
+    assert writer.dead_letter == [1] and writer.pending() == 3
+    await writer.stop()
+    assert [h for batch in repo.batches for h in batch] == [0, 2, 3, 4, 5]
+    assert writer.written == 5 and writer.errors == 3 and "bad hand" in writer.last_error
+
+@pytest.mark.asyncio
+async def test_writer_stop_writes_around_a_bad_hand_before_giving_up():
+    repo = FakeRepo(poison=[4])
+    writer = HandWriter(repo, batch_size=3, interval=0.001, max_failures=2)
+    for i in range(6):
+        await writer.add(i)
+    with pytest.raises(RuntimeError, match="1 hands could not be written"):
+        await writer.stop()
+    assert [h for batch in repo.batches for h in batch] == [0, 1, 2, 3, 5]
+    assert writer.dead_letter == [4] and writer.pending() == 0